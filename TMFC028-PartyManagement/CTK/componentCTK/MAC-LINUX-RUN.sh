@@ -4,12 +4,16 @@ echo "🚀 Starting CTK Execution (macOS/Linux)..."
 # Step 1: Change to the componentCTK/scripts directory
 cd "$(dirname "$0")/scripts"
 
-# Step 2: Install Python dependencies
-echo "📦 Installing Python dependencies..."
-pip3 install -r requirements.txt
+# Step 2: Install Python dependencies, unless they are already installed
+if python3 requirements_check.py requirements.txt; then
+    echo "📦 Python dependencies already installed"
+else
+    echo "📦 Installing Python dependencies..."
+    pip3 install -r requirements.txt
+fi
 
-# Step 3: Run CTK Executor
+# Step 3: Run CTK Executor (arguments are passed on, e.g. ./MAC-LINUX-RUN.sh fetch)
 echo "🧪 Running CTK Executor..."
-python3 CTK_Executor.py
+python3 CTK_Executor.py "$@"
 
 echo "✅ CTK execution complete."
@@ -4,13 +4,18 @@ echo 🚀 Starting CTK Execution (Windows)...
 :: Step 1: Move into the scripts folder
 cd /d %~dp0scripts
 
-:: Step 2: Install Python dependencies
-echo 📦 Installing Python dependencies...
-pip install -r requirements.txt
+:: Step 2: Install Python dependencies, unless they are already installed
+python requirements_check.py requirements.txt
+if errorlevel 1 (
+    echo 📦 Installing Python dependencies...
+    pip install -r requirements.txt
+) else (
+    echo 📦 Python dependencies already installed
+)
 
-:: Step 3: Run the CTK Executor
+:: Step 3: Run the CTK Executor (arguments are passed on, e.g. WINDOWS-RUN.bat fetch)
 echo 🧪 Running CTK Executor...
-python CTK_Executor.py
+python CTK_Executor.py %*
 
 echo ✅ CTK execution complete.
 pause
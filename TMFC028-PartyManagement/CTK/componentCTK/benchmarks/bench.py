@@ -0,0 +1,221 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import subprocess
+
+import fakes
+
+# End to end benchmarks of CTK_Executor.py against local stand-in services.
+#
+# Every scenario runs 'CTK_Executor.py run' as a subprocess in a workspace copy of componentCTK,
+# with GitHub, S3 and the TMF API served locally and helm, kubectl and npm replaced by fakes
+# (see fakes.py). Scenarios cover cold runs (empty CTK/node_modules caches and workspace) and
+# warm runs, 1 vs N APIs, result sizes, and the load test. Timings come from the wall time of
+# the run and from the ctkProfile.json the executor writes.
+#
+# Results are compared with a stored baseline; the run fails when a metric regressed by more
+# than the tolerance. Record a baseline on the machine that checks it with --update-baseline.
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+COMPONENT_CTK_DIR = os.path.dirname(BENCH_DIR)
+SCRIPTS_DIR = os.path.join(COMPONENT_CTK_DIR, "scripts")
+sys.path.insert(0, SCRIPTS_DIR)
+import multi_target  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+RELEASE = "bench"
+
+# Stage timings from ctkProfile.json that are checked against the baseline
+PROFILE_STAGES = ["spec download", "generateComponentYaml", "prefetch", "process_apis", "api resolution",
+                  "readiness check", "npm install", "npm start", "consolidate_results_to_json"]
+# Metrics where a lower value is a regression
+HIGHER_IS_BETTER = {"loadRps"}
+
+
+def mb(value):
+    return int(float(value) * 1024 * 1024)
+
+
+class Bench:
+    def __init__(self, work_dir, services):
+        self.work_dir = work_dir
+        self.services = services
+        self.bin_dir = os.path.join(work_dir, "bin")
+        self.state_dir = os.path.join(work_dir, "state")
+        self.cache_dir = os.path.join(work_dir, "cache")
+        fakes.write_tools(self.bin_dir, self.state_dir)
+        with open(os.path.join(COMPONENT_CTK_DIR, "CHANGE_ME.json"), "r", encoding="utf-8") as f:
+            self.base_config = json.load(f)
+
+    def workspace(self, apis):
+        return os.path.join(self.work_dir, "workspaces", f"{len(apis)}-apis", "componentCTK")
+
+    def reset(self, apis):
+        shutil.rmtree(self.workspace(apis), ignore_errors=True)
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def _config(self, workspace, apis, load):
+        config = json.loads(json.dumps(self.base_config))
+        config.update({
+            "component_to_run": fakes.COMPONENT_ID,
+            "releaseName": RELEASE,
+            "reportGeneratorSrc": "",
+            "standardComponentPath": os.path.join(workspace, "resources", "standard-components"),
+            "standardComponentDownload": self.services.standard_component_download(),
+            "ctk_download_urls": self.services.api_index_url(),
+            "ctk_name_mapping": {},
+            "offlineBundle": "",
+            "ctkCache": {**config.get("ctkCache", {}), "enabled": True, "cacheDir": self.cache_dir},
+            "nodeModulesCache": {"enabled": True, "cacheDir": os.path.join(self.cache_dir, "node-modules")},
+            "incrementalSettings": {"enabled": False},
+            "loadTest": {**config.get("loadTest", {}), "enabled": load, "durationSeconds": 3, "concurrency": 8,
+                         "ratePerSecond": 0, "apis": []}
+        })
+        config["ctkconfig"] = {**config.get("ctkconfig", {}), "payloads": {
+            f"{api}_v4": {"Resource": {"POST": {"payload": {"name": f"bench {api}"}}}} for api in apis
+        }}
+        config.pop("multiTarget", None)
+        return config
+
+    # Run the executor once and return its metrics
+    def run(self, apis, result_bytes, load=False):
+        workspace = self.workspace(apis)
+        multi_target.sync_workspace(COMPONENT_CTK_DIR, workspace)
+        with open(os.path.join(workspace, "CHANGE_ME.json"), "w", encoding="utf-8") as f:
+            json.dump(self._config(workspace, apis, load), f, indent=4)
+        with open(os.path.join(workspace, "scripts", "configData", "apiIndex.json"), "w", encoding="utf-8") as f:
+            json.dump(self.services.api_index, f, indent=4)
+        fakes.write_tool_state(self.state_dir, apis, RELEASE, result_bytes, self.services.url)
+
+        env = {**os.environ, "PATH": self.bin_dir + os.pathsep + os.environ.get("PATH", "")}
+        log_path = os.path.join(workspace, "bench-run.log")
+        start = time.perf_counter()
+        with open(log_path, "w", encoding="utf-8") as log:
+            result = subprocess.run([sys.executable, "CTK_Executor.py", "run"],
+                                    cwd=os.path.join(workspace, "scripts"), env=env,
+                                    stdout=log, stderr=subprocess.STDOUT)
+        wall = time.perf_counter() - start
+        if result.returncode != 0:
+            raise RuntimeError(f"CTK_Executor.py failed with code {result.returncode}, see {log_path}")
+
+        report_dir = os.path.join(workspace, "Reports", fakes.COMPONENT_FOLDER)
+        with open(os.path.join(report_dir, "ctkProfile.json"), "r", encoding="utf-8") as f:
+            summary = json.load(f)["summary"]
+        metrics = {"wall": round(wall, 3)}
+        for stage in PROFILE_STAGES:
+            if stage in summary:
+                metrics[stage] = summary[stage]["wall"]
+        consolidated = os.path.join(report_dir, "consolidateResults.json")
+        if os.path.exists(consolidated):
+            metrics["consolidatedMB"] = round(os.path.getsize(consolidated) / 1024 / 1024, 2)
+        if load:
+            with open(os.path.join(workspace, "resources", "results", "load-test", "loadResults.json"),
+                      "r", encoding="utf-8") as f:
+                total = json.load(f)["total"]
+            metrics["loadRps"] = total["rps"]
+            metrics["loadP95"] = total["p95"]
+        return metrics
+
+
+def run_scenarios(bench, api_counts, sizes, repeat):
+    results = {}
+
+    def record(name, fn):
+        runs = [fn() for _ in range(repeat)]
+        # Best of the repetitions, the least disturbed by the machine
+        best = {}
+        for key in runs[0]:
+            values = [r[key] for r in runs if r.get(key) is not None]
+            best[key] = (max if key in HIGHER_IS_BETTER else min)(values)
+        results[name] = best
+        print(f"{name:<28} " + "  ".join(f"{k}={v}" for k, v in best.items()))
+
+    smallest = mb(min(sizes))
+    for count in api_counts:
+        apis = fakes.api_ids(count)
+
+        def cold():
+            bench.reset(apis)
+            return bench.run(apis, smallest)
+
+        record(f"cold-{count}-apis", cold)
+        record(f"warm-{count}-apis", lambda: bench.run(apis, smallest))
+
+    apis = fakes.api_ids(max(api_counts))
+    for size in sizes:
+        record(f"results-{size}MB-{len(apis)}-apis", lambda: bench.run(apis, mb(size)))
+
+    apis = fakes.api_ids(2)
+    record("load-2-apis", lambda: bench.run(apis, smallest, load=True))
+    return results
+
+
+# Return the list of regressions of results against the baseline
+def compare(results, baseline, tolerance, slack):
+    regressions = []
+    for scenario, metrics in results.items():
+        for key, value in metrics.items():
+            expected = baseline.get(scenario, {}).get(key)
+            if expected is None or key == "consolidatedMB":
+                continue
+            if key in HIGHER_IS_BETTER:
+                regressed = value < expected * (1 - tolerance)
+            else:
+                regressed = value > expected * (1 + tolerance) + slack
+            if regressed:
+                regressions.append(f"{scenario} {key}: {value} (baseline {expected})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark CTK_Executor.py against local stand-in services")
+    parser.add_argument("--apis", type=int, nargs="+", default=[1, 8], help="API counts to run (default: 1 8)")
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[0.01, 10, 100],
+                        help="Total result sizes in MB (default: 0.01 10 100)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per scenario, the best one is kept")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression (0.25 = 25%%)")
+    parser.add_argument("--slack", type=float, default=0.5, help="Allowed absolute regression in seconds")
+    parser.add_argument("--workdir", default=os.path.join(BENCH_DIR, ".work"), help="Scratch directory")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    work_dir = os.path.abspath(args.workdir)
+    os.makedirs(work_dir, exist_ok=True)
+    services = fakes.FakeServices(os.path.join(work_dir, "data"), fakes.api_ids(max(args.apis + [2]))).start()
+    try:
+        results = run_scenarios(Bench(work_dir, services), args.apis, args.sizes_mb, max(1, args.repeat))
+    finally:
+        services.stop()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️ No baseline at {args.baseline}, run with --update-baseline to record one")
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance, args.slack)
+    if regressions:
+        print("❌ Regressions against the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("✅ No regression against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
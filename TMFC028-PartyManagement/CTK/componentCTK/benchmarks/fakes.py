@@ -0,0 +1,305 @@
+import os
+import sys
+import json
+import uuid
+import stat
+import zipfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Local stand-ins for everything a CTK run talks to:
+#   - GitHub (contents API and raw files) serving synthetic golden component YAMLs
+#   - S3 serving synthetic CTK zips listed in a generated apiIndex.json
+#   - a TMF API accepting POST/GET/PATCH/DELETE on any resource (used by the load test)
+#   - helm, kubectl and npm executables writing synthetic manifests and results
+
+COMPONENT_ID = "TMFC028"
+COMPONENT_FOLDER = "TMFC028-PartyManagement"
+COMPONENT_NAME = "bench-partymanagement"
+BASE_APIS = ["TMF632", "TMF669"]
+
+
+# API ids of a synthetic component with n exposed APIs
+def api_ids(n):
+    return (BASE_APIS + [f"TMF9{i:02d}" for i in range(n)])[:n]
+
+
+def golden_yaml(apis):
+    lines = [
+        "apiVersion: oda.tmforum.org/v1",
+        "kind: Component",
+        "metadata:",
+        f"  name: {COMPONENT_FOLDER.lower()}",
+        "spec:",
+        "  componentMetadata:",
+        "    id: TMFC028",
+        "    version: 1.0.0",
+        "  coreFunction:",
+        "    exposedAPIs:"
+    ]
+    for api in apis:
+        lines += [
+            f"    - id: {api}",
+            f"      name: {api.lower()}-api",
+            "      required: true",
+            f"      specification:",
+            f"      - url: https://example.org/{api}.swagger.json",
+            "        version: v4.0.0"
+        ]
+    lines += ["    dependentAPIs: []", "  securityFunction:", "    exposedAPIs: []", ""]
+    return "\n".join(lines)
+
+
+# Deployed manifest: the Component plus a Service and a Deployment per API
+def manifest_yaml(apis, release):
+    docs = []
+    component = {
+        "apiVersion": "oda.tmforum.org/v1",
+        "kind": "Component",
+        "metadata": {"name": COMPONENT_NAME},
+        "spec": {"coreFunction": {"exposedAPIs": [
+            {"id": api, "name": api.lower(), "implementation": f"{release}-{api.lower()}",
+             "path": f"/{release}/{api.lower()}/v4", "port": 8080} for api in apis
+        ]}}
+    }
+    docs.append(component)
+    for api in apis:
+        name = f"{release}-{api.lower()}"
+        docs.append({"apiVersion": "v1", "kind": "Service", "metadata": {"name": name},
+                     "spec": {"selector": {"app": name}, "ports": [{"port": 8080}]}})
+        docs.append({"apiVersion": "apps/v1", "kind": "Deployment", "metadata": {"name": name},
+                     "spec": {"replicas": 1, "template": {"metadata": {"labels": {"app": name}},
+                                                          "spec": {"containers": [{"name": "api", "image": f"{name}:1"}]}}}})
+    return "\n---\n".join(json.dumps(doc) for doc in docs) + "\n"
+
+
+# Synthetic CTK zip laid out like the published ones (CTK/config.json, run scripts, ctk/)
+def write_ctk_zip(path, api):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("CTK/config.json", json.dumps({"url": "http://localhost/placeholder"}))
+        z.writestr("CTK/Mac-Linux-RUNCTK.sh", "#!/bin/sh\ncd ctk && npm start\n")
+        z.writestr("CTK/ctk/package.json", json.dumps({"name": f"ctk-{api.lower()}", "version": "1.0.0"}))
+        z.writestr("CTK/ctk/package-lock.json", json.dumps({"name": f"ctk-{api.lower()}", "lockfileVersion": 3}))
+        z.writestr("CTK/ctk/index.js", "// synthetic CTK\n")
+        z.writestr(f"CTK/ctk/{api}.testkit.json", json.dumps({"item": [{"name": f"test {i}"} for i in range(200)]}))
+        z.writestr("CTK/RI/README.md", "reference implementation, removed on install\n")
+
+
+def _handler(routes, api_store):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, code, body, content_type="application/json", etag=None):
+            data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            if etag:
+                self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length", 0))
+            return self.rfile.read(length) if length else b""
+
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            if path in routes:
+                file_path = routes[path]
+                stat = os.stat(file_path)
+                etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self._send(304, b"", etag=etag)
+                    return
+                with open(file_path, "rb") as f:
+                    data = f.read()
+                self._send(200, data, "application/octet-stream", etag)
+            elif path.startswith("/api/"):
+                resource_id = path.rstrip("/").split("/")[-1]
+                if resource_id in api_store:
+                    self._send(200, api_store[resource_id])
+                else:
+                    self._send(200, list(api_store.values())[:10])
+            else:
+                self._send(404, {"message": "Not Found"})
+
+        def do_POST(self):
+            body = json.loads(self._body() or b"{}")
+            body["id"] = str(uuid.uuid4())
+            api_store[body["id"]] = body
+            self._send(201, body)
+
+        def do_PATCH(self):
+            patch = json.loads(self._body() or b"{}")
+            resource_id = self.path.rstrip("/").split("/")[-1]
+            if resource_id not in api_store:
+                self._send(404, {"message": "Not Found"})
+                return
+            api_store[resource_id].update(patch)
+            self._send(200, api_store[resource_id])
+
+        def do_DELETE(self):
+            resource_id = self.path.rstrip("/").split("/")[-1]
+            if api_store.pop(resource_id, None) is None:
+                self._send(404, {"message": "Not Found"})
+                return
+            self.send_response(204)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    return Handler
+
+
+# One local HTTP server for GitHub, S3 and the TMF API (paths /github, /raw, /s3, /api)
+class FakeServices:
+    def __init__(self, data_dir, apis):
+        self.data_dir = data_dir
+        self.apis = apis
+        self.routes = {}
+        self.api_store = {}
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(self.routes, self.api_store))
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._publish()
+
+    def _publish(self):
+        os.makedirs(self.data_dir, exist_ok=True)
+        contents = os.path.join(self.data_dir, "contents.json")
+        with open(contents, "w", encoding="utf-8") as f:
+            json.dump([{"type": "dir", "name": COMPONENT_FOLDER}], f)
+        self.routes["/github/repos/bench/components/contents"] = contents
+
+        golden = os.path.join(self.data_dir, f"{COMPONENT_FOLDER}.yaml")
+        with open(golden, "w", encoding="utf-8") as f:
+            f.write(golden_yaml(self.apis))
+        self.routes[f"/raw/main/{COMPONENT_FOLDER}/specification/{COMPONENT_FOLDER}.yaml"] = golden
+
+        self.api_index = {}
+        for api in self.apis:
+            zip_path = os.path.join(self.data_dir, f"{api}.zip")
+            if not os.path.exists(zip_path):
+                write_ctk_zip(zip_path, api)
+            self.routes[f"/s3/{api}.zip"] = zip_path
+            self.api_index[f"{api}_v4.0.0"] = {
+                "name": f"{api} API",
+                "swagger": f"{self.url}/s3/{api}.swagger.json",
+                "ctk": f"{self.url}/s3/{api}.zip"
+            }
+        index_path = os.path.join(self.data_dir, "apiIndex.json")
+        with open(index_path, "w", encoding="utf-8") as f:
+            json.dump(self.api_index, f, indent=4)
+        self.routes["/raw/apiIndex.json"] = index_path
+
+    def api_index_url(self):
+        return f"{self.url}/raw/apiIndex.json"
+
+    # CHANGE_ME.json keys pointing the executor to these services
+    def standard_component_download(self):
+        return {
+            "apiBaseUrl": f"{self.url}/github",
+            "repoOwner": "bench",
+            "repoName": "components",
+            "repoPath": "specification",
+            "gitUrl": f"{self.url}/raw",
+            "gitBranch": "main",
+            "sslVerify": False
+        }
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+_TOOL_HEADER = f"#!{sys.executable}\nimport os, sys, json\nSTATE = {{state!r}}\n"
+
+_HELM = '''
+args = sys.argv[1:]
+if args[:1] == ["list"]:
+    print(json.dumps([{"name": "bench", "revision": "1", "status": "deployed"}]))
+elif args[:2] == ["get", "manifest"]:
+    with open(os.path.join(STATE, "manifest.yaml"), encoding="utf-8") as f:
+        sys.stdout.write(f.read())
+else:
+    sys.exit(0)
+'''
+
+_KUBECTL = '''
+with open(os.path.join(STATE, "component.json"), encoding="utf-8") as f:
+    sys.stdout.write(f.read())
+'''
+
+# npm install creates node_modules, npm start writes results of the configured size
+_NPM = '''
+args = sys.argv[1:]
+if args[:1] in (["install"], ["ci"]):
+    os.makedirs("node_modules/.bin", exist_ok=True)
+    with open("node_modules/.package-lock.json", "w") as f:
+        f.write("{}")
+    sys.exit(0)
+if args[:1] != ["start"]:
+    sys.exit(0)
+
+with open(os.path.join(STATE, "results.json"), encoding="utf-8") as f:
+    settings = json.load(f)
+results = os.path.join("..", "resources", "results")
+reports = os.path.join("..", "resources", "reports")
+for folder in ("api-ctk-results", "baseline-ctk", "cucumber-bdd"):
+    os.makedirs(os.path.join(results, folder), exist_ok=True)
+os.makedirs(reports, exist_ok=True)
+
+apis = settings["apis"]
+per_api = max(1, settings["resultBytes"] // max(1, len(apis)))
+execution = json.dumps({"item": {"name": "GET resource"}, "response": {"code": 200, "stream": {
+    "type": "Buffer", "data": list(range(256)) * 4}}, "assertions": [{"assertion": "status", "skipped": False}]})
+for api in apis:
+    count = max(1, per_api // (len(execution) + 1))
+    with open(os.path.join(results, "api-ctk-results", api + "_v4.json"), "w") as f:
+        f.write('{"run": {"stats": {"assertions": {"total": %d, "failed": 0}, "scripts": {"failed": 0}}, '
+                '"executions": [' % count)
+        f.write(",".join([execution] * count))
+        f.write("]}}")
+    with open(os.path.join(results, "api-ctk-results", api + "_v4.html"), "w") as f:
+        f.write("<html></html>")
+for name in ("Configuration", "deployment"):
+    with open(os.path.join(results, "baseline-ctk", name + "-report.json"), "w") as f:
+        json.dump({"stats": {"passes": 10, "failures": 0}}, f)
+with open(os.path.join(results, "cucumber-bdd", "results.json"), "w") as f:
+    json.dump([], f)
+with open(os.path.join(results, "reportData.json"), "w") as f:
+    json.dump({"componentName": "bench", "ctkPassed": True}, f)
+with open(os.path.join(reports, "index.html"), "w") as f:
+    f.write("<html></html>")
+'''
+
+
+# Write helm, kubectl and npm stand-ins into bin_dir, their data lives in state_dir
+def write_tools(bin_dir, state_dir):
+    os.makedirs(bin_dir, exist_ok=True)
+    for name, body in (("helm", _HELM), ("kubectl", _KUBECTL), ("npm", _NPM)):
+        path = os.path.join(bin_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(_TOOL_HEADER.format(state=state_dir) + body)
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+
+# Data read by the fake tools for one benchmark scenario
+def write_tool_state(state_dir, apis, release, result_bytes, api_url):
+    os.makedirs(state_dir, exist_ok=True)
+    with open(os.path.join(state_dir, "manifest.yaml"), "w", encoding="utf-8") as f:
+        f.write(manifest_yaml(apis, release))
+    live = json.loads(manifest_yaml(apis, release).split("\n---\n")[0])
+    live["status"] = {"coreAPIs": [
+        {"name": api.lower(), "path": f"/{release}/{api.lower()}/v4", "url": f"{api_url}/api/{api.lower()}/v4"}
+        for api in apis
+    ]}
+    with open(os.path.join(state_dir, "component.json"), "w", encoding="utf-8") as f:
+        json.dump(live, f)
+    with open(os.path.join(state_dir, "results.json"), "w", encoding="utf-8") as f:
+        json.dump({"apis": apis, "resultBytes": result_bytes}, f)
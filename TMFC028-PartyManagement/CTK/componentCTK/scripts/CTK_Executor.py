@@ -1,39 +1,173 @@
 import os
+import sys
 import shutil
-import zipfile
-import platform
-import requests
+import time
+import threading
 import json
-import yaml
 import subprocess
+import argparse
+import tarfile
+import hashlib
+import gzip
+import stage_profile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Importing this module has no side effects: CHANGE_ME.json is read by configure() (called by every
+# entry point when it was not called before), requests, PyYAML and the helper modules of this folder are
+# only imported by the functions and subcommands using them, and relative paths of CHANGE_ME.json are
+# relative to this scripts folder, whatever the working directory.
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CONFIG_PATH = os.path.join(SCRIPTS_DIR, "..", "CHANGE_ME.json")
+
+CTK_MARKER_FILE = ".ctk-source.json"
+BUNDLE_MANIFEST_FILE = "bundle-manifest.json"
+
+config = None
+_http_session = None
+_http_session_lock = threading.Lock()
+_api_index_refresh = None
 
 # Function to read a JSON file and return its contents
 def read_json_file(file_path):
     with open(file_path, 'r', encoding="utf8") as file:
         return json.load(file)
-# Load configuration data from JSON file
-# config = read_json_file("configData/config.json")
-config = read_json_file(os.path.join("..","CHANGE_ME.json"))
-ctk_name_mapping = config["ctk_name_mapping"]
-reportGeneratorSrc = config.get("reportGeneratorSrc")
-if not reportGeneratorSrc:
-    reportGeneratorSrc = os.path.join("..","..")
-
-   
-goldenComponentPath = config.get("standardComponentPath")
-if not goldenComponentPath:
-    goldenComponentPath = os.path.join("..","resources","standard-components")
-
-resources_dir = os.path.join(reportGeneratorSrc, 'componentCTK', 'resources') 
-standard_components_dir = goldenComponentPath
-
-os.makedirs(resources_dir, exist_ok=True)
-os.makedirs(standard_components_dir, exist_ok=True)
-ctk_mapping = {}
-
-component_namespace = config.get("component_namespace")
-if not component_namespace:
-    component_namespace = "components"
+
+# Path of a CHANGE_ME.json setting, relative to the scripts folder
+def script_path(path):
+    return os.path.normpath(os.path.join(SCRIPTS_DIR, path))
+
+# Load configuration data from CHANGE_ME.json into the settings of this module. Can be called again
+# (e.g. by a long-lived service) to pick up an edited file; the HTTP session is kept.
+def configure(config_path=DEFAULT_CONFIG_PATH):
+    global config, ctk_name_mapping, reportGeneratorSrc, goldenComponentPath, resources_dir, standard_components_dir
+    global component_namespace, parallel_settings, ctk_workers, bdd_workers, shard_settings
+    global cache_settings, ctk_cache_enabled, ctk_cache_dir, ctk_cache_max_bytes
+    global node_cache_settings, node_cache_enabled, node_cache_dir
+    global download_settings, http_timeout, http_retries, http_backoff_factor, download_chunk_size, download_workers
+    global api_index_path, api_index_settings, api_index_refresh_enabled, ctk_index_overrides, api_major_versions
+    global offline_bundle_path, offline_mode, consolidation_settings
+    global incremental_settings, incremental_mode, reuse_failed_results, incremental_dir
+    global load_test_settings, load_test_enabled, load_test_order, readiness_config, readiness_check_enabled, poll_settings
+    global parse_cache_dir, component_index_path, api_resolution_path
+    global run_history_settings, run_history_enabled, run_history_db
+    global report_archive_settings, report_archive_enabled, report_archive_dir, watch_settings
+    import ctk_cache
+    import readiness
+
+    config = read_json_file(config_path)
+    ctk_name_mapping = config["ctk_name_mapping"]
+    reportGeneratorSrc = script_path(config.get("reportGeneratorSrc") or os.path.join("..", ".."))
+    goldenComponentPath = script_path(config.get("standardComponentPath") or
+                                      os.path.join("..", "resources", "standard-components"))
+
+    resources_dir = os.path.join(reportGeneratorSrc, 'componentCTK', 'resources')
+    standard_components_dir = goldenComponentPath
+
+    component_namespace = config.get("component_namespace")
+    if not component_namespace:
+        component_namespace = "components"
+
+    # Number of CTKs prepared/executed at the same time. Without parallel settings the CTKs are prepared
+    # one after the other and deployment.js runs them all at once (ctkWorkers 0)
+    parallel_settings = config.get("parallelSettings", {})
+    if parallel_settings.get("enabled", False):
+        ctk_workers = max(1, int(parallel_settings.get("ctkWorkers", os.cpu_count() or 1)))
+        # Cucumber worker processes running the BDD scenarios, each with its own copy of the changed payloads
+        bdd_workers = max(1, int(parallel_settings.get("bddWorkers", 1)))
+    else:
+        ctk_workers = 1
+        bdd_workers = 1
+
+    # Large CTK collections are split by folder into shards run by parallel Newman workers (see src/tests/ctkShards.js)
+    shard_settings = config.get("shardSettings", {})
+
+    # Shared, content addressed cache of CTK zips (see ctk_cache.py)
+    cache_settings = config.get("ctkCache", {})
+    ctk_cache_enabled = cache_settings.get("enabled", True)
+    ctk_cache_dir = script_path(cache_settings.get("cacheDir") or ctk_cache.default_cache_dir())
+    ctk_cache_max_bytes = int(cache_settings.get("maxSizeMB", 2048)) * 1024 * 1024
+
+    # node_modules of src/ and of the CTK folders are cached by package-lock.json hash (see node_cache.py)
+    node_cache_settings = config.get("nodeModulesCache", {})
+    node_cache_enabled = node_cache_settings.get("enabled", True)
+    node_cache_dir = script_path(node_cache_settings.get("cacheDir") or os.path.join(ctk_cache_dir, "node-modules"))
+
+    # HTTP settings shared by every download (one pooled keep-alive session per process)
+    download_settings = config.get("downloadSettings", {})
+    http_timeout = (download_settings.get("connectTimeout", 10), download_settings.get("readTimeout", 120))
+    http_retries = int(download_settings.get("retries", 5))
+    http_backoff_factor = float(download_settings.get("backoffFactor", 0.5))
+    download_chunk_size = int(download_settings.get("chunkSizeKB", 1024)) * 1024
+    download_workers = max(1, int(download_settings.get("maxConcurrentDownloads", 8)))
+
+    # apiIndex.json is looked up by API id and major version, and refreshed in the background (see api_index.py)
+    api_index_path = os.path.join(SCRIPTS_DIR, 'configData', 'apiIndex.json')
+    api_index_settings = config.get("apiIndexSettings", {})
+    api_index_refresh_enabled = api_index_settings.get("refresh", True)
+    # ctk_name_mapping entries from CHANGE_ME.json pin an API id to an apiIndex.json key
+    ctk_index_overrides = dict(ctk_name_mapping)
+    # API id -> major version of its specification in the component YAML
+    api_major_versions = {}
+
+    # Air-gapped runs read the component YAMLs, CTKs and node_modules from a prebuilt bundle only
+    offline_bundle_path = script_path(config["offlineBundle"]) if config.get("offlineBundle") else None
+    offline_mode = bool(offline_bundle_path)
+
+    # Output options of consolidatedResults.json
+    consolidation_settings = config.get("consolidationSettings", {})
+
+    # Incremental runs reuse the CTK results of APIs whose inputs did not change since the last run
+    incremental_settings = config.get("incrementalSettings", {})
+    incremental_mode = incremental_settings.get("enabled", False)
+    reuse_failed_results = incremental_settings.get("reuseFailedResults", False)
+    incremental_dir = os.path.join(resources_dir, 'incremental-results')
+
+    # Load/soak test of the exposed APIs with the ctkconfig payloads. By default it runs after the CTK and BDD
+    # steps, so they do not see the resources it creates; "before" runs it first as it used to
+    load_test_settings = config.get("loadTest", {})
+    load_test_enabled = load_test_settings.get("enabled", False)
+    load_test_order = load_test_settings.get("order", "after")
+    if load_test_order not in ("before", "after"):
+        print(f"⚠️ Unknown loadTest.order '{load_test_order}', running the load test after the CTKs")
+        load_test_order = "after"
+
+    # Exposed APIs must answer before any CTK starts (backoff, jitter and deadline, see readiness.py)
+    readiness_config = config.get("readinessSettings", {})
+    readiness_check_enabled = readiness_config.get("enabled", True)
+    poll_settings = readiness.readiness_settings(config)
+
+    # Component YAMLs are parsed once per content/helm revision, the API index is read by the Node side too
+    parse_cache_dir = os.path.join(resources_dir, 'parsed')
+    component_index_path = os.path.join(resources_dir, 'component-index.json')
+    # Component and stub APIs are resolved once per run, the BDD steps read the result (see api_resolution.py)
+    api_resolution_path = os.path.join(resources_dir, 'api-resolution.json')
+
+    # Every run is stored in a local SQLite database for trends across runs (see run_history.py)
+    run_history_settings = config.get("runHistory", {})
+    run_history_enabled = run_history_settings.get("enabled", True)
+    run_history_db = script_path(run_history_settings.get("dbPath") or
+                                 os.path.join(reportGeneratorSrc, "componentCTK", "Reports", "runHistory.db"))
+
+    # Reports of every run go to one compressed, deduplicated archive instead of full copies (see report_archive.py)
+    report_archive_settings = config.get("reportArchive", {})
+    report_archive_enabled = report_archive_settings.get("enabled", False)
+    report_archive_dir = script_path(report_archive_settings.get("dir") or
+                                     os.path.join(reportGeneratorSrc, "componentCTK", "Reports", "archive"))
+
+    # Watch mode polls the helm revisions of the release and its stubs and re-runs the CTK on every change
+    watch_settings = config.get("watchSettings", {})
+    return config
+
+
+def ensure_configured():
+    if config is None:
+        configure()
+
+
+# Folders every run writes to
+def create_directories():
+    os.makedirs(resources_dir, exist_ok=True)
+    os.makedirs(standard_components_dir, exist_ok=True)
 
 # Function to write data to a JSON file
 def write_json_file(filename, data):
@@ -42,48 +176,54 @@ def write_json_file(filename, data):
 
 # Function to read a YAML file and return its contents
 def read_yaml_file(file_path):
+    import yaml
     with open(file_path, 'r', encoding="utf8") as file:
         return yaml.safe_load(file)
 
-# Determine the operating system
-def determine_os():
-    system = platform.system()
-    os_map = {'Windows': 'windows', 'Darwin': 'mac', 'Linux': 'linux'}
-    if system in os_map:
-        return os_map[system]
-    raise RuntimeError(f"Unsupported OS: {system}")
-
-# Set the CTK command mapping based on the OS
-def set_ctk_mapping(name, ctk_unzip_path, manifest_path):
-    current_os = determine_os()
-    command_map = {
-        'windows': 'Windows-Bat-RUNCTK.bat',
-        'mac': 'Mac-Linux-RUNCTK.sh',
-        'linux': 'Mac-Linux-RUNCTK.sh'
-    }
-    command = command_map.get(current_os, 'Mac-Linux-RUNCTK.sh')
-    ctk_mapping[name] = os.path.join(ctk_unzip_path, ctk_name_mapping[name], command)
-
-    api_path = ""
-
-    # Update individual CTKs config.json with the URL
-    config_path = os.path.join(ctk_unzip_path, ctk_name_mapping[name], 'config.json')
-    ctk_config = read_json_file(config_path)
-    base_url = config["url"]  # Base URL from configData/config.json
-    ctk_config['url'] = f"{base_url.rstrip('/')}{api_path}/"  # Combine base URL with API path
-    write_json_file(config_path, ctk_config)
+# Pooled HTTP session with keep-alive and retry with exponential backoff
+def get_http_session():
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+            retry = Retry(
+                total=http_retries,
+                backoff_factor=http_backoff_factor,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["GET", "HEAD"]
+            )
+            adapter = HTTPAdapter(pool_connections=download_workers, pool_maxsize=download_workers,
+                                  max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_session = session
+    return _http_session
+
+# Look for existing file in goldenComponentPath that starts with componentName
+def find_standard_component_specification(componentName):
+    if not os.path.isdir(goldenComponentPath):
+        return None
+    for file in sorted(os.listdir(goldenComponentPath)):
+        if file.startswith(componentName) and file.endswith(".yaml"):
+            return os.path.join(goldenComponentPath, file)
+    return None
 
 # Download Standard Component Specification from Ready-for-publication repository
 def download_standard_component_specification(componentName):
     download_info = config.get("standardComponentDownload")
     ssl_verify = download_info.get("sslVerify", True)
 
-    # Look for existing file in goldenComponentPath that starts with componentName
-    for file in os.listdir(goldenComponentPath):
-        if file.startswith(componentName) and file.endswith(".yaml"):
-            existing_path = os.path.join(goldenComponentPath, file)
-            print(f"Found existing YAML for {componentName}: {existing_path}")
-            return existing_path
+    existing_path = find_standard_component_specification(componentName)
+    if existing_path:
+        print(f"Found existing YAML for {componentName}: {existing_path}")
+        return existing_path
+
+    if offline_mode:
+        print(f"Offline mode: no YAML for {componentName} in {goldenComponentPath} or the offline bundle")
+        return None
     
     # Construct API URL to get data from github:
     contents_api_url = (
@@ -92,7 +232,8 @@ def download_standard_component_specification(componentName):
         f"{download_info.get('repoName')}/contents?ref={download_info.get('gitBranch')}"
     )
     print(f"Component download url: {contents_api_url}")
-    response = requests.get(contents_api_url, verify=ssl_verify)
+    session = get_http_session()
+    response = session.get(contents_api_url, verify=ssl_verify, timeout=http_timeout)
     if response.status_code != 200:
         print(f"Failed to fetch contents. Status: {response.status_code}")
         return None
@@ -123,7 +264,7 @@ def download_standard_component_specification(componentName):
     destination_path = os.path.join(goldenComponentPath, filename)
     print(f"Downloading YAML from: {raw_url}")
 
-    yaml_response = requests.get(raw_url, verify=ssl_verify)
+    yaml_response = session.get(raw_url, verify=ssl_verify, timeout=http_timeout)
 
     if yaml_response.status_code == 200:
         with open(destination_path, "w", encoding="utf-8") as f:
@@ -152,219 +293,215 @@ def clear_results_folder(results_dir):
         print(f"Failed to create results directory. Error: {e}")
 
 # Consolidate all the CTK json results into a single JSON file
+# Every section is streamed from its source file into the output, so memory use does not
+# grow with the size of the newman/cucumber results.
 def consolidate_results_to_json(results_dir, payload_output_dir):
-    consolidated = {
-        "resultsSummary": None,
-        "apiCtkResults": [],
-        "configurationReport": None,
-        "deploymentReport": None,
-        "bddResults": None,
-        "bddPayloads": {}
-    }
+    import stream_json
+    compact = consolidation_settings.get("compact", False)
+    strip_bodies = consolidation_settings.get("stripResponseBodies", False)
+    indent = "" if compact else "\n  "
 
-    summary_path = os.path.join(results_dir, "reportData.json")
-    if os.path.exists(summary_path):
-        with open(summary_path, "r", encoding="utf-8") as f:
-            consolidated["resultsSummary"] = json.load(f)
-    
-    api_ctk_dir = os.path.join(results_dir, "api-ctk-results")
-    if os.path.isdir(api_ctk_dir):
-        for f in os.listdir(api_ctk_dir):
-            if f.endswith(".json"):
-                with open(os.path.join(api_ctk_dir, f), "r", encoding="utf-8") as file:
-                    result = json.load(file)
-                    consolidated["apiCtkResults"].append({
-                        "file": f,
-                        "data": result
-                    })
-    
-    configuration_path = os.path.join(results_dir, "baseline-ctk", "Configuration-report.json")
-    if os.path.exists(configuration_path):
-        with open(configuration_path, "r", encoding="utf-8") as f:
-            consolidated["configurationReport"] = json.load(f)
-
-    deployment_path = os.path.join(results_dir, "baseline-ctk", "deployment-report.json")
-    if os.path.exists(deployment_path):
-        with open(deployment_path, "r", encoding="utf-8") as f:
-            consolidated["deploymentReport"] = json.load(f)
-
-    bdd_path = os.path.join(results_dir, "cucumber-bdd", "results.json")
-    if os.path.exists(bdd_path):
-        with open(bdd_path, "r", encoding="utf-8") as f:
-            consolidated["bddResults"] = json.load(f)
-
-    if os.path.exists(payload_output_dir):
-        for file in os.listdir(payload_output_dir):
-            if file.endswith(".json"):
-                with open(os.path.join(payload_output_dir, file), "r", encoding="utf-8") as f:
-                    consolidated["bddPayloads"][file] = json.load(f)
+    def section(out, name, path, first=False):
+        out.write(("" if first else ",") + f'{indent}"{name}": ')
+        stream_json.write_json_file_value(out, path, compact, strip_bodies)
 
-    output_file = os.path.join(reportGeneratorSrc, "componentCTK", "resources", "consolidatedResults.json")
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(consolidated, f, indent=2)
-    
-    return output_file
+    def json_files(folder):
+        if not os.path.isdir(folder):
+            return []
+        return sorted(f for f in os.listdir(folder) if f.endswith(".json"))
 
-# Normalizes the CTK folder structure to ensure the required files are directly under the CTK folder
-def normalize_ctk_directory(ctk_folder_path):
-    nested_ctk_path = os.path.join(ctk_folder_path, "CTK")
-    nested_config_path = os.path.join(nested_ctk_path, "config.json")
-    temp_ctk_path = os.path.join(ctk_folder_path, "_temp_ctk")
-    print(f"nested_ctk_path: {nested_ctk_path}, nested_config_path: {nested_config_path}")
-    print(f"is nested ctk path dir: {os.path.isdir(nested_ctk_path)} config is file: {os.path.isfile(nested_config_path)}")
-    if os.path.isdir(nested_ctk_path) and os.path.isfile(nested_config_path):
-        print(f"Found nested CTK structure at: {nested_ctk_path}")
-        os.rename(nested_ctk_path, temp_ctk_path)
-        for item in os.listdir(temp_ctk_path):
-            src = os.path.join(temp_ctk_path, item)
-            dst = os.path.join(ctk_folder_path, item)
-
-            if os.path.exists(dst):
-                if os.path.isdir(dst):
-                    shutil.rmtree(dst)
-                else:
-                    os.remove(dst)
-            
-            shutil.move(src,dst)
-            print(f"Moved '{src}' to '{dst}'")
-        os.rmdir(temp_ctk_path)
-        print(f"Removed Nested CTK folder: {nested_ctk_path}")
+    output_file = os.path.join(reportGeneratorSrc, "componentCTK", "resources", "consolidatedResults.json")
+    if consolidation_settings.get("gzip", False):
+        output_file += ".gz"
+        out = gzip.open(output_file, "wt", encoding="utf-8")
     else:
-        print(f"CTK directory structure is already normalized at: {ctk_folder_path}")
-    
-    ri_path = os.path.join(ctk_folder_path, "RI")
-    if os.path.isdir(ri_path):
-        shutil.rmtree(ri_path)
+        out = open(output_file, "w", encoding="utf-8")
+
+    with out:
+        out.write("{")
+        section(out, "resultsSummary", os.path.join(results_dir, "reportData.json"), first=True)
+
+        api_ctk_dir = os.path.join(results_dir, "api-ctk-results")
+        out.write(f',{indent}"apiCtkResults": [')
+        for i, f in enumerate(json_files(api_ctk_dir)):
+            out.write(("" if i == 0 else ",") + f'{indent}{{"file": {json.dumps(f)}, "data": ')
+            stream_json.write_json_file_value(out, os.path.join(api_ctk_dir, f), compact, strip_bodies)
+            out.write("}")
+        out.write(f"{indent}]")
+
+        section(out, "configurationReport", os.path.join(results_dir, "baseline-ctk", "Configuration-report.json"))
+        section(out, "deploymentReport", os.path.join(results_dir, "baseline-ctk", "deployment-report.json"))
+        section(out, "bddResults", os.path.join(results_dir, "cucumber-bdd", "results.json"))
+        section(out, "loadTestResults", os.path.join(results_dir, "load-test", "loadResults.json"))
+
+        out.write(f',{indent}"bddPayloads": {{')
+        for i, f in enumerate(json_files(payload_output_dir)):
+            out.write(("" if i == 0 else ",") + f"{indent}{json.dumps(f)}: ")
+            stream_json.write_json_file_value(out, os.path.join(payload_output_dir, f), compact)
+        out.write(f"{indent}}}" + ("}" if compact else "\n}\n"))
+
+    return output_file
 
 # Get a list of YAML files in a specified directory
 def read_file_path_folder(path):
-    original_dir = os.getcwd()
-    os.chdir(path)
-    yaml_files = {file: os.path.join(path, file) for file in os.listdir() if file.endswith(".yaml")}
-    os.chdir(original_dir)
-    return yaml_files
-
-
-# Download a remote CTK JSON file
-def downloadRemoteCtkJson(url, token):
-    print("Entry downloadCtkJson")
-    headers = {
-        "Authorization": f"token {token}"
-    }
-    response = requests.get(url, headers=headers, verify=False)
-    if response.status_code == 200:
-        with open("configData/apiIndex.json", 'wb') as file:
-            file.write(response.content)
-        print("Response saved to configData/apiIndex.json")
-    else:
-        print(f"Request failed with status code {response.status_code}")
+    return {file: os.path.join(path, file) for file in os.listdir(path) if file.endswith(".yaml")}
+
+
+# Refresh apiIndex.json from ctk_download_urls while the run goes on, only downloaded when it changed
+def start_api_index_refresh():
+    global _api_index_refresh
+    import api_index
+    url = config.get("ctk_download_urls")
+    if offline_mode or not api_index_refresh_enabled or not url:
+        return
+    _api_index_refresh = api_index.refresh_in_background(api_index_path, url, get_http_session(), http_timeout,
+                                                         verify=False)
+
+
+# Remember the major version of every API of a component YAML
+def register_api_versions(yaml_content):
+    import api_index
+    api_major_versions.update(api_index.api_major_versions(yaml_content))
+
+
+# apiIndex.json entry of the CTK of an API for the major version of its specification, None when missing.
+# A miss waits for a running refresh of the index before giving up.
+def ctk_index_entry(api_id):
+    import api_index
+    major = api_major_versions.get(api_id)
+    while True:
+        index, lookup = api_index.load(api_index_path)
+        override = ctk_index_overrides.get(api_id)
+        if override in index:
+            return {**index[override], "key": override, "version": override.split('_v')[-1]}
+        entry = api_index.find(lookup, api_id, major)
+        if entry or not (_api_index_refresh and _api_index_refresh.is_alive()):
+            return entry
+        print(f"No CTK for {api_id} in {api_index_path} yet, waiting for the API index refresh")
+        _api_index_refresh.join(sum(http_timeout))
+        if _api_index_refresh.is_alive():
+            return None
 
 
 # Download a file from a URL
+# The body is streamed into '<local_filename>.part' which is resumed with a Range request
+# when a previous attempt (or run) was interrupted, and renamed once complete.
 def download_file(url, local_filename):
+    if offline_mode:
+        raise RuntimeError(f"Offline mode: {url} is not available in the offline bundle")
     print(url)
-    response = requests.get(url, stream=True, verify=False)
-    if response.status_code == 200:
-        with open(local_filename, 'wb') as file:
-            for chunk in response.iter_content(chunk_size=8192):
-                file.write(chunk)
-        print(f"File downloaded successfully: {local_filename}")
-    else:
-        print(f"Failed to retrieve the file. Status code: {response.status_code}")
-
-
-# Unzip a file to a specified directory
-def unzip_file(zip_path, extract_to_folder):
-    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-        zip_ref.extractall(extract_to_folder)
-        print(f"File extracted to: {extract_to_folder}")
-
-
-# Delete a directory and its contents
-def delete_folder(long_path):
-    try:
-        for item in long_path.rglob('*'):
-            item.unlink() if item.is_file() else item.rmdir()
-        long_path.rmdir()
-        print(f"Folder removed: {long_path}")
-    except (FileNotFoundError, PermissionError, OSError) as e:
-        print(f"Error: {e}")
-
-
-# Overwrite or rename a file or directory
-def overwrite_or_rename(src, dst, name):
-    if os.path.exists(dst):
-        if os.path.isfile(dst):
-            os.remove(dst)
-        elif os.path.isdir(dst):
-            shutil.rmtree(dst)
-
+    import requests
+    part_filename = f"{local_filename}.part"
+    session = get_http_session()
+
+    for attempt in range(1, http_retries + 2):
+        resume_from = os.path.getsize(part_filename) if os.path.exists(part_filename) else 0
+        headers = {"Range": f"bytes={resume_from}-"} if resume_from else {}
+        try:
+            with session.get(url, stream=True, verify=False, timeout=http_timeout, headers=headers) as response:
+                if response.status_code == 416 and resume_from:
+                    # The partial file already holds the whole body
+                    break
+                if response.status_code not in (200, 206):
+                    print(f"Failed to retrieve the file. Status code: {response.status_code}")
+                    return
+                mode = 'ab' if response.status_code == 206 else 'wb'
+                with open(part_filename, mode) as file:
+                    for chunk in response.iter_content(chunk_size=download_chunk_size):
+                        file.write(chunk)
+                        stage_profile.add_downloaded(len(chunk))
+            break
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt > http_retries:
+                print(f"Failed to retrieve the file after {attempt} attempts. Error: {e}")
+                return
+            wait = http_backoff_factor * (2 ** (attempt - 1))
+            print(f"Download of {url} interrupted ({e}), resuming in {wait:.1f}s")
+            time.sleep(wait)
+
+    os.replace(part_filename, local_filename)
+    print(f"File downloaded successfully: {local_filename}")
+
+
+# Record which cached zip a CTK folder was installed from
+def write_ctk_marker(ctk_folder_path, entry):
+    write_json_file(os.path.join(ctk_folder_path, CTK_MARKER_FILE), {
+        "url": entry["url"],
+        "sha256": entry["sha256"]
+    })
+
+
+# A CTK folder is reused only if it was completely installed from the cached zip of the same URL
+def is_ctk_folder_current(ctk_folder_path, entry):
+    marker_path = os.path.join(ctk_folder_path, CTK_MARKER_FILE)
+    if not entry or not os.path.isfile(marker_path):
+        return False
     try:
-        os.rename(src, dst)
-        print(f"Renamed {src} to {dst}")
-    except FileNotFoundError:
-        print(f"Error: {src} does not exist.")
-        handle_special_rename(src, dst, name)
-    except PermissionError:
-        print(f"Error: Permission denied for renaming {src} to {dst}.")
-    except Exception as e:
-        print(f"An unexpected error occurred: {e}")
-
-
-# Handle special cases for renaming when the folder name is different
-def handle_special_rename(src, dst, name):
-    src_new = os.path.dirname(src)
-    for dir_ in [entry for entry in os.listdir(src_new) if os.path.isdir(os.path.join(src_new, entry))]:
-        if name in os.path.basename(dir_):
-            overwrite_or_rename(os.path.join(src_new, os.path.basename(dir_)), dst, name)
+        marker = read_json_file(marker_path)
+    except (OSError, ValueError):
+        return False
+    return marker.get("url") == entry["url"] and marker.get("sha256") == entry["sha256"]
 
 
 # Download and unzip the CTK
 def download_ctk(name):
-    ctk_path = read_yaml_file('configData/apiIndex.json')
-    for ctk in ctk_path:
-        if (name in ctk_name_mapping and (ctk_name_mapping[name] == ctk)) or ((name in ctk) and ("_v4" in ctk)):
-
-            major_version = ctk.split('_v')[1].split('.')[0] 
-
-            ctk_name_mapping[name] = f"{ctk.split('_v')[0]}_v{major_version}"
-            download_url = ctk_path[ctk]['ctk']
-            
-            filename = os.path.basename(download_url)
-            root, ext = os.path.splitext(filename)
-            # ctk_download_path = f'{reportGeneratorSrc}/componentCTK/resources/api-ctks/{ctk_name_mapping[name]}.zip'
-            ctk_download_path_root = os.path.join(reportGeneratorSrc, 'componentCTK', 'resources', 'api-ctks')
-            os.makedirs(ctk_download_path_root,exist_ok=True)
-            ctk_download_path = os.path.join(ctk_download_path_root, f'{ctk_name_mapping[name]}.zip')
-            # ctk_unzip_path = f'{reportGeneratorSrc}/componentCTK/resources/api-ctks'
-            ctk_unzip_path = os.path.join(reportGeneratorSrc, 'componentCTK', 'resources', 'api-ctks')
-            
-            if not os.path.exists(ctk_unzip_path):
-                os.makedirs(ctk_unzip_path, exist_ok=True)
-
-            if not os.path.exists(os.path.join(ctk_unzip_path, ctk_name_mapping[name])):
-                download_file(download_url, ctk_download_path)
-                unzip_file(ctk_download_path, ctk_unzip_path)
-
-                long_path = r'//?/{}'.format(os.path.join(os.getcwd(), ctk_unzip_path, ctk_name_mapping[name]))
-                if os.path.exists(long_path):
-                    shutil.rmtree(long_path)
-
-                overwrite_or_rename(os.path.join(ctk_unzip_path, 'CTK'),
-                                    os.path.join(ctk_unzip_path, ctk_name_mapping[name]), name)
-                ctk_folder_path = os.path.join(ctk_unzip_path, ctk_name_mapping[name])
-                normalize_ctk_directory(ctk_folder_path)
-
-                # overwrite_or_rename(os.path.join(ctk_unzip_path, root),
-                #                     os.path.join(ctk_unzip_path, ctk_name_mapping[name]), name)
-            manifest_path = os.path.join(reportGeneratorSrc, f'componentCTK/resources/component-{config["releaseName"]}.yaml')
-            #set_ctk_mapping(name, ctk_unzip_path, manifest_path)
+    import api_index
+    import ctk_cache
+    import ctk_extract
+    ctk = ctk_index_entry(name)
+    if not ctk:
+        print(f"⚠️ No CTK for {name} v{api_major_versions.get(name, api_index.DEFAULT_MAJOR_VERSION)} "
+              f"in {api_index_path}")
+        return
+    major_version = ctk['version'].split('.')[0]
+
+    # Same folder name as the CTK location used by src/tests/deployment.js
+    ctk_name_mapping[name] = f"{name}_v{major_version}"
+    download_url = ctk['ctk']
+
+    # ctk_download_path = f'{reportGeneratorSrc}/componentCTK/resources/api-ctks/{ctk_name_mapping[name]}.zip'
+    ctk_download_path_root = os.path.join(reportGeneratorSrc, 'componentCTK', 'resources', 'api-ctks')
+    os.makedirs(ctk_download_path_root,exist_ok=True)
+    ctk_download_path = os.path.join(ctk_download_path_root, f'{ctk_name_mapping[name]}.zip')
+    # ctk_unzip_path = f'{reportGeneratorSrc}/componentCTK/resources/api-ctks'
+    ctk_unzip_path = os.path.join(reportGeneratorSrc, 'componentCTK', 'resources', 'api-ctks')
+    
+    if not os.path.exists(ctk_unzip_path):
+        os.makedirs(ctk_unzip_path, exist_ok=True)
+
+    ctk_folder_path = os.path.join(ctk_unzip_path, ctk_name_mapping[name])
+
+    # CTKs are extracted in their final layout next to their folder and swapped in once complete
+    if ctk_cache_enabled:
+        entry = ctk_cache.lookup(ctk_cache_dir, download_url)
+        if not is_ctk_folder_current(ctk_folder_path, entry):
+            extracted_path, entry = ctk_cache.fetch(ctk_cache_dir, download_url, download_file,
+                                                    ctk_cache_max_bytes)
+            ctk_extract.install_tree(extracted_path, ctk_folder_path)
+            write_ctk_marker(ctk_folder_path, entry)
+        else:
+            print(f"CTK for {name} is up to date at: {ctk_folder_path}")
+        if offline_mode:
+            restore_ctk_node_modules(ctk_name_mapping[name], ctk_folder_path)
+    elif not os.path.exists(ctk_folder_path):
+        download_file(download_url, ctk_download_path)
+        ctk_extract.extract_ctk(ctk_download_path, ctk_folder_path)
 
 # Copy results from source to destination
 def copyResults(source_file, destination_file):
     shutil.copy(source_file, destination_file)
 
 
+# Hardlink a file into the reports folder instead of writing its bytes again (copy across filesystems)
+def link_or_copy(source_file, destination_file):
+    if os.path.exists(destination_file):
+        os.remove(destination_file)
+    try:
+        os.link(source_file, destination_file)
+    except OSError:
+        shutil.copy(source_file, destination_file)
+
+
 # Copy an entire directory tree
 def copyResultsFolder(src_dir, dst_dir):
     if os.path.exists(src_dir):
@@ -373,16 +510,62 @@ def copyResultsFolder(src_dir, dst_dir):
         print(f"⚠️ Unable to copy results: {src_dir} does not exist.")
 
 
-# Generate the report by running npm commands
-def generateReport():
-    os.chdir(f"{reportGeneratorSrc}/componentCTK/src")
-    os.system("npm install")
-    os.system("npm start")
+# Generate the report by running npm commands in src/ ('npm start' runs the tests first, report_only only
+# renders the report of the results already there)
+def generateReport(report_only=False):
+    import node_cache
+    src_dir = os.path.join(reportGeneratorSrc, "componentCTK", "src")
+    # node_modules are restored from the offline bundle, npm must not reach the registry
+    if offline_mode:
+        pass
+    elif node_cache_enabled:
+        node_cache.ensure_node_modules(src_dir, node_cache_dir)
+    else:
+        with stage_profile.stage("npm install", project="src"):
+            subprocess.run("npm install", cwd=src_dir, shell=True)
+    command = "npm run report" if report_only else "npm start"
+    timings_path = os.path.join(src_dir, "ctkTimings.json")
+    if not report_only and os.path.exists(timings_path):
+        os.remove(timings_path)
+    with stage_profile.stage(command):
+        returncode = subprocess.run(command, cwd=src_dir, shell=True).returncode
+    if not report_only:
+        record_ctk_timings(timings_path)
+    return returncode
+
+
+# Add the per CTK and per shard Newman timings written by deployment.js (src/tests/ctkTimings.js) to the profile
+def record_ctk_timings(timings_path):
+    if not os.path.exists(timings_path):
+        return
+    try:
+        timings = read_json_file(timings_path)
+        for timing in timings:
+            args = timing.get("args", {})
+            thread = f"CTK {args.get('api')}"
+            if "shard" in args:
+                thread += f" shard {args['shard']}"
+            stage_profile.add_external(timing["name"], timing["start"], timing["end"], thread, **args)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"⚠️ Unable to read the CTK timings {timings_path}. Error: {e}")
+
+
+# Current revision of a helm release in the component namespace, or None when it cannot be determined
+def helm_revision(releasename):
+    import api_resolution
+    return api_resolution.helm_revision(releasename, component_namespace)
 
 
-# Generate a YAML file from deployed component
+# Generate a YAML file from deployed component, returns the helm revision of the release
 def generateComponentYaml(releasename):
+    import yaml_index
+    import api_resolution
     output_path = os.path.join(reportGeneratorSrc, f"componentCTK/resources/component-{releasename}.yaml")
+    revision = helm_revision(releasename)
+    cache_revision = api_resolution.manifest_revision(releasename, component_namespace, revision)
+    if cache_revision and yaml_index.cached_revision(parse_cache_dir, output_path) == cache_revision:
+        print(f"Component manifest of '{releasename}' unchanged (revision {revision}), reusing: {output_path}")
+        return revision
     try:
         result = subprocess.run(
             ["helm", "get", "manifest", releasename, "-n", component_namespace],
@@ -393,47 +576,13 @@ def generateComponentYaml(releasename):
         with open(output_path, "w", encoding="utf-8") as f:
             f.write(result.stdout)
         print(f"Component manifest saved to: {output_path}")
+        return revision
     except subprocess.CalledProcessError as e:
         print(f"Failed to get component manifest for release '{releasename}'.")
         print(f"  Error: {e.stderr.strip()}")
         raise RuntimeError(f"Aborting CTK run due to missing manifest for: {releasename}")
 
 
-# Run the CTK command in a specified path
-def run_ctk_v2(path):
-    current_os = determine_os()
-
-    if current_os in ['mac', 'linux']:
-        path = './' + path
-
-    return_code = os.system(path)
-    print("Return code:", return_code)
-
-
-# Execute the CTK for a specific API
-def run_ctk(api_id, path):
-    c_path = os.getcwd()
-    dirname = os.path.dirname(path)
-    filename = os.path.basename(path)
-    os.chdir(dirname)
-    # Change Permission of ctk executable file
-    os.chmod(filename, 0o755)
-
-    run_ctk_v2(filename)
-
-    # Prepare paths for results
-    html_path = f'api-ctks/{ctk_name_mapping[api_id]}/htmlResults.html'
-    json_path = f'api-ctks/{ctk_name_mapping[api_id]}/jsonResults.json'
-    os.chdir('../..')
-    dest_path = 'results/api-ctk-results'
-    os.makedirs(dest_path, exist_ok=True)
-
-    # Copy results to the destination directory
-    copyResults(html_path, os.path.join(dest_path, f"{ctk_name_mapping[api_id]}.html"))
-    copyResults(json_path, os.path.join(dest_path, f"{ctk_name_mapping[api_id]}.json"))
-
-    os.chdir(c_path)
-
 # Prepare BDD payloads directory
 def prepare_payload_dir(payload_dir):
     if os.path.exists(payload_dir):
@@ -450,23 +599,41 @@ def generate_bdd_payload_files_for_component_under_test(bdd_payloads, payload_ou
             json.dump(payload, f, indent=2)
         print(f"Created payload file: {file_path}")
 
+# Upper case id of the component to run from CHANGE_ME.json, None when there is none
+def component_under_test():
+    component_to_run = config.get("component_to_run")
+    if not component_to_run:
+        print("No Component Name found to run the CTK")
+        return None
+    return component_to_run.upper()
+
+
 # Main executor function
 def ctkExecutor():
+    import run_history
+    import yaml_index
 #    filePaths = read_file_path_folder(goldenComponentPath)
+    ensure_configured()
+    run_started = time.time()
 
-    component_to_run = config.get("component_to_run")
+    component_to_run = component_under_test()
     if not component_to_run:
-        print("No Component Name found to run the CTK")
         return
-    else:
-        component_to_run = component_to_run.upper()
+    create_directories()
+
+# Restore CTKs, component YAMLs and node_modules from the offline bundle
+    if offline_mode:
+        prepare_offline_bundle(offline_bundle_path)
 
 # Clear results folder
     results_dir = os.path.join(reportGeneratorSrc, "componentCTK", "resources", "results")
     clear_results_folder(results_dir)
 
+    start_api_index_refresh()
+
 # Download standard component specification from TM Forum Github repository
-    component_yaml_path = download_standard_component_specification(component_to_run)
+    with stage_profile.stage("spec download", component=component_to_run):
+        component_yaml_path = download_standard_component_specification(component_to_run)
 
     if not component_yaml_path:
         print("Component YAML could not be downloaded.")
@@ -475,8 +642,23 @@ def ctkExecutor():
         print(f"Component YAML is ready at: {component_yaml_path}")
 
 
+    # Fetch all required CTKs in the background while the deployed component is inspected
+    # (in offline mode the cache was seeded from the bundle and nothing is downloaded)
+    print("reading yaml file at path: ", component_yaml_path)
+    yaml_content = yaml_index.load_document(component_yaml_path, parse_cache_dir)
+    register_api_versions(yaml_content)
+    prefetch_executor = ThreadPoolExecutor(max_workers=1)
+    prefetch = prefetch_executor.submit(prefetch_ctks, yaml_content)
+
     print("Generating component.yaml file for deployed Component.")
-    generateComponentYaml(config.get('releaseName'))
+    try:
+        with stage_profile.stage("generateComponentYaml", release=config.get('releaseName')):
+            helm_rev = generateComponentYaml(config.get('releaseName'))
+    except RuntimeError:
+        prefetch_executor.shutdown(wait=True)
+        raise
+    manifest_docs = read_manifest_documents(helm_rev)
+    yaml_index.write_index(component_index_path, yaml_content, manifest_docs, config.get('releaseName'), helm_rev)
 
     ctkconfig_path = os.path.join(reportGeneratorSrc, 'componentCTK', 'src', 'ctkconfig.json')
     #ctkconfig = read_json_file(ctkconfig_path)
@@ -489,42 +671,375 @@ def ctkExecutor():
 
     write_json_file(ctkconfig_path, ctkconfig)
 
-    current_dir = os.getcwd()
-
 # Setup BDD Payloads for Component Under Test
     bdd_payloads = config.get("bddPayloads", {})
     payload_output_dir = os.path.join(reportGeneratorSrc, 'componentCTK', 'src', 'features', 'payloads')
-    prepare_payload_dir(payload_output_dir)
-    generate_bdd_payload_files_for_component_under_test(bdd_payloads, payload_output_dir, component_to_run)
+    with stage_profile.stage("payload generation"):
+        prepare_payload_dir(payload_output_dir)
+        generate_bdd_payload_files_for_component_under_test(bdd_payloads, payload_output_dir, component_to_run)
 
-# Read yaml file to process apis
-    print("reading yaml file at path: ", component_yaml_path)
-    yaml_content = read_yaml_file(component_yaml_path)
+# Wait for the CTK prefetch before processing the apis
+    try:
+        prefetch.result()
+    except Exception as e:
+        print(f"⚠️ CTK prefetch failed, CTKs will be downloaded one by one. Error: {e}")
+    prefetch_executor.shutdown()
 
     # Process APIs from YAML content
-    process_apis(yaml_content, current_dir)
+    with stage_profile.stage("process_apis"):
+        process_apis(yaml_content)
+
+    # Reuse results of unchanged APIs, deployment.js only runs the CTKs that are not listed here
+    selected_apis = select_apis(yaml_content)
+    if incremental_mode:
+        ctkconfig["reuseApiResults"] = restore_unchanged_api_results(selected_apis, manifest_docs, ctkconfig,
+                                                                     results_dir)
+        write_json_file(ctkconfig_path, ctkconfig)
+
+    # One lookup of the component status and stub manifests for the readiness check, load test and BDD steps
+    with stage_profile.stage("api resolution"):
+        resolution = resolve_apis(manifest_docs, ctkconfig, component_to_run, wait=readiness_check_enabled)
+
+    # The CTKs run from 'npm start', the exposed APIs must answer before that
+    if readiness_check_enabled:
+        with stage_profile.stage("readiness check"):
+            check_exposed_apis_ready(resolution, ctkconfig)
+
+    if load_test_enabled and load_test_order == "before":
+        with stage_profile.stage("load test"):
+            run_load_test(resolution, ctkconfig, results_dir)
 
     # Generate the report
     print("Generating Report")
     generateReport()
-    os.chdir(current_dir)
 
-    consolidated_results = consolidate_results_to_json(results_dir, payload_output_dir)
+    # The report is rendered again to add the load test results
+    if load_test_enabled and load_test_order == "after":
+        with stage_profile.stage("load test"):
+            load_report = run_load_test(resolution, ctkconfig, results_dir)
+        if load_report:
+            generateReport(report_only=True)
+
+    if incremental_mode:
+        store_api_results(selected_apis, manifest_docs, ctkconfig, results_dir)
 
+    with stage_profile.stage("consolidate_results_to_json"):
+        consolidated_results = consolidate_results_to_json(results_dir, payload_output_dir)
+
+    if run_history_enabled:
+        with stage_profile.stage("run history"):
+            try:
+                component_version = yaml_content.get("spec", {}).get("componentMetadata", {}).get("version")
+                run_id = run_history.ingest(run_history_db, results_dir, component_to_run,
+                                            config.get('releaseName'), helm_rev, component_version, run_started)
+                print(f"Run {run_id} stored in run history: {run_history_db}")
+            except Exception as e:
+                print(f"⚠️ Failed to store the run in the run history. Error: {e}")
+
+    dest_path = publish_reports(component_yaml_path, consolidated_results,
+                                {"component": component_to_run, "release": config.get('releaseName'),
+                                 "revision": helm_rev})
+
+    # Stage timings of this run, next to the consolidated results
+    stage_profile.write(os.path.join(dest_path, "ctkProfile.json"), os.path.join(dest_path, "ctkTrace.json"))
+    print(f"Run profile written to: {os.path.join(dest_path, 'ctkProfile.json')}")
+    return dest_path
+
+
+# Copy (or archive) the reports, results and consolidated results of a run to Reports/<component YAML name>/,
+# returns that folder
+def publish_reports(component_yaml_path, consolidated_results, metadata):
+    import report_archive
     # Create reports directory if it doesn't exist
     reports_dir = os.path.join(reportGeneratorSrc, "componentCTK", "Reports")
     os.makedirs(reports_dir, exist_ok=True)
 
     # Prepare destination path for the report
-    dest_path = os.path.join(reports_dir, os.path.basename(component_yaml_path).split('.')[0])
+    dest_name = os.path.basename(component_yaml_path).split('.')[0]
+    dest_path = os.path.join(reports_dir, dest_name)
     if os.path.exists(dest_path):
         shutil.rmtree(dest_path)
 
-    copyResultsFolder(os.path.join(reportGeneratorSrc, 'componentCTK', 'resources', 'reports'),
-                        os.path.join(dest_path, 'reports'))
-    copyResultsFolder(os.path.join(reportGeneratorSrc, 'componentCTK', 'resources', 'results'),
-                        os.path.join(dest_path, 'results'))
-    copyResults(consolidated_results, os.path.join(dest_path, "consolidateResults.json"))
+    consolidated_name = "consolidateResults.json" + (".gz" if consolidated_results.endswith(".gz") else "")
+    if report_archive_enabled:
+        os.makedirs(dest_path)
+        with stage_profile.stage("report archive"):
+            archive_index = report_archive.archive_run(report_archive_dir, dest_name, {
+                'reports': os.path.join(reportGeneratorSrc, 'componentCTK', 'resources', 'reports'),
+                'results': os.path.join(reportGeneratorSrc, 'componentCTK', 'resources', 'results'),
+                consolidated_name: consolidated_results
+            }, metadata)
+        print(f"Extract the report with: python3 CTK_Executor.py archive extract {archive_index['run']} "
+              f"--output <folder>")
+    else:
+        copyResultsFolder(os.path.join(reportGeneratorSrc, 'componentCTK', 'resources', 'reports'),
+                            os.path.join(dest_path, 'reports'))
+        copyResultsFolder(os.path.join(reportGeneratorSrc, 'componentCTK', 'resources', 'results'),
+                            os.path.join(dest_path, 'results'))
+        link_or_copy(consolidated_results, os.path.join(dest_path, consolidated_name))
+    return dest_path
+
+
+# Download the golden component YAML and the CTKs of its APIs (with their node_modules) without running
+# anything against the cluster. Returns the path of the component YAML, None when it is not available.
+def fetch():
+    import yaml_index
+    ensure_configured()
+    component_to_run = component_under_test()
+    if not component_to_run:
+        return None
+    create_directories()
+    if offline_mode:
+        prepare_offline_bundle(offline_bundle_path)
+    start_api_index_refresh()
+
+    with stage_profile.stage("spec download", component=component_to_run):
+        component_yaml_path = download_standard_component_specification(component_to_run)
+    if not component_yaml_path:
+        print("Component YAML could not be downloaded.")
+        return None
+
+    yaml_content = yaml_index.load_document(component_yaml_path, parse_cache_dir)
+    register_api_versions(yaml_content)
+    prefetch_ctks(yaml_content)
+    with stage_profile.stage("process_apis"):
+        process_apis(yaml_content)
+    print(f"✅ Component YAML and CTKs of {component_to_run} are ready")
+    return component_yaml_path
+
+
+# Render the HTML report again from the results of the last run, without running any test
+def report():
+    ensure_configured()
+    if not os.path.isfile(os.path.join(reportGeneratorSrc, 'componentCTK', 'src', 'ctkconfig.json')):
+        print("❌ No ctkconfig.json in src/, run the CTK first")
+        return 1
+    return generateReport(report_only=True)
+
+
+# Consolidate the results of the last run and publish them to Reports/ again (e.g. after 'report')
+def consolidate():
+    ensure_configured()
+    component_to_run = component_under_test()
+    if not component_to_run:
+        return None
+    component_yaml_path = find_standard_component_specification(component_to_run)
+    if not component_yaml_path:
+        print(f"❌ No component YAML for {component_to_run} in {goldenComponentPath}, run the CTK first")
+        return None
+    results_dir = os.path.join(reportGeneratorSrc, "componentCTK", "resources", "results")
+    payload_output_dir = os.path.join(reportGeneratorSrc, 'componentCTK', 'src', 'features', 'payloads')
+    consolidated_results = consolidate_results_to_json(results_dir, payload_output_dir)
+    dest_path = publish_reports(component_yaml_path, consolidated_results,
+                                {"component": component_to_run, "release": config.get('releaseName')})
+    print(f"Consolidated results published to: {dest_path}")
+    return dest_path
+
+
+# Live Component from the API server and its exposed API id -> URL map, (None, None) when it cannot be read.
+# With wait, polls until the status lists a URL for every exposed API of the Component.
+def fetch_live_component(manifest_docs, wait=False):
+    import api_resolution
+    import load_test
+    import readiness
+    component = api_resolution.component_document(manifest_docs)
+    if not component:
+        print("⚠️ No Component found in the deployed manifest")
+        return None, None
+    name = component["metadata"]["name"]
+    expected = {api["id"].upper() for api in
+                component.get("spec", {}).get("coreFunction", {}).get("exposedAPIs", []) or []}
+
+    def lookup():
+        live_component = readiness.run_kubectl(load_test.get_live_component, name,
+                                               component["apiVersion"].split("/")[1], component_namespace)
+        urls = load_test.exposed_api_urls(live_component)
+        return (live_component, urls) if not wait or expected.issubset(urls) else None
+
+    try:
+        if wait:
+            return readiness.poll_until(lookup, f"API URLs of component {name}", poll_settings)
+        return lookup()
+    except (OSError, ValueError, subprocess.CalledProcessError, readiness.NotReadyError) as e:
+        print(f"⚠️ Could not read the API URLs of the deployed Component. Error: {e}")
+        return None, None
+
+
+# Resolve the component and stub APIs once: the live Component status and the helm manifest of each
+# dependent stub release. Written to api-resolution.json for the BDD steps, returns the resolution.
+def resolve_apis(manifest_docs, ctkconfig, component_to_run, wait=False):
+    import api_resolution
+    live_component, exposed_urls = fetch_live_component(manifest_docs, wait)
+    stubs = config.get("dependentStubs", {}).get(component_to_run.lower(), {})
+    headers = ctkconfig.get("headers", {})
+    resolved_stubs = api_resolution.resolve_stubs(stubs, component_namespace, resources_dir, parse_cache_dir,
+                                                  headers)
+    resolution = api_resolution.build(live_component, exposed_urls or {}, config.get('releaseName'),
+                                      component_namespace, headers, resolved_stubs)
+    api_resolution.write(api_resolution_path, resolution)
+    print(f"Resolved {len(resolution['exposedAPIs'])} exposed API(s) and {len(resolved_stubs)} stub release(s): "
+          f"{api_resolution_path}")
+    return resolution
+
+
+# Exposed API id -> URL of a resolution, None when the live Component could not be read
+def resolved_exposed_api_urls(resolution):
+    if not resolution["component"]["name"]:
+        return None
+    return {api_id: api["url"] for api_id, api in resolution["exposedAPIs"].items()}
+
+
+# Fail fast when the exposed APIs do not come up, instead of running every CTK against them
+def check_exposed_apis_ready(resolution, ctkconfig):
+    import readiness
+    urls = resolved_exposed_api_urls(resolution)
+    if not urls:
+        print("⚠️ Skipping the readiness check of the exposed APIs")
+        return
+    print(f"Waiting for {len(urls)} exposed API(s) to be ready")
+    failures = readiness.wait_for_apis(list(urls.values()), ctkconfig.get("headers", {}), poll_settings,
+                                       verify=ctkconfig.get("rejectUnauthorized", True))
+    if failures:
+        for url, error in failures.items():
+            print(f"❌ {error}")
+        raise RuntimeError(f"Aborting CTK run, exposed APIs not ready: {', '.join(failures)}")
+
+
+# Run the load test against the exposed APIs of the deployed component, results go to results/load-test
+def run_load_test(resolution, ctkconfig, results_dir):
+    import load_test
+    api_urls = resolved_exposed_api_urls(resolution)
+    if api_urls is None:
+        print("⚠️ Skipping the load test")
+        return None
+
+    settings = {k: v for k, v in load_test_settings.items() if k not in ("enabled", "order", "apis")}
+    targets = load_test.build_targets(api_urls, ctkconfig.get("payloads", {}),
+                                      ctk_name_mapping, load_test_settings.get("apis"))
+    if not targets:
+        print("⚠️ No exposed API with a POST payload in ctkconfig.payloads, skipping the load test")
+        return None
+
+    print(f"Running load test against {len(targets)} resource(s) for {settings.get('durationSeconds', 60)}s")
+    report = load_test.run_load(targets, ctkconfig.get("headers", {}), settings,
+                                verify=ctkconfig.get("rejectUnauthorized", True))
+    load_dir = os.path.join(results_dir, 'load-test')
+    os.makedirs(load_dir, exist_ok=True)
+    write_json_file(os.path.join(load_dir, 'loadResults.json'), report)
+    total = report["total"]
+    print(f"Load test: {total['requests']} requests, {total['rps']} req/s, p95 {total['p95']} ms, "
+          f"error rate {total['errorRate']:.2%}")
+    if report["cleanup"]:
+        print(f"Load test: deleted {report['cleanup']['deleted']} created resource(s)")
+    else:
+        print("⚠️ Load test: cleanup is off, the created resources stay in the component")
+    return report
+
+
+# Read all documents of the deployed component manifest (helm get manifest output)
+def read_manifest_documents(revision=None):
+    import yaml_index
+    import api_resolution
+    release = config.get('releaseName')
+    manifest_path = os.path.join(reportGeneratorSrc, f"componentCTK/resources/component-{release}.yaml")
+    if not os.path.exists(manifest_path):
+        return []
+    cache_revision = api_resolution.manifest_revision(release, component_namespace, revision)
+    documents = yaml_index.load_documents(manifest_path, parse_cache_dir, cache_revision)
+    return [doc for doc in documents if isinstance(doc, dict)]
+
+
+# The part of the helm manifest an API depends on: its Component entry, the Service that
+# implements it and the workloads selected by that Service (images, env, replicas...)
+def manifest_section_for_api(api_id, manifest_docs):
+    section = {"componentApis": [], "services": [], "workloads": []}
+    for doc in manifest_docs:
+        if doc.get("kind") != "Component":
+            continue
+        spec = doc.get("spec", {})
+        apis = (spec.get("coreFunction", {}).get("exposedAPIs", []) or []) + \
+               (spec.get("securityFunction", {}).get("exposedAPIs", []) or [])
+        for api in apis:
+            spec_urls = json.dumps(api.get("specification", ""))
+            if api.get("id") == api_id or api_id in spec_urls:
+                section["componentApis"].append(api)
+
+    implementations = {api.get("implementation") for api in section["componentApis"]}
+    selectors = []
+    for doc in manifest_docs:
+        if doc.get("kind") == "Service" and doc.get("metadata", {}).get("name") in implementations:
+            section["services"].append(doc.get("spec", {}))
+            selectors.append(doc.get("spec", {}).get("selector") or {})
+
+    for doc in manifest_docs:
+        if doc.get("kind") not in ("Deployment", "StatefulSet", "DaemonSet"):
+            continue
+        labels = doc.get("spec", {}).get("template", {}).get("metadata", {}).get("labels", {}) or {}
+        if any(selector and all(labels.get(k) == v for k, v in selector.items()) for selector in selectors):
+            section["workloads"].append(doc.get("spec", {}))
+    return section
+
+
+# Fingerprint of everything that influences the CTK result of an API
+def api_fingerprint(api_id, manifest_docs, ctkconfig):
+    ctk_name = ctk_name_mapping.get(api_id, api_id)
+    ctk_folder_path = os.path.join(resources_dir, 'api-ctks', ctk_name)
+    marker_path = os.path.join(ctk_folder_path, CTK_MARKER_FILE)
+    config_path = os.path.join(ctk_folder_path, 'config.json')
+    inputs = {
+        "ctkVersion": config.get("ctkVersion"),
+        "ctk": read_json_file(marker_path).get("sha256") if os.path.isfile(marker_path) else ctk_name,
+        "url": read_json_file(config_path).get("url") if os.path.isfile(config_path) else None,
+        "headers": ctkconfig.get("headers"),
+        "payloads": ctkconfig.get("payloads", {}).get(ctk_name),
+        "manifest": manifest_section_for_api(api_id, manifest_docs)
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+# Copy cached results of APIs with an unchanged fingerprint into results/api-ctk-results
+def restore_unchanged_api_results(api_ids, manifest_docs, ctkconfig, results_dir):
+    reused = []
+    api_results_dir = os.path.join(results_dir, 'api-ctk-results')
+    for api_id in api_ids:
+        ctk_name = ctk_name_mapping.get(api_id)
+        cached_dir = os.path.join(incremental_dir, ctk_name or api_id)
+        fingerprint_path = os.path.join(cached_dir, 'fingerprint.json')
+        if not ctk_name or not os.path.isfile(fingerprint_path):
+            continue
+        if read_json_file(fingerprint_path).get("fingerprint") != api_fingerprint(api_id, manifest_docs, ctkconfig):
+            print(f"Inputs of {ctk_name} changed, its CTK will run again")
+            continue
+        os.makedirs(api_results_dir, exist_ok=True)
+        copyResults(os.path.join(cached_dir, 'jsonResults.json'), os.path.join(api_results_dir, f"{ctk_name}.json"))
+        copyResults(os.path.join(cached_dir, 'htmlResults.html'), os.path.join(api_results_dir, f"{ctk_name}.html"))
+        reused.append(ctk_name)
+        print(f"Reusing unchanged CTK results for {ctk_name}")
+    return reused
+
+
+# Remember the results of this run together with the fingerprint of their inputs
+def store_api_results(api_ids, manifest_docs, ctkconfig, results_dir):
+    api_results_dir = os.path.join(results_dir, 'api-ctk-results')
+    for api_id in api_ids:
+        ctk_name = ctk_name_mapping.get(api_id)
+        if not ctk_name or ctk_name in ctkconfig.get("reuseApiResults", []):
+            continue
+        json_path = os.path.join(api_results_dir, f"{ctk_name}.json")
+        html_path = os.path.join(api_results_dir, f"{ctk_name}.html")
+        if not (os.path.isfile(json_path) and os.path.isfile(html_path)):
+            continue
+        failed = read_json_file(json_path).get("run", {}).get("stats", {}).get("assertions", {}).get("failed", 0)
+        cached_dir = os.path.join(incremental_dir, ctk_name)
+        if failed and not reuse_failed_results:
+            shutil.rmtree(cached_dir, ignore_errors=True)
+            continue
+        os.makedirs(cached_dir, exist_ok=True)
+        copyResults(json_path, os.path.join(cached_dir, 'jsonResults.json'))
+        copyResults(html_path, os.path.join(cached_dir, 'htmlResults.html'))
+        write_json_file(os.path.join(cached_dir, 'fingerprint.json'), {
+            "fingerprint": api_fingerprint(api_id, manifest_docs, ctkconfig)
+        })
 
 
 # Update CTK configuration based on the file path
@@ -536,7 +1051,21 @@ def update_ctkconfig(ctkconfig, path):
     ctkconfig["goldenComponentFilePath"] = f"../resources/standard-components/{path}"
     ctkconfig["componentName"] = path.split('.')[0]
     ctkconfig["componentFilePath"] = f"../resources/component-{config.get('releaseName')}.yaml"
+    ctkconfig["componentIndexFilePath"] = "../resources/component-index.json"
+    ctkconfig["apiResolutionFilePath"] = "../resources/api-resolution.json"
     ctkconfig["component_namespace"] = component_namespace
+    ctkconfig["ctkWorkers"] = ctk_workers if parallel_settings.get("enabled", False) else 0
+    ctkconfig["bddWorkers"] = bdd_workers
+    ctkconfig["ctkSharding"] = {
+        "enabled": shard_settings.get("enabled", False),
+        "shardsPerCtk": max(1, int(shard_settings.get("shardsPerCtk", 4))),
+        "minRequests": int(shard_settings.get("minRequests", 40)),
+        "apis": shard_settings.get("apis", [])
+    }
+    ctkconfig["offline"] = offline_mode
+    # CTK node_modules are prepared by this script, the CTK runs only need 'npm start'
+    ctkconfig["skipNpmInstall"] = offline_mode or node_cache_enabled
+    ctkconfig["reuseApiResults"] = []
 
     # Set optional run flags
     optional_flags = ['runExposedOptional', 'runDependentOptional', 'runSecurityOptional']
@@ -547,8 +1076,8 @@ def update_ctkconfig(ctkconfig, path):
         ctkconfig["ctkConfig"] = {}
 
 
-# Process APIs for execution based on YAML content
-def process_apis(yaml_content, current_dir):
+# List the ids of the APIs whose CTK must run, in the order they appear in the component YAML
+def select_apis(yaml_content, log=False):
     core_functions = yaml_content.get("spec", {}).get("coreFunction", {})
     security_functions = yaml_content.get("spec", {}).get("securityFunction", {})
 
@@ -558,25 +1087,434 @@ def process_apis(yaml_content, current_dir):
         'SecurityAPIs': security_functions.get("exposedAPIs", [])
     }
 
+    selected_apis = []
     for api_type, apis in api_types.items():
-        print("=" * 30)
-        print(f"{api_type.replace('APIs', ' APIs')}")
-        print("=" * 30)
+        if log:
+            print("=" * 30)
+            print(f"{api_type.replace('APIs', ' APIs')}")
+            print("=" * 30)
         for api in apis:
-            print(f"Checking CTK for {api['id']}")
+            if log:
+                print(f"Checking CTK for {api['id']}")
             try:
                 if api['required'] or config[f"run{api_type.replace('APIs', 'Optional')}"]:
-                    print(f"Downloading CTK for {api['id']}")
-
-                    download_ctk(api['id'])
-#                if ctk_mapping.get(api['id']) and (
-#                        api['required'] or config[f"run{api_type.replace('APIs', 'Optional')}"]):
-#                    print("Executing CTK Commands")
-#                    run_ctk(api['id'], ctk_mapping[api['id']])
+                    selected_apis.append(api['id'])
             except KeyError:
                 print(f'{api["id"]} CTK not available due to error {KeyError}')
 
+    # The same API can be listed in more than one section, only prepare it once
+    return list(dict.fromkeys(selected_apis))
+
+
+# Process APIs for execution based on YAML content
+def process_apis(yaml_content):
+    selected_apis = select_apis(yaml_content, log=True)
+
+    print(f"Preparing {len(selected_apis)} CTK(s) with {ctk_workers} worker(s)")
+    with ThreadPoolExecutor(max_workers=ctk_workers) as executor:
+        futures = {executor.submit(prepare_api_ctk, api_id): api_id for api_id in selected_apis}
+        for future in as_completed(futures):
+            api_id = futures[future]
+            try:
+                future.result()
+            except KeyError:
+                print(f'{api_id} CTK not available due to error {KeyError}')
+            except Exception as e:
+                print(f"Failed to prepare CTK for {api_id}. Error: {e}")
+
+
+# Download every CTK zip needed by the component into the cache concurrently, so that
+# process_apis only has cache hits left. Bound by bandwidth rather than round trips.
+def prefetch_ctks(yaml_content):
+    import ctk_cache
+    if not ctk_cache_enabled:
+        print("CTK cache is disabled, skipping CTK prefetch")
+        return
+
+    register_api_versions(yaml_content)
+    entries = [ctk_index_entry(api_id) for api_id in select_apis(yaml_content)]
+    urls = [entry['ctk'] for entry in entries if entry]
+    urls = [url for url in dict.fromkeys(urls) if not ctk_cache.lookup(ctk_cache_dir, url)]
+    if not urls:
+        print("All required CTKs are already cached")
+        return
+
+    def prefetch(url):
+        with stage_profile.stage("prefetch", url=url):
+            ctk_cache.fetch(ctk_cache_dir, url, download_file, ctk_cache_max_bytes)
+
+    print(f"Prefetching {len(urls)} CTK(s) with {download_workers} concurrent download(s)")
+    with ThreadPoolExecutor(max_workers=download_workers) as executor:
+        futures = {executor.submit(prefetch, url): url for url in urls}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"⚠️ Prefetch of {futures[future]} failed, it will be retried later. Error: {e}")
+
+
+# Download the CTK of a single API and prepare its node_modules
+def prepare_api_ctk(api_id):
+    import node_cache
+    print(f"Downloading CTK for {api_id}")
+    with stage_profile.stage("download_ctk", api=api_id):
+        download_ctk(api_id)
+    ctk_dir = os.path.join(resources_dir, 'api-ctks', ctk_name_mapping.get(api_id, api_id), 'ctk')
+    if node_cache_enabled and not offline_mode and os.path.isdir(ctk_dir):
+        node_cache.ensure_node_modules(ctk_dir, node_cache_dir)
+
+
+# Install node modules in a folder (used when building the offline bundle)
+def npm_install(folder):
+    import node_cache
+    if node_cache_enabled:
+        node_cache.ensure_node_modules(folder, node_cache_dir)
+        return
+    print(f"Installing node modules in: {folder}")
+    with stage_profile.stage("npm install", project=folder):
+        result = subprocess.run("npm install", cwd=folder, shell=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"npm install failed in {folder}")
+
+
+# Build an archive with everything a run needs on an air-gapped runner:
+# golden component YAMLs, CTK zips, apiIndex.json and the node_modules of src/ and of every CTK
+def create_offline_bundle(output_path, components):
+    import ctk_cache
+    import yaml_index
+    ensure_configured()
+    create_directories()
+    src_dir = os.path.join(reportGeneratorSrc, 'componentCTK', 'src')
+    ctk_unzip_path = os.path.join(resources_dir, 'api-ctks')
+    manifest = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "ctkVersion": config.get("ctkVersion"),
+        "components": {},
+        "ctks": {},
+        "ctkNodeModules": []
+    }
+
+    with tarfile.open(output_path, "w:gz") as bundle:
+        bundle.add(api_index_path, arcname='configData/apiIndex.json')
+
+        for component in components:
+            component_yaml_path = download_standard_component_specification(component.upper())
+            if not component_yaml_path:
+                raise RuntimeError(f"Component YAML for {component} could not be downloaded")
+            yaml_name = os.path.basename(component_yaml_path)
+            bundle.add(component_yaml_path, arcname=f"standard-components/{yaml_name}")
+
+            yaml_content = yaml_index.load_document(component_yaml_path, parse_cache_dir)
+            prefetch_ctks(yaml_content)
+            api_ids = select_apis(yaml_content)
+            manifest["components"][component.upper()] = {"yaml": yaml_name, "apis": api_ids}
+
+            for api_id in api_ids:
+                for ctk in [entry for entry in [ctk_index_entry(api_id)] if entry]:
+                    url = ctk['ctk']
+                    if url in manifest["ctks"]:
+                        continue
+                    _, entry = ctk_cache.fetch(ctk_cache_dir, url, download_file, ctk_cache_max_bytes)
+                    arcname = f"ctks/{entry['sha256']}.zip"
+                    if arcname not in [ctk["path"] for ctk in manifest["ctks"].values()]:
+                        bundle.add(os.path.join(ctk_cache_dir, entry["zip"]), arcname=arcname)
+                    manifest["ctks"][url] = {"sha256": entry["sha256"], "path": arcname}
+
+                # The CTK folders install their own node packages before running newman
+                download_ctk(api_id)
+                ctk_name = ctk_name_mapping.get(api_id)
+                ctk_dir = os.path.join(ctk_unzip_path, ctk_name or "", 'ctk')
+                if ctk_name and os.path.isdir(ctk_dir) and ctk_name not in manifest["ctkNodeModules"]:
+                    npm_install(ctk_dir)
+                    bundle.add(os.path.join(ctk_dir, 'node_modules'),
+                               arcname=f"ctk-node-modules/{ctk_name}/node_modules")
+                    manifest["ctkNodeModules"].append(ctk_name)
+
+        npm_install(src_dir)
+        bundle.add(os.path.join(src_dir, 'node_modules'), arcname='src/node_modules')
+
+        manifest_path = os.path.join(resources_dir, BUNDLE_MANIFEST_FILE)
+        write_json_file(manifest_path, manifest)
+        bundle.add(manifest_path, arcname=BUNDLE_MANIFEST_FILE)
+        os.remove(manifest_path)
+
+    print(f"Offline bundle written to: {output_path}")
+    return output_path
+
+
+# Extract a tar archive, refusing members that would land outside the destination
+def safe_extract_tar(tar_path, destination):
+    with tarfile.open(tar_path, "r:*") as tar:
+        if hasattr(tarfile, "data_filter"):
+            tar.extractall(destination, filter="data")
+            return
+        root = os.path.realpath(destination)
+        for member in tar.getmembers():
+            target = os.path.realpath(os.path.join(destination, member.name))
+            is_link = member.issym() or member.islnk()
+            if os.path.commonpath([root, target]) != root or (is_link and os.path.isabs(member.linkname)):
+                raise RuntimeError(f"Unsafe path in bundle: {member.name}")
+        tar.extractall(destination)
+
+
+# Copy node_modules from the bundle unless the same bundle was already restored there
+def restore_node_modules(source, destination, bundle_id):
+    marker = os.path.join(destination, ".ctk-bundle")
+    if os.path.isfile(marker):
+        with open(marker, "r", encoding="utf-8") as f:
+            if f.read().strip() == bundle_id:
+                return
+    if os.path.exists(destination):
+        shutil.rmtree(destination)
+    shutil.copytree(source, destination, symlinks=True)
+    with open(marker, "w", encoding="utf-8") as f:
+        f.write(bundle_id)
+    print(f"Restored node modules: {destination}")
+
+
+# Unpack the offline bundle and seed the CTK cache, golden YAMLs, apiIndex.json and node_modules from it
+def prepare_offline_bundle(bundle_path):
+    import ctk_cache
+    global ctk_cache_enabled
+    if not os.path.isfile(bundle_path):
+        raise RuntimeError(f"Offline bundle not found: {bundle_path}")
+
+    bundle_id = ctk_cache.sha256_file(bundle_path)
+    bundle_dir = os.path.join(resources_dir, 'offline-bundle')
+    id_file = os.path.join(bundle_dir, '.bundle-id')
+    if not (os.path.isfile(id_file) and open(id_file, encoding="utf-8").read().strip() == bundle_id):
+        if os.path.exists(bundle_dir):
+            shutil.rmtree(bundle_dir)
+        print(f"Extracting offline bundle: {bundle_path}")
+        safe_extract_tar(bundle_path, bundle_dir)
+        with open(id_file, "w", encoding="utf-8") as f:
+            f.write(bundle_id)
+
+    manifest = read_json_file(os.path.join(bundle_dir, BUNDLE_MANIFEST_FILE))
+
+    for yaml_file in os.listdir(os.path.join(bundle_dir, 'standard-components')):
+        shutil.copy(os.path.join(bundle_dir, 'standard-components', yaml_file),
+                    os.path.join(goldenComponentPath, yaml_file))
+    shutil.copy(os.path.join(bundle_dir, 'configData', 'apiIndex.json'), api_index_path)
+
+    # CTKs always go through the cache in offline mode, the bundle zips seed it
+    ctk_cache_enabled = True
+    for url, ctk in manifest["ctks"].items():
+        bundled_zip = os.path.join(bundle_dir, ctk["path"])
+        _, entry = ctk_cache.fetch(ctk_cache_dir, url, lambda _url, dst: shutil.copy(bundled_zip, dst),
+                                   ctk_cache_max_bytes)
+        if entry["sha256"] != ctk["sha256"]:
+            raise RuntimeError(f"CTK for {url} in the cache does not match the offline bundle")
+
+    restore_node_modules(os.path.join(bundle_dir, 'src', 'node_modules'),
+                         os.path.join(reportGeneratorSrc, 'componentCTK', 'src', 'node_modules'), bundle_id)
+    print("Offline bundle is ready")
+    return manifest
+
+
+# Copy the bundled node_modules into an installed CTK folder
+def restore_ctk_node_modules(ctk_name, ctk_folder_path):
+    bundle_dir = os.path.join(resources_dir, 'offline-bundle')
+    source = os.path.join(bundle_dir, 'ctk-node-modules', ctk_name, 'node_modules')
+    if not os.path.isdir(source):
+        print(f"⚠️ Offline bundle has no node modules for {ctk_name}")
+        return
+    bundle_id = open(os.path.join(bundle_dir, '.bundle-id'), encoding="utf-8").read().strip()
+    restore_node_modules(source, os.path.join(ctk_folder_path, 'ctk', 'node_modules'), bundle_id)
+
+
+# Helm releases of the stubs the BDD scenarios of the component under test depend on
+def stub_release_names():
+    stubs = config.get("dependentStubs", {}).get((config.get("component_to_run") or "").lower(), {})
+    return sorted({details["releaseName"] for details in stubs.values() if details.get("releaseName")})
+
+
+# Release name -> helm revision of the release under test and its stubs, None when helm cannot tell
+def watched_revisions():
+    import api_resolution
+    revisions = api_resolution.helm_revisions(component_namespace)
+    if revisions is None:
+        return None
+    return {release: revisions.get(release) for release in [config.get('releaseName')] + stub_release_names()}
+
+
+# Run the CTK once, then again on every new helm revision of the release or of one of its stubs.
+# The process keeps the parsed configuration, API index, HTTP session and caches between runs, and
+# runs incrementally: CTKs whose part of the deployed manifest did not change reuse their results,
+# so a stub upgrade only re-runs the BDD scenarios. Every run is stored in the run history.
+def watch(interval, settle, max_runs=None):
+    global incremental_mode
+    ensure_configured()
+    incremental_mode = True
+    last = None
+    runs = 0
+    print(f"Watching helm releases {', '.join([config.get('releaseName')] + stub_release_names())} "
+          f"in namespace {component_namespace} (every {interval}s)")
+    while True:
+        current = watched_revisions()
+        if current is None:
+            print(f"⚠️ Could not list the helm releases of namespace {component_namespace}, retrying")
+        elif current != last:
+            # Upgrades often come in a row (component, then stubs): run once they stopped changing
+            time.sleep(settle)
+            if watched_revisions() != current:
+                continue
+            changed = [f"{release} r{revision}" for release, revision in current.items()
+                       if last is None or last.get(release) != revision]
+            print(f"🔄 {'Initial run' if last is None else 'New helm revision'}: {', '.join(changed)}")
+            stage_profile.reset()
+            started = time.time()
+            try:
+                ctkExecutor()
+                print(f"✅ Run finished in {time.time() - started:.1f}s")
+            except Exception as e:
+                print(f"❌ Run failed after {time.time() - started:.1f}s. Error: {e}")
+            last = current
+            runs += 1
+            if max_runs and runs >= max_runs:
+                return
+        time.sleep(interval)
+
+
+# Command line: 'run' (default) executes the CTK, the other commands run one of its steps or a tool
+def main(argv=None):
+    global offline_mode, offline_bundle_path, incremental_mode, load_test_enabled
+    parser = argparse.ArgumentParser(description="ODA Component CTK executor")
+    parser.add_argument("--config", default=DEFAULT_CONFIG_PATH, help="CHANGE_ME.json to use")
+    subparsers = parser.add_subparsers(dest="command")
+
+    run_parser = subparsers.add_parser("run", help="Run the component CTK (default)")
+    run_parser.add_argument("--offline", metavar="BUNDLE",
+                            help="Run from an offline bundle without any network access")
+    run_parser.add_argument("--incremental", action="store_true",
+                            help="Only re-run the CTKs whose inputs changed since the last run")
+    run_parser.add_argument("--load", action="store_true",
+                            help="Also run the load test against the exposed APIs (see loadTest)")
+    run_parser.add_argument("--profile", action="store_true",
+                            help="Profile the executor with cProfile (ctkExecutor.prof next to the results)")
+
+    fetch_parser = subparsers.add_parser("fetch", help="Download the component YAML and its CTKs without running them")
+    fetch_parser.add_argument("--offline", metavar="BUNDLE", help="Install them from an offline bundle")
+
+    subparsers.add_parser("report", help="Render the HTML report again from the results of the last run")
+    subparsers.add_parser("consolidate", help="Consolidate the results of the last run and copy them to Reports/")
+
+    multi_parser = subparsers.add_parser("multi", help="Run several component/release targets in parallel")
+    multi_parser.add_argument("--target", action="append", metavar="COMPONENT:RELEASE[:NAMESPACE]",
+                              help="Target to run, can be repeated (default: multiTarget.targets)")
+    multi_parser.add_argument("--workers", type=int, help="Number of targets running at the same time")
+    multi_parser.add_argument("--incremental", action="store_true",
+                              help="Only re-run the CTKs whose inputs changed since the last run")
+
+    watch_parser = subparsers.add_parser("watch", help="Re-run the CTK on every new helm revision of the release "
+                                                        "or its dependent stubs")
+    watch_parser.add_argument("--interval", type=float,
+                              help="Seconds between two polls of the helm revisions (default: watchSettings, 10)")
+    watch_parser.add_argument("--settle", type=float,
+                              help="Seconds the revisions must stay unchanged before a run starts (default: 5)")
+    watch_parser.add_argument("--max-runs", type=int, help="Stop after this many runs")
+
+    history_parser = subparsers.add_parser("history", help="Query the run history (trend, slowest, flaky, runs)")
+    history_parser.add_argument("query", nargs=argparse.REMAINDER, help="See 'history -h' of run_history.py")
+
+    archive_parser = subparsers.add_parser("archive", help="List and extract archived reports (runs, files, extract)")
+    archive_parser.add_argument("action", nargs=argparse.REMAINDER, help="See 'archive -h' of report_archive.py")
+
+    diff_parser = subparsers.add_parser("diff", help="Compare the results of two runs (folders or archived runs)")
+    diff_parser.add_argument("runs", nargs=argparse.REMAINDER, help="See 'diff -h' of result_diff.py")
+
+    bundle_parser = subparsers.add_parser("bundle", help="Build an offline bundle for air-gapped runners")
+    bundle_parser.add_argument("--output", default="ctk-offline-bundle.tar.gz", help="Bundle file to write")
+    bundle_parser.add_argument("--components", nargs="+",
+                               help="Component ids to include (default: component_to_run)")
+
+    args = parser.parse_args(argv)
+    configure(args.config)
+
+    if args.command == "history":
+        import run_history
+        sys.exit(run_history.main(args.query, default_db=run_history_db))
+
+    if args.command == "archive":
+        import report_archive
+        sys.exit(report_archive.main(args.action, default_dir=report_archive_dir))
+
+    if args.command == "diff":
+        import result_diff
+        sys.exit(result_diff.main(args.runs, default_archive_dir=report_archive_dir))
+
+    if args.command == "report":
+        sys.exit(report())
+
+    if args.command == "consolidate":
+        sys.exit(0 if consolidate() else 1)
+
+    if args.command == "bundle":
+        if offline_mode:
+            parser.error("'bundle' needs network access, clear offlineBundle in CHANGE_ME.json")
+        components = args.components or [config.get("component_to_run")]
+        create_offline_bundle(os.path.abspath(args.output), components)
+        return
+
+    if args.command == "multi":
+        import multi_target
+        multi_settings = config.get("multiTarget", {})
+        if args.target:
+            targets = [multi_target.parse_target(t, component_namespace) for t in args.target]
+        else:
+            targets = [{"namespace": component_namespace, **t} for t in multi_settings.get("targets", [])]
+        if not targets:
+            parser.error("no targets, use --target or multiTarget.targets in CHANGE_ME.json")
+        source_dir = os.path.join(reportGeneratorSrc, "componentCTK")
+        workspace_dir = multi_settings.get("workspaceDir") or os.path.join(source_dir, "workspaces")
+        workers = args.workers or multi_settings.get("workers", len(targets))
+        results = multi_target.run_targets(targets, config, source_dir, workspace_dir, workers,
+                                           ["--incremental"] if args.incremental else [])
+        if any(results.values()):
+            sys.exit(1)
+        return
+
+    if args.command == "watch":
+        interval = args.interval if args.interval is not None else watch_settings.get("intervalSeconds", 10)
+        settle = args.settle if args.settle is not None else watch_settings.get("settleSeconds", 5)
+        try:
+            watch(interval, settle, args.max_runs)
+        except KeyboardInterrupt:
+            print("Watch mode stopped")
+        return
+
+    if getattr(args, "offline", None):
+        offline_bundle_path = os.path.abspath(args.offline)
+        offline_mode = True
+    if getattr(args, "incremental", False):
+        incremental_mode = True
+    if getattr(args, "load", False):
+        load_test_enabled = True
+
+    if args.command == "fetch":
+        sys.exit(0 if fetch() else 1)
+
+    if not getattr(args, "profile", False):
+        ctkExecutor()
+        return
+
+    import cProfile
+    import pstats
+    output_dir = resources_dir
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        dest_path = ctkExecutor()
+        if dest_path:
+            output_dir = dest_path
+    finally:
+        profiler.disable()
+        profile_path = os.path.join(output_dir, "ctkExecutor.prof")
+        profiler.dump_stats(profile_path)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+        print(f"cProfile output written to: {profile_path}")
+
 
 # Entry point for the script
 if __name__ == "__main__":
-    ctkExecutor()
+    main()
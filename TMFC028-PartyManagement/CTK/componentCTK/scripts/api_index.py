@@ -0,0 +1,144 @@
+import os
+import re
+import json
+import threading
+
+# Structured lookup of configData/apiIndex.json, the CTK download URL of every TMF API version.
+#
+# Keys such as "TMF632_v4.0.0" or "TMF632E_v5.0.0" are parsed once into
+#   (API id, major version) -> {"key", "version", "ctk", ...}
+# so that an API is matched exactly on its id and on the major version of its specification in
+# the component YAML. When several minor versions exist the highest one is used, and an id with
+# a letter suffix (TMF632E) also answers for the plain id (TMF632) when that has no CTK of its own.
+#
+# The file is refreshed from ctk_download_urls with a conditional GET: the ETag and Last-Modified
+# of the last download are kept next to it and an unchanged index costs a 304.
+
+KEY_PATTERN = re.compile(r"^(?P<id>[A-Za-z]+\d+)(?P<variant>[A-Za-z]*)_v(?P<version>\d+(?:\.\d+)*)$")
+VERSION_PATTERN = re.compile(r"^[vV]?(\d+)(?:\.\d+)*$")
+# Major version assumed for APIs whose specification has no usable version
+DEFAULT_MAJOR_VERSION = 4
+
+_lock = threading.Lock()
+_loaded = {}
+
+
+def _version_tuple(version):
+    return tuple(int(part) for part in version.split("."))
+
+
+# Major version of a specification version ("v4.0.0" -> 4), None when it is not a version number
+def major_version(version):
+    match = VERSION_PATTERN.match(str(version or "").strip())
+    return int(match.group(1)) if match else None
+
+
+def build_lookup(index):
+    exact = {}
+    aliases = {}
+    for key, entry in index.items():
+        match = KEY_PATTERN.match(key)
+        if not match or not isinstance(entry, dict):
+            continue
+        version = _version_tuple(match.group("version"))
+        item = {**entry, "key": key, "version": match.group("version")}
+        base_id = match.group("id").upper()
+        full_id = base_id + match.group("variant").upper()
+        for table, api_id in ((exact, full_id), (aliases, base_id)):
+            current = table.get((api_id, version[0]))
+            if not current or _version_tuple(current["version"]) < version:
+                table[(api_id, version[0])] = item
+    return {**aliases, **exact}
+
+
+# Parsed index and lookup of an apiIndex.json, parsed again only when the file changed
+def load(path):
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        cached = _loaded.get(path)
+        if cached and cached[0] == signature:
+            return cached[1], cached[2]
+        with open(path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        lookup = build_lookup(index)
+        _loaded[path] = (signature, index, lookup)
+        return index, lookup
+
+
+# Index entry of the CTK of an API, None when the index has no CTK for that major version
+def find(lookup, api_id, major=None):
+    return lookup.get((api_id.upper(), major or DEFAULT_MAJOR_VERSION))
+
+
+# API id -> major version of its first specification, for every API of a component YAML
+def api_major_versions(yaml_content):
+    spec = yaml_content.get("spec", {})
+    sections = [spec.get("coreFunction", {}).get("exposedAPIs", []),
+                spec.get("coreFunction", {}).get("dependentAPIs", []),
+                spec.get("securityFunction", {}).get("exposedAPIs", [])]
+    versions = {}
+    for apis in sections:
+        for api in apis or []:
+            specification = api.get("specification") or [{}]
+            if isinstance(specification, dict):
+                specification = [specification]
+            major = major_version(specification[0].get("version"))
+            versions.setdefault(api["id"], major or DEFAULT_MAJOR_VERSION)
+    return versions
+
+
+def _validators_path(path):
+    return os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.etag.json")
+
+
+# Download the index from url when it changed since the last download. Returns True when the
+# file was updated, False when it is unchanged (304). Raises on network errors and bad content.
+def refresh(path, url, session, timeout, verify=True):
+    validators = {}
+    validators_path = _validators_path(path)
+    if os.path.isfile(path) and os.path.isfile(validators_path):
+        try:
+            with open(validators_path, "r", encoding="utf-8") as f:
+                validators = json.load(f)
+        except (OSError, ValueError):
+            validators = {}
+    headers = {}
+    if validators.get("url") == url:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("lastModified"):
+            headers["If-Modified-Since"] = validators["lastModified"]
+
+    response = session.get(url, headers=headers, timeout=timeout, verify=verify)
+    if response.status_code == 304:
+        return False
+    response.raise_for_status()
+    index = response.json()
+    if not isinstance(index, dict) or not build_lookup(index):
+        raise ValueError(f"{url} is not an API index")
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(response.content)
+    os.replace(tmp_path, path)
+    with open(validators_path, "w", encoding="utf-8") as f:
+        json.dump({"url": url, "etag": response.headers.get("ETag"),
+                   "lastModified": response.headers.get("Last-Modified")}, f)
+    return True
+
+
+# Run refresh in a daemon thread, errors are reported and leave the current index in place
+def refresh_in_background(path, url, session, timeout, verify=True):
+    def run():
+        try:
+            if refresh(path, url, session, timeout, verify):
+                print(f"API index refreshed from {url}")
+            else:
+                print(f"API index unchanged at {url}")
+        except Exception as e:
+            print(f"⚠️ Could not refresh the API index from {url}, using {path}. Error: {e}")
+
+    thread = threading.Thread(target=run, name="api-index-refresh", daemon=True)
+    thread.start()
+    return thread
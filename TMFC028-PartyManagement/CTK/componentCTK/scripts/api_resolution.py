@@ -0,0 +1,179 @@
+import os
+import json
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml_index
+
+# Resolution of the deployed APIs, done once per run before the CTKs and BDD tests start.
+#
+# The executor reads the status of the live Component and the helm manifest of every
+# dependent stub release once, and writes resources/api-resolution.json:
+#   exposedAPIs    exposed API id -> URL, path, release and headers of the component under test
+#   dependentAPIs  dependent APIs of the component with the URL from its status
+#   stubs          dependent stub releases with their headers and exposed API paths
+#   paths          API path -> release, URL and headers, for the component and the stubs
+# The BDD steps (src/features/utils) look APIs up in that file instead of calling helm and
+# the API server for every scenario.
+
+RESOLUTION_VERSION = 1
+
+
+# Revision of a helm release, None when helm cannot tell
+def helm_revision(release, namespace):
+    try:
+        result = subprocess.run(
+            ["helm", "list", "-n", namespace, "--filter", f"^{release}$", "-o", "json"],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        releases = json.loads(result.stdout or "[]")
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        return None
+    return str(releases[0].get("revision")) if releases else None
+
+
+# Kubernetes context and API server helm and kubectl talk to, "" when kubectl cannot tell
+def kube_context():
+    try:
+        result = subprocess.run(
+            ["kubectl", "config", "view", "--minify", "-o",
+             "jsonpath={.current-context}|{.clusters[0].cluster.server}"],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+    return result.stdout.strip()
+
+
+# Revision under which the manifest of a release is cached by yaml_index. Helm revisions are small
+# integers that repeat across namespaces and clusters, so the cluster, namespace and release are part of it.
+def manifest_revision(release, namespace, revision):
+    if not revision:
+        return None
+    return f"{kube_context()}/{namespace}/{release}@{revision}"
+
+
+# Release name -> revision of every helm release of a namespace in one call, None when helm cannot tell
+def helm_revisions(namespace):
+    try:
+        result = subprocess.run(
+            ["helm", "list", "-n", namespace, "-o", "json"],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        releases = json.loads(result.stdout or "[]")
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        return None
+    return {release.get("name"): str(release.get("revision")) for release in releases}
+
+
+def component_document(docs):
+    return next((doc for doc in docs if isinstance(doc, dict) and doc.get("kind") == "Component"), None)
+
+
+# Dependent APIs of a live Component, matched with its status by position as the operator lists them
+def dependent_api_urls(live_component):
+    spec_apis = live_component.get("spec", {}).get("coreFunction", {}).get("dependentAPIs", []) or []
+    status_apis = live_component.get("status", {}).get("coreDependentAPIs", []) or []
+    apis = []
+    for index, api in enumerate(spec_apis):
+        url = status_apis[index].get("url") if index < len(status_apis) else None
+        apis.append({
+            "id": api.get("id"),
+            "name": api.get("name"),
+            "specification": [s.get("url") for s in api.get("specification", []) or [] if s.get("url")],
+            "url": url
+        })
+    return apis
+
+
+# Documents of the helm manifest of a stub release, parsed again only when its revision changed
+def stub_manifest_documents(release, namespace, manifest_dir, cache_dir):
+    manifest_path = os.path.join(manifest_dir, f"stub-{release}.yaml")
+    revision = helm_revision(release, namespace)
+    cache_revision = manifest_revision(release, namespace, revision)
+    if not (cache_revision and yaml_index.cached_revision(cache_dir, manifest_path) == cache_revision):
+        result = subprocess.run(
+            ["helm", "get", "manifest", release, "-n", namespace],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            f.write(result.stdout)
+    return yaml_index.load_documents(manifest_path, cache_dir, cache_revision), revision
+
+
+def _resolve_stub(name, details, namespace, manifest_dir, cache_dir, default_headers):
+    release = details.get("releaseName")
+    stub = {"name": name, "release": release, "headers": details.get("headers") or default_headers,
+            "revision": None, "paths": []}
+    try:
+        docs, stub["revision"] = stub_manifest_documents(release, namespace, manifest_dir, cache_dir)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"⚠️ Could not retrieve Helm manifest for release {release}: {getattr(e, 'stderr', None) or e}")
+        return stub
+    component = component_document(docs)
+    if component:
+        exposed = component.get("spec", {}).get("coreFunction", {}).get("exposedAPIs", []) or []
+        stub["paths"] = [api["path"] for api in exposed if isinstance(api.get("path"), str)]
+    return stub
+
+
+# Helm manifests of all the stub releases, fetched concurrently
+def resolve_stubs(stubs, namespace, manifest_dir, cache_dir, default_headers):
+    if not stubs:
+        return []
+    os.makedirs(manifest_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=len(stubs)) as executor:
+        futures = [executor.submit(_resolve_stub, name, details, namespace, manifest_dir, cache_dir, default_headers)
+                   for name, details in stubs.items()]
+        return [future.result() for future in futures]
+
+
+# Resolution document of a run, live_component may be None when the API server could not be read
+def build(live_component, exposed_urls, release, namespace, default_headers, stubs):
+    resolution = {
+        "version": RESOLUTION_VERSION,
+        "namespace": namespace,
+        "component": {"name": None, "release": release},
+        "exposedAPIs": {},
+        "dependentAPIs": [],
+        "stubs": stubs,
+        "paths": {}
+    }
+    if live_component:
+        resolution["component"]["name"] = live_component.get("metadata", {}).get("name")
+        spec_apis = live_component.get("spec", {}).get("coreFunction", {}).get("exposedAPIs", []) or []
+        for api in spec_apis:
+            api_id = api.get("id", "").upper()
+            if api_id not in exposed_urls:
+                continue
+            entry = {"url": exposed_urls[api_id], "path": api.get("path"), "release": release,
+                     "headers": default_headers}
+            resolution["exposedAPIs"][api_id] = entry
+            if entry["path"]:
+                resolution["paths"][entry["path"]] = {"kind": "exposed", "id": api_id,
+                                                      **{k: entry[k] for k in ("release", "url", "headers")}}
+        resolution["dependentAPIs"] = dependent_api_urls(live_component)
+
+    dependent_urls = [api["url"] for api in resolution["dependentAPIs"] if api["url"]]
+    for stub in stubs:
+        for api_path in stub["paths"]:
+            url = next((u for u in dependent_urls if api_path in u), None)
+            resolution["paths"].setdefault(api_path, {"kind": "stub", "stub": stub["name"],
+                                                      "release": stub["release"], "url": url,
+                                                      "headers": stub["headers"]})
+    return resolution
+
+
+def write(path, resolution):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(resolution, f, indent=2)
+    os.replace(tmp_path, path)
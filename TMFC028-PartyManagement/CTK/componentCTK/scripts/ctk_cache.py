@@ -0,0 +1,262 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import zipfile
+import threading
+from contextlib import contextmanager
+import ctk_extract
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Local cache of CTK zips shared by all component runs on the machine.
+#
+# Layout:
+#   <cache_dir>/manifest.json             url key -> size, sha256, extraction state, last use
+#   <cache_dir>/objects/<sha256>.zip      verified zips, content addressed
+#   <cache_dir>/extracted/<sha256>.v<N>/  CTK extracted from the zip (layout N, see ctk_extract.py)
+#   <cache_dir>/locks/<key>.lock          held while the zip of a URL is downloaded and extracted
+#
+# An entry only reaches the "extracted" state once the zip has been hashed,
+# tested and extracted completely, so interrupted runs are never reused.
+# Only one thread or process at a time downloads a given URL, the others wait for its lock and
+# then find the entry in the manifest.
+
+MANIFEST_FILE = "manifest.json"
+STATE_EXTRACTED = "extracted"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_lock = threading.Lock()
+_key_locks = {}
+
+
+# Default cache location shared across component checkouts
+def default_cache_dir():
+    return os.path.join(os.path.expanduser("~"), ".cache", "oda-component-ctk")
+
+
+# Key of a manifest entry for a given zip URL
+def cache_key(url):
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+# Compute the SHA-256 of a file without loading it in memory
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Total size in bytes of a directory tree
+def tree_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            try:
+                total += os.path.getsize(os.path.join(root, f))
+            except OSError:
+                pass
+    return total
+
+
+# Serialize manifest updates between threads and between processes sharing the cache
+@contextmanager
+def _manifest_lock(cache_dir):
+    with _lock:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(os.path.join(cache_dir, ".lock"), "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+# Serialize the download and extraction of one URL between threads and between processes
+@contextmanager
+def _key_lock(cache_dir, key):
+    with _lock:
+        thread_lock = _key_locks.setdefault(key, threading.Lock())
+    with thread_lock:
+        locks_dir = os.path.join(cache_dir, "locks")
+        os.makedirs(locks_dir, exist_ok=True)
+        with open(os.path.join(locks_dir, f"{key}.lock"), "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _read_manifest(cache_dir):
+    path = os.path.join(cache_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {"entries": {}}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Ignoring unreadable CTK cache manifest {path}. Error: {e}")
+        return {"entries": {}}
+
+
+def _write_manifest(cache_dir, manifest):
+    path = os.path.join(cache_dir, MANIFEST_FILE)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# Return the manifest entry of a URL (or None) without touching the network
+def lookup(cache_dir, url):
+    with _manifest_lock(cache_dir):
+        return _read_manifest(cache_dir)["entries"].get(cache_key(url))
+
+
+# Check that a file is a readable zip whose members all pass their CRC check
+def verify_zip(zip_path, expected_sha256=None):
+    if expected_sha256 and sha256_file(zip_path) != expected_sha256:
+        return False
+    if not zipfile.is_zipfile(zip_path):
+        return False
+    with zipfile.ZipFile(zip_path, "r") as zip_ref:
+        return zip_ref.testzip() is None
+
+
+def _is_usable(cache_dir, entry):
+    if not entry or entry.get("state") != STATE_EXTRACTED or entry.get("layout") != ctk_extract.LAYOUT_VERSION:
+        return False
+    zip_path = os.path.join(cache_dir, entry["zip"])
+    extracted_path = os.path.join(cache_dir, entry["extracted"])
+    return (os.path.isfile(zip_path) and os.path.getsize(zip_path) == entry["size"]
+            and os.path.isdir(extracted_path))
+
+
+# Get the extracted CTK tree for a zip URL, downloading and extracting it only on a cache miss.
+# download_fn(url, destination) must write the zip to destination.
+def fetch(cache_dir, url, download_fn, max_size_bytes=None):
+    key = cache_key(url)
+    extracted_path, entry = _use_cached(cache_dir, key, url)
+    if extracted_path:
+        return extracted_path, entry
+    with _key_lock(cache_dir, key):
+        # Another run may have stored the entry while this one waited for the lock
+        extracted_path, entry = _use_cached(cache_dir, key, url)
+        if extracted_path:
+            return extracted_path, entry
+        return _download_and_extract(cache_dir, key, url, entry, download_fn, max_size_bytes)
+
+
+# Extracted tree and entry of a usable manifest entry (marked as used), (None, entry) otherwise
+def _use_cached(cache_dir, key, url):
+    with _manifest_lock(cache_dir):
+        manifest = _read_manifest(cache_dir)
+        entry = manifest["entries"].get(key)
+        if _is_usable(cache_dir, entry):
+            entry["lastUsed"] = time.time()
+            _write_manifest(cache_dir, manifest)
+            print(f"CTK cache hit for {url}")
+            return os.path.join(cache_dir, entry["extracted"]), entry
+    return None, entry
+
+
+# Cache miss of fetch(), called with the lock of the key held
+def _download_and_extract(cache_dir, key, url, entry, download_fn, max_size_bytes):
+    objects_dir = os.path.join(cache_dir, "objects")
+    extracted_root = os.path.join(cache_dir, "extracted")
+    os.makedirs(objects_dir, exist_ok=True)
+    os.makedirs(extracted_root, exist_ok=True)
+
+    # A previous run may have downloaded the zip but not finished extracting it
+    zip_path = None
+    if entry and os.path.isfile(os.path.join(cache_dir, entry["zip"])):
+        candidate = os.path.join(cache_dir, entry["zip"])
+        if verify_zip(candidate, entry["sha256"]):
+            zip_path = candidate
+            sha256 = entry["sha256"]
+        else:
+            print(f"⚠️ Cached zip for {url} failed verification, downloading it again")
+            os.remove(candidate)
+
+    if not zip_path:
+        print(f"CTK cache miss for {url}")
+        # Under the key lock a stable name lets download_fn resume a download interrupted in a previous run.
+        # Without file locks (Windows) other processes may download the same URL, each uses its own file.
+        if fcntl:
+            tmp_zip = os.path.join(objects_dir, f".{key}.zip")
+        else:
+            tmp_zip = os.path.join(objects_dir, f".{key}.{os.getpid()}.zip")
+        download_fn(url, tmp_zip)
+        if not os.path.isfile(tmp_zip):
+            raise RuntimeError(f"Download of {url} did not produce a file")
+        sha256 = sha256_file(tmp_zip)
+        if not verify_zip(tmp_zip):
+            os.remove(tmp_zip)
+            raise RuntimeError(f"Downloaded CTK from {url} is not a valid zip archive")
+        zip_path = os.path.join(objects_dir, f"{sha256}.zip")
+        os.replace(tmp_zip, zip_path)
+
+    # Trees extracted with an older layout are not used anymore
+    if entry and entry.get("layout") != ctk_extract.LAYOUT_VERSION:
+        shutil.rmtree(os.path.join(cache_dir, entry["extracted"]), ignore_errors=True)
+
+    extracted_path = os.path.join(extracted_root, f"{sha256}.v{ctk_extract.LAYOUT_VERSION}")
+    if not os.path.isdir(extracted_path):
+        # An existing tree is the same content extracted concurrently by another run
+        ctk_extract.extract_ctk(zip_path, extracted_path, replace=False)
+
+    entry = {
+        "url": url,
+        "zip": os.path.relpath(zip_path, cache_dir),
+        "extracted": os.path.relpath(extracted_path, cache_dir),
+        "size": os.path.getsize(zip_path),
+        "extractedSize": tree_size(extracted_path),
+        "sha256": sha256,
+        "layout": ctk_extract.LAYOUT_VERSION,
+        "state": STATE_EXTRACTED,
+        "lastUsed": time.time()
+    }
+    with _manifest_lock(cache_dir):
+        manifest = _read_manifest(cache_dir)
+        manifest["entries"][key] = entry
+        if max_size_bytes:
+            _evict(cache_dir, manifest, max_size_bytes, keep=key)
+        _write_manifest(cache_dir, manifest)
+
+    return extracted_path, entry
+
+
+# Drop least recently used entries until the cache fits in max_size_bytes
+def _evict(cache_dir, manifest, max_size_bytes, keep=None):
+    entries = manifest["entries"]
+
+    def entry_size(e):
+        return e.get("size", 0) + e.get("extractedSize", 0)
+
+    total = sum(entry_size(e) for e in entries.values())
+    for key, entry in sorted(entries.items(), key=lambda item: item[1].get("lastUsed", 0)):
+        if total <= max_size_bytes:
+            break
+        if key == keep:
+            continue
+        # Content addressed files can be shared by several URLs
+        shared = any(k != key and e.get("sha256") == entry.get("sha256") for k, e in entries.items())
+        if not shared:
+            zip_path = os.path.join(cache_dir, entry["zip"])
+            if os.path.exists(zip_path):
+                os.remove(zip_path)
+            shutil.rmtree(os.path.join(cache_dir, entry["extracted"]), ignore_errors=True)
+        del entries[key]
+        total -= entry_size(entry)
+        print(f"Evicted {entry['url']} from CTK cache")
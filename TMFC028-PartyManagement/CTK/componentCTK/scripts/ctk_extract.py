@@ -0,0 +1,149 @@
+import os
+import re
+import stat
+import shutil
+import zipfile
+import threading
+
+import stage_profile
+
+# Selective extraction of a CTK zip straight into the layout the executor runs:
+#   <dest>/config.json
+#   <dest>/Mac-Linux-RUNCTK.sh, <dest>/Windows-Bat-RUNCTK.bat
+#   <dest>/ctk/...
+# The published zips wrap these in a CTK/ folder (sometimes CTK/CTK/, sometimes a folder named
+# after the API) next to conformance documents and a reference implementation (RI/) that are
+# never used; only the members above are read. Every member name is validated before anything
+# is written, and the tree is built in a temporary sibling folder renamed into place at the
+# end, so interrupted or concurrent runs never see a partial CTK.
+
+# Bumped when the extracted layout changes, cached trees of another layout are extracted again
+LAYOUT_VERSION = 2
+CONFIG_FILE = "config.json"
+CTK_DIR = "ctk"
+RUN_SCRIPT_SUFFIXES = (".sh", ".bat")
+# Folders of the zips that never hold the CTK itself
+SKIPPED_DIRS = {"RI", "__MACOSX"}
+COPY_CHUNK_SIZE = 1024 * 1024
+
+_DRIVE = re.compile(r"^[A-Za-z]:")
+
+
+class UnsafeArchiveError(ValueError):
+    pass
+
+
+# Member name split in its path parts, raises UnsafeArchiveError when it could escape the destination
+def member_parts(name):
+    normalized = name.replace("\\", "/")
+    if "\x00" in normalized or normalized.startswith("/") or _DRIVE.match(normalized):
+        raise UnsafeArchiveError(f"Absolute path in archive: {name!r}")
+    parts = [part for part in normalized.split("/") if part not in ("", ".")]
+    if ".." in parts:
+        raise UnsafeArchiveError(f"Parent directory reference in archive: {name!r}")
+    return parts
+
+
+# Folder (as path parts) of the zip that holds config.json and ctk/
+def find_ctk_root(members):
+    roots = set()
+    with_ctk = set()
+    for parts in members:
+        if SKIPPED_DIRS.intersection(parts[:-1]):
+            continue
+        if parts[-1] == CONFIG_FILE:
+            roots.add(tuple(parts[:-1]))
+        elif CTK_DIR in parts[:-1]:
+            with_ctk.add(tuple(parts[:parts.index(CTK_DIR)]))
+    candidates = (roots & with_ctk) or roots
+    if not candidates:
+        raise ValueError(f"No {CONFIG_FILE} found in the CTK archive")
+    root = min(candidates, key=len)
+    # A nested CTK/ folder with its own config.json replaces its parent
+    while root + ("CTK",) in candidates:
+        root = root + ("CTK",)
+    return root
+
+
+# Destination relative path of a member, None when the member is not needed
+def selected_path(parts, root):
+    if tuple(parts[:len(root)]) != root or len(parts) == len(root):
+        return None
+    relative = parts[len(root):]
+    if relative[0] == CTK_DIR and len(relative) > 1:
+        return relative
+    if len(relative) == 1 and (relative[0] == CONFIG_FILE or relative[0].endswith(RUN_SCRIPT_SUFFIXES)):
+        return relative
+    return None
+
+
+def _temporary_sibling(path, tag):
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.{tag}"
+
+
+# Move a complete tree to dest. With replace, an existing dest is swapped out and removed,
+# otherwise an existing dest (the same content written by a concurrent run) is kept.
+def move_into_place(tmp_path, dest, replace=True):
+    old_path = None
+    if os.path.exists(dest):
+        if not replace:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return dest
+        old_path = _temporary_sibling(dest, "old")
+        os.rename(dest, old_path)
+    try:
+        os.rename(tmp_path, dest)
+    except OSError:
+        if not os.path.exists(dest):
+            raise
+        # Concurrent run installed it first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    if old_path:
+        shutil.rmtree(old_path, ignore_errors=True)
+    return dest
+
+
+# Extract the CTK of zip_path into dest in one pass, returns the number of bytes written
+def extract_ctk(zip_path, dest, replace=True):
+    tmp_path = _temporary_sibling(dest, "part")
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    written = 0
+    with stage_profile.stage("unzip", zip=os.path.basename(zip_path)), zipfile.ZipFile(zip_path, "r") as zip_ref:
+        infos = [(info, member_parts(info.filename)) for info in zip_ref.infolist()]
+        infos = [(info, parts) for info, parts in infos if parts]
+        root = find_ctk_root([parts for info, parts in infos if not info.is_dir()])
+        try:
+            os.makedirs(tmp_path)
+            for info, parts in infos:
+                relative = None if info.is_dir() else selected_path(parts, root)
+                if not relative:
+                    continue
+                target = os.path.join(tmp_path, *relative)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                # Reading through ZipExtFile checks the CRC of every member
+                with zip_ref.open(info) as source, open(target, "wb") as out:
+                    shutil.copyfileobj(source, out, COPY_CHUNK_SIZE)
+                if (info.external_attr >> 16) & stat.S_IXUSR or target.endswith(".sh"):
+                    os.chmod(target, 0o755)
+                written += info.file_size
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        stage_profile.add_extracted(written)
+    move_into_place(tmp_path, dest, replace)
+    print(f"CTK extracted to: {dest} ({written} bytes, {len(infos)} member(s) in archive)")
+    return written
+
+
+# Copy an extracted CTK tree to dest, swapping it in once complete
+def install_tree(source, dest):
+    tmp_path = _temporary_sibling(dest, "part")
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    try:
+        shutil.copytree(source, tmp_path)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    return move_into_place(tmp_path, dest)
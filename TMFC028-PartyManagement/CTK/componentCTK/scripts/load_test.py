@@ -0,0 +1,278 @@
+import json
+import time
+import random
+import threading
+import subprocess
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+# Load and soak testing of the exposed APIs of the deployed component.
+#
+# The API URLs are resolved like kubernetes.js does: the Component custom resource of the
+# release is read from the cluster and every exposed API of spec.coreFunction is matched to
+# its entry in status.coreAPIs. Traffic is generated from the ctkconfig payloads:
+#   payloads.<CTK name>.<Resource>.POST.payload
+# POST creates resources, GET reads them (one by id, or the collection) and PATCH updates
+# them, in the proportions of the configured mix. Latencies are kept per API and method.
+#
+# PATCH only sends one mutable field: payloads.<CTK name>.<Resource>.PATCH.payload when it is
+# configured, otherwise the description or name of the POST payload. The resources created by
+# the run are deleted when it ends, unless cleanup is false.
+
+TMFORUM_ODA_API_GROUP = "oda.tmforum.org"
+PATCH_CONTENT_TYPE = "application/merge-patch+json"
+
+DEFAULT_SETTINGS = {
+    "concurrency": 10,
+    "ratePerSecond": 0,
+    "durationSeconds": 60,
+    "timeoutSeconds": 10,
+    "cleanup": True,
+    "mix": {"POST": 1, "GET": 3, "PATCH": 1}
+}
+# Fields of a POST payload that TMF APIs let a merge-patch change, the first one found is patched
+PATCHABLE_FIELDS = ("description", "name")
+
+
+# Read the Component custom resource of the release from the cluster
+def get_live_component(component_name, api_version, namespace):
+    result = subprocess.run(
+        ["kubectl", "get", f"components.{api_version}.{TMFORUM_ODA_API_GROUP}", component_name,
+         "-n", namespace, "-o", "json"],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return json.loads(result.stdout)
+
+
+# Map of exposed API id -> base URL, from the spec and status of a live Component
+def exposed_api_urls(live_component):
+    spec_apis = live_component.get("spec", {}).get("coreFunction", {}).get("exposedAPIs", []) or []
+    status_apis = live_component.get("status", {}).get("coreAPIs", []) or []
+    urls = {}
+    for api in spec_apis:
+        match = next((s for s in status_apis if s.get("path") == api.get("path")
+                      or s.get("implementation") == api.get("implementation")), None)
+        if match and match.get("url"):
+            urls[api["id"].upper()] = match["url"].rstrip("/")
+    return urls
+
+
+# Resource collection path of a TMF resource name (PartyRole -> partyRole)
+def resource_path(resource):
+    return resource[:1].lower() + resource[1:]
+
+
+# Merge-patch body of a resource: the configured PATCH payload, or one mutable field of the POST
+# payload. None when there is nothing safe to patch.
+def patch_payload(methods, payload):
+    configured = (methods.get("PATCH") or {}).get("payload")
+    if configured is not None:
+        return configured
+    field = next((f for f in PATCHABLE_FIELDS if isinstance(payload.get(f), str)), None)
+    return {field: f"{payload[field]} (load test)"} if field else None
+
+
+# List the (api id, CTK name, resource, collection URL, POST and PATCH payloads) targets of the load test
+def build_targets(api_urls, payloads, ctk_name_mapping, apis=None):
+    targets = []
+    for api_id, base_url in api_urls.items():
+        if apis and api_id not in [a.upper() for a in apis]:
+            continue
+        ctk_name = ctk_name_mapping.get(api_id, api_id)
+        for resource, methods in (payloads.get(ctk_name) or {}).items():
+            payload = (methods.get("POST") or {}).get("payload")
+            if payload is None:
+                continue
+            targets.append({
+                "api": api_id,
+                "ctkName": ctk_name,
+                "resource": resource,
+                "url": f"{base_url}/{resource_path(resource)}",
+                "payload": payload,
+                "patch": patch_payload(methods, payload) if isinstance(payload, dict) else None
+            })
+    return targets
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return round(sorted_values[index] * 1000, 2)
+
+
+class _Stats:
+    def __init__(self):
+        self.latencies = array("d")
+        self.requests = 0
+        self.errors = 0
+        self.status_codes = {}
+
+    def summary(self, duration):
+        values = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "errorRate": round(self.errors / self.requests, 4) if self.requests else 0,
+            "rps": round(self.requests / duration, 2) if duration else 0,
+            "p50": _percentile(values, 0.50),
+            "p95": _percentile(values, 0.95),
+            "p99": _percentile(values, 0.99),
+            "max": round(values[-1] * 1000, 2) if values else None,
+            "statusCodes": self.status_codes
+        }
+
+
+# Delete the resources a load run created, returns the number deleted and the number that could not be
+def delete_created(targets, created, headers, timeout, verify=True, workers=10):
+    import requests
+    jobs = [(targets[index]["url"], resource_id) for index, ids in created.items() for resource_id in ids]
+    sessions = threading.local()
+
+    def delete(job):
+        if not hasattr(sessions, "session"):
+            sessions.session = requests.Session()
+            sessions.session.headers.update(headers or {})
+        url, resource_id = job
+        try:
+            status = sessions.session.delete(f"{url}/{resource_id}", timeout=timeout, verify=verify).status_code
+        except requests.RequestException:
+            return False
+        # Already gone is as good as deleted
+        return status < 300 or status == 404
+
+    if not jobs:
+        return {"deleted": 0, "failed": 0}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        deleted = sum(executor.map(delete, jobs))
+    return {"deleted": deleted, "failed": len(jobs) - deleted}
+
+
+# Generate traffic against the targets and return the latency/throughput report
+def run_load(targets, headers, settings, verify=True):
+    import requests
+    import urllib3
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    concurrency = max(1, int(settings["concurrency"]))
+    rate = float(settings["ratePerSecond"] or 0)
+    duration = float(settings["durationSeconds"])
+    timeout = float(settings["timeoutSeconds"])
+    mix = [(method, weight) for method, weight in settings["mix"].items() if weight > 0]
+    methods = [method for method, _ in mix]
+    weights = [weight for _, weight in mix]
+
+    if not verify:
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+    lock = threading.Lock()
+    stats = {}
+    created = {i: [] for i in range(len(targets))}
+    next_slot = [time.monotonic()]
+    deadline = time.monotonic() + duration
+
+    def record(key, elapsed, status):
+        with lock:
+            s = stats.setdefault(key, _Stats())
+            s.requests += 1
+            s.latencies.append(elapsed)
+            s.status_codes[str(status)] = s.status_codes.get(str(status), 0) + 1
+            if status == "error" or status >= 400:
+                s.errors += 1
+
+    # Fixed schedule shared by all workers when a rate is set
+    def wait_for_slot():
+        if not rate:
+            return
+        with lock:
+            slot = max(next_slot[0], time.monotonic())
+            next_slot[0] = slot + 1.0 / rate
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def worker():
+        session = requests.Session()
+        session.headers.update(headers or {})
+        while True:
+            wait_for_slot()
+            if time.monotonic() >= deadline:
+                return
+            index = random.randrange(len(targets))
+            target = targets[index]
+            method = random.choices(methods, weights)[0]
+            with lock:
+                ids = created[index]
+                resource_id = random.choice(ids) if ids else None
+            if method == "PATCH" and not resource_id:
+                method = "POST"
+            elif method == "PATCH" and target["patch"] is None:
+                method = "GET"
+
+            url = target["url"]
+            kwargs = {"timeout": timeout, "verify": verify}
+            if method == "POST":
+                kwargs["json"] = target["payload"]
+            elif method == "PATCH":
+                url = f"{url}/{resource_id}"
+                kwargs["data"] = json.dumps(target["patch"])
+                kwargs["headers"] = {"Content-Type": PATCH_CONTENT_TYPE}
+            elif resource_id:
+                url = f"{url}/{resource_id}"
+
+            start = time.perf_counter()
+            try:
+                response = session.request(method, url, **kwargs)
+                status = response.status_code
+                if method == "POST" and status < 300:
+                    new_id = response.json().get("id")
+                    if new_id:
+                        with lock:
+                            created[index].append(new_id)
+            except (requests.RequestException, ValueError):
+                status = "error"
+            record((index, method), time.perf_counter() - start, status)
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    cleanup = None
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+    finally:
+        if settings["cleanup"]:
+            with lock:
+                created_ids = {index: list(ids) for index, ids in created.items()}
+            cleanup = delete_created(targets, created_ids, headers, timeout, verify, concurrency)
+            if cleanup["failed"]:
+                print(f"⚠️ Load test: {cleanup['failed']} created resource(s) could not be deleted")
+
+    results = []
+    total = _Stats()
+    for (index, method), s in sorted(stats.items()):
+        target = targets[index]
+        results.append({
+            "api": target["api"],
+            "ctkName": target["ctkName"],
+            "resource": target["resource"],
+            "method": method,
+            "url": target["url"],
+            **s.summary(elapsed)
+        })
+        total.requests += s.requests
+        total.errors += s.errors
+        total.latencies.extend(s.latencies)
+        for code, count in s.status_codes.items():
+            total.status_codes[code] = total.status_codes.get(code, 0) + count
+
+    return {
+        "settings": settings,
+        "durationSeconds": round(elapsed, 2),
+        "total": total.summary(elapsed),
+        "results": results,
+        "cleanup": cleanup
+    }
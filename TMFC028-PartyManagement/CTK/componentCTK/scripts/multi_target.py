@@ -0,0 +1,155 @@
+import os
+import sys
+import json
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Run the CTK for several (component, release, namespace) targets in one invocation.
+#
+# Every target gets its own workspace, a copy of componentCTK without results, reports
+# and node_modules:
+#   <workspace_dir>/<component>-<release>/componentCTK/
+# The executor runs there as a separate process with a CHANGE_ME.json generated for the
+# target, so targets never share results, ctkconfig.json or payload folders. The CTK cache
+# and the node_modules cache are shared between the targets: the CTK cache downloads and
+# extracts each zip under a per URL file lock, and node_modules cache entries are only
+# published once complete (see ctk_cache.py and node_cache.py).
+# Workspaces are kept between invocations (incremental results, installed CTKs) and the
+# report of each target is copied to Reports/<component>-<release>/.
+
+WORKSPACE_IGNORE = {"Reports", "node_modules", "workspaces", "benchmarks"}
+RESOURCES_KEPT = {"standard-components"}
+LOG_FILE = "ctk-run.log"
+
+
+# Parse a "COMPONENT:RELEASE[:NAMESPACE]" command line target
+def parse_target(value, default_namespace):
+    parts = value.split(":")
+    if len(parts) not in (2, 3) or not all(parts):
+        raise ValueError(f"Invalid target '{value}', expected COMPONENT:RELEASE[:NAMESPACE]")
+    return {
+        "component": parts[0],
+        "release": parts[1],
+        "namespace": parts[2] if len(parts) == 3 else default_namespace
+    }
+
+
+def target_name(target):
+    return f"{target['component'].upper()}-{target['release']}"
+
+
+# Copy the componentCTK sources into the workspace, keeping its previous resources
+def sync_workspace(source_dir, workspace_dir):
+    def ignore(directory, names):
+        ignored = {name for name in names if name in WORKSPACE_IGNORE}
+        if os.path.basename(directory) == "resources" and os.path.dirname(directory) == source_dir:
+            ignored |= {name for name in names if name not in RESOURCES_KEPT}
+        return ignored
+
+    shutil.copytree(source_dir, workspace_dir, ignore=ignore, dirs_exist_ok=True)
+
+
+# CHANGE_ME.json of a target: the base configuration with the target settings, shared caches
+# and paths made absolute so that they still point to the same place from the workspace
+def target_config(base_config, target, scripts_dir):
+    def absolute(path):
+        return os.path.abspath(os.path.join(scripts_dir, path)) if path else path
+
+    config = json.loads(json.dumps(base_config))
+    config.pop("multiTarget", None)
+    config["component_to_run"] = target["component"]
+    config["releaseName"] = target["release"]
+    config["component_namespace"] = target["namespace"]
+    # reportGeneratorSrc must stay relative to the workspace scripts folder
+    config["reportGeneratorSrc"] = ""
+    config["standardComponentPath"] = absolute(config.get("standardComponentPath"))
+    config["offlineBundle"] = absolute(config.get("offlineBundle"))
+    for block in ("ctkCache", "nodeModulesCache"):
+        settings = config.setdefault(block, {})
+        settings["cacheDir"] = absolute(settings.get("cacheDir"))
+    # Keep the node_modules cache next to the shared CTK cache, as in single target runs
+    if not config["nodeModulesCache"]["cacheDir"] and config["ctkCache"]["cacheDir"]:
+        config["nodeModulesCache"]["cacheDir"] = os.path.join(config["ctkCache"]["cacheDir"], "node-modules")
+    # All targets write to the run history of the source componentCTK
+    history = config.setdefault("runHistory", {})
+    history["dbPath"] = absolute(history.get("dbPath")) or os.path.join(os.path.dirname(scripts_dir), "Reports",
+                                                                        "runHistory.db")
+    # ... and to the report archive of the source componentCTK, so identical files are stored once
+    archive = config.setdefault("reportArchive", {})
+    archive["dir"] = absolute(archive.get("dir")) or os.path.join(os.path.dirname(scripts_dir), "Reports", "archive")
+    for key, value in target.get("overrides", {}).items():
+        config[key] = value
+    return config
+
+
+# Prepare the workspace of a target and run the executor in it, returning its exit code
+def run_target(target, base_config, source_dir, workspace_root, run_args):
+    name = target_name(target)
+    workspace_dir = os.path.join(workspace_root, name, "componentCTK")
+    scripts_dir = os.path.join(source_dir, "scripts")
+    sync_workspace(source_dir, workspace_dir)
+
+    with open(os.path.join(workspace_dir, "CHANGE_ME.json"), "w", encoding="utf-8") as f:
+        json.dump(target_config(base_config, target, scripts_dir), f, indent=4)
+
+    log_path = os.path.join(workspace_dir, LOG_FILE)
+    print(f"[{name}] Running CTK in {workspace_dir} (log: {log_path})")
+    with open(log_path, "w", encoding="utf-8") as log:
+        result = subprocess.run([sys.executable, "CTK_Executor.py", "run"] + run_args,
+                                cwd=os.path.join(workspace_dir, "scripts"),
+                                stdout=log, stderr=subprocess.STDOUT)
+    return result.returncode
+
+
+# Copy the reports of a target workspace to Reports/<component>-<release>/
+def publish_reports(target, workspace_root, reports_dir):
+    name = target_name(target)
+    workspace_reports = os.path.join(workspace_root, name, "componentCTK", "Reports")
+    if not os.path.isdir(workspace_reports):
+        return None
+    destination = os.path.join(reports_dir, name)
+    if os.path.exists(destination):
+        shutil.rmtree(destination)
+    folders = os.listdir(workspace_reports)
+    if len(folders) == 1:
+        shutil.copytree(os.path.join(workspace_reports, folders[0]), destination)
+    else:
+        shutil.copytree(workspace_reports, destination)
+    return destination
+
+
+# Run every target with at most `workers` targets at the same time.
+# Returns {target name: exit code}.
+def run_targets(targets, base_config, source_dir, workspace_root, workers, run_args=None):
+    source_dir = os.path.abspath(source_dir)
+    workspace_root = os.path.abspath(workspace_root)
+    reports_dir = os.path.join(source_dir, "Reports")
+    run_args = run_args or []
+
+    names = [target_name(t) for t in targets]
+    duplicates = {n for n in names if names.count(n) > 1}
+    if duplicates:
+        raise ValueError(f"Targets listed more than once: {', '.join(sorted(duplicates))}")
+
+    os.makedirs(workspace_root, exist_ok=True)
+    os.makedirs(reports_dir, exist_ok=True)
+    print(f"Running {len(targets)} target(s) with {workers} worker(s)")
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(run_target, t, base_config, source_dir, workspace_root, run_args): t
+                   for t in targets}
+        for future in as_completed(futures):
+            target = futures[future]
+            name = target_name(target)
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                print(f"[{name}] Failed to run. Error: {e}")
+                results[name] = 1
+                continue
+            report = publish_reports(target, workspace_root, reports_dir)
+            status = "✅ completed" if results[name] == 0 else f"⚠️ exited with code {results[name]}"
+            print(f"[{name}] {status}" + (f", report in {report}" if report else ", no report produced"))
+    return results
@@ -0,0 +1,127 @@
+import os
+import shutil
+import hashlib
+import platform
+import threading
+import subprocess
+import stage_profile
+
+# Cache of installed node_modules folders keyed by the hash of package-lock.json.
+#
+# Layout:
+#   <cache_dir>/<key>/node_modules/     installed packages, complete once renamed into place
+#
+# A project whose node_modules carries a marker with the current key is left alone.
+# Otherwise node_modules is restored from the cache with hardlinks (falling back to
+# a copy across filesystems), and npm install only runs when the key is not cached.
+
+MARKER_FILE = ".ctk-lock-hash"
+
+_node_version = None
+_node_version_lock = threading.Lock()
+
+
+# Node version is part of the key since native modules are built for it
+def node_version():
+    global _node_version
+    with _node_version_lock:
+        if _node_version is None:
+            try:
+                result = subprocess.run(["node", "--version"], capture_output=True, text=True, check=True)
+                _node_version = result.stdout.strip()
+            except (OSError, subprocess.CalledProcessError):
+                _node_version = "unknown"
+    return _node_version
+
+
+# Key of a project: hash of its package-lock.json, node version and platform (None without a lockfile)
+def lock_key(project_dir):
+    lock_path = os.path.join(project_dir, "package-lock.json")
+    if not os.path.isfile(lock_path):
+        return None
+    digest = hashlib.sha256()
+    with open(lock_path, "rb") as f:
+        digest.update(f.read())
+    digest.update(f"{node_version()}|{platform.system()}|{platform.machine()}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _read_marker(node_modules):
+    marker = os.path.join(node_modules, MARKER_FILE)
+    if not os.path.isfile(marker):
+        return None
+    with open(marker, "r", encoding="utf-8") as f:
+        return f.read().strip()
+
+
+# The marker may be a hardlink into a cache entry, it is replaced by a new file rather than rewritten
+def _write_marker(node_modules, key):
+    marker = os.path.join(node_modules, MARKER_FILE)
+    tmp_marker = f"{marker}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_marker, "w", encoding="utf-8") as f:
+        f.write(key)
+    os.replace(tmp_marker, marker)
+
+
+# Hardlink a file, or copy it when hardlinks are not possible (other filesystem, Windows shares, ...)
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+# Mirror a tree with hardlinks, keeping symlinks (node_modules/.bin) as symlinks
+def link_tree(src, dst):
+    shutil.copytree(src, dst, symlinks=True, copy_function=_link_or_copy)
+
+
+def _publish(tree, destination):
+    tmp = f"{destination}.{os.getpid()}.{threading.get_ident()}.part"
+    if os.path.exists(tmp):
+        shutil.rmtree(tmp)
+    link_tree(tree, tmp)
+    try:
+        os.rename(tmp, destination)
+    except OSError:
+        # Another worker published the same key first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+# Make sure project_dir/node_modules matches its package-lock.json, installing only on a cache miss.
+# Returns True when npm install had to run.
+def ensure_node_modules(project_dir, cache_dir, install_command="npm install"):
+    node_modules = os.path.join(project_dir, "node_modules")
+    key = lock_key(project_dir)
+
+    if key and _read_marker(node_modules) == key:
+        print(f"node_modules up to date in: {project_dir}")
+        return False
+
+    cached = os.path.join(cache_dir, key, "node_modules") if key else None
+    if cached and os.path.isdir(cached):
+        if os.path.exists(node_modules):
+            shutil.rmtree(node_modules)
+        link_tree(cached, node_modules)
+        print(f"Restored node_modules from cache in: {project_dir}")
+        return False
+
+    # A node_modules with a marker was restored from or published to the cache and holds hardlinks into a
+    # cache entry of another key, npm must not write through them
+    if _read_marker(node_modules) is not None:
+        shutil.rmtree(node_modules)
+    print(f"Installing node modules in: {project_dir}")
+    with stage_profile.stage("npm install", project=project_dir):
+        result = subprocess.run(install_command, cwd=project_dir, shell=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"'{install_command}' failed in {project_dir}")
+
+    # npm install may rewrite the lockfile, key the cache on the installed state
+    key = lock_key(project_dir)
+    if key and os.path.isdir(node_modules):
+        _write_marker(node_modules, key)
+        os.makedirs(os.path.join(cache_dir, key), exist_ok=True)
+        destination = os.path.join(cache_dir, key, "node_modules")
+        if not os.path.isdir(destination):
+            _publish(node_modules, destination)
+    return True
@@ -0,0 +1,140 @@
+import time
+import random
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+# Readiness polling with exponential backoff, jitter and a total deadline.
+#
+# The same engine (and the same CHANGE_ME.json readinessSettings) is used by the BDD steps in
+# src/features/utils/readiness.js. A poll stops as soon as the check succeeds, and fails right
+# away on errors that waiting cannot fix (401/403, kubectl missing or denied, unresolvable hosts).
+#
+# requests is imported by the functions that send requests, so that reading the settings stays cheap.
+
+# Statuses worth waiting for: the API is starting, overloaded or behind a gateway that is not ready yet
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# Statuses that will not change by waiting (wrong credentials, forbidden)
+NON_RETRYABLE_STATUSES = {401, 403}
+# kubectl errors that will not change by waiting: RBAC, missing Component resource or CRD, bad credentials
+NON_RETRYABLE_KUBECTL_ERRORS = ("(Forbidden)", "(NotFound)", "(Unauthorized)", "doesn't have a resource type")
+
+
+class NotReadyError(Exception):
+    pass
+
+
+class NonRetryableError(NotReadyError):
+    pass
+
+
+# Poll settings from CHANGE_ME.json. The deadline falls back to the deprecated retrySettings
+# (maxRetries x retryInterval), so that configurations written for them keep their deadline.
+def readiness_settings(config):
+    settings = config.get("readinessSettings", {})
+    legacy = config.get("retrySettings", {})
+    legacy_deadline = legacy.get("maxRetries", 0) * legacy.get("retryInterval", 0) or None
+    if "retrySettings" in config:
+        replacement = "it is ignored" if "deadlineMs" in settings else \
+            f"its deadline of {legacy_deadline} ms is used as readinessSettings.deadlineMs"
+        print(f"⚠️ retrySettings in CHANGE_ME.json is deprecated, {replacement}. "
+              f"Move it to readinessSettings (see the README).")
+    return {
+        "initialDelayMs": settings.get("initialDelayMs", 200),
+        "maxDelayMs": settings.get("maxDelayMs", 5000),
+        "factor": settings.get("factor", 2),
+        "jitter": settings.get("jitter", 0.2),
+        "deadlineMs": settings.get("deadlineMs", legacy_deadline or 120000)
+    }
+
+
+# Call check until it returns a truthy value, sleeping with backoff and jitter between attempts.
+# Raises NotReadyError at the deadline, NonRetryableError as soon as check raises it.
+def poll_until(check, description, settings):
+    start = time.monotonic()
+    deadline = start + settings["deadlineMs"] / 1000
+    delay = settings["initialDelayMs"] / 1000
+    attempt = 0
+    last_error = None
+    while True:
+        attempt += 1
+        try:
+            result = check()
+            if result:
+                print(f"✅ {description} ready after {attempt} attempt(s) in {time.monotonic() - start:.2f}s")
+                return result
+        except NonRetryableError:
+            raise
+        except Exception as e:
+            last_error = e
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            reason = f": {last_error}" if last_error else ""
+            raise NotReadyError(f"{description} not ready after {attempt} attempt(s) "
+                                f"in {settings['deadlineMs'] / 1000:.0f}s{reason}")
+        jitter = settings["jitter"]
+        time.sleep(min(delay * (1 + jitter * random.uniform(-1, 1)), remaining))
+        delay = min(delay * settings["factor"], settings["maxDelayMs"] / 1000)
+
+
+# Call a kubectl command (a function running it with check=True), raising NonRetryableError when kubectl
+# is missing or fails in a way that waiting cannot fix
+def run_kubectl(command, *args):
+    try:
+        return command(*args)
+    except FileNotFoundError as e:
+        raise NonRetryableError(f"kubectl is not installed or not on the PATH: {e}")
+    except subprocess.CalledProcessError as e:
+        stderr = (e.stderr or "").strip()
+        if any(marker in stderr for marker in NON_RETRYABLE_KUBECTL_ERRORS):
+            raise NonRetryableError(f"kubectl failed: {stderr}")
+        raise
+
+
+def _is_unresolvable(error):
+    import urllib3
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, getattr(urllib3.exceptions, "NameResolutionError", ())) or "Failed to resolve" in str(error)
+
+
+# Wait until an API base URL answers with a status that shows it is up
+def wait_for_api(url, headers, settings, verify=True, session=None):
+    import requests
+    session = session or requests.Session()
+
+    def check():
+        try:
+            response = session.get(url, headers=headers, verify=verify, timeout=5)
+        except (requests.exceptions.InvalidURL, requests.exceptions.MissingSchema,
+                requests.exceptions.InvalidSchema) as e:
+            raise NonRetryableError(f"{url} is not a valid URL: {e}")
+        except requests.ConnectionError as e:
+            # A host name that does not resolve is a wrong Component URL, not an API still starting
+            if _is_unresolvable(e):
+                raise NonRetryableError(f"{url} host name does not resolve, check the Component status URLs")
+            raise
+        if response.status_code in NON_RETRYABLE_STATUSES:
+            raise NonRetryableError(f"{url} answered {response.status_code}, check the configured headers")
+        if response.status_code in RETRYABLE_STATUSES:
+            raise NotReadyError(f"{url} answered {response.status_code}")
+        return True
+
+    return poll_until(check, f"API {url}", settings)
+
+
+# Wait for all the URLs concurrently, returns {url: error message} of the ones that are not ready
+def wait_for_apis(urls, headers, settings, verify=True):
+    import urllib3
+    if not verify:
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    failures = {}
+    if not urls:
+        return failures
+    with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        futures = {url: executor.submit(wait_for_api, url, headers, settings, verify) for url in urls}
+        for url, future in futures.items():
+            try:
+                future.result()
+            except NotReadyError as e:
+                failures[url] = str(e)
+    return failures
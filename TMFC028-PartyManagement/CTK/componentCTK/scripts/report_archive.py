@@ -0,0 +1,256 @@
+import os
+import gzip
+import json
+import time
+import shutil
+import tarfile
+import hashlib
+import argparse
+import tempfile
+
+# Compressed, deduplicated archive of the reports of every run, instead of a full copy of
+# resources/reports and resources/results in Reports/<component>/ per run.
+#
+# Layout of the archive folder (Reports/archive by default):
+#   runs/<run>.tar         one tar per run holding objects/<sha256>.gz, every file of the run whose
+#                          content is not stored by an earlier run, each gzip compressed on its own
+#                          (no tar when there is none)
+#   runs/<run>.index.json  every file of the run: path -> sha256, size and the tar, offset and length
+#                          of its compressed bytes (possibly in the tar of an earlier run)
+#   catalog.json           sha256 -> location of every stored object, rebuilt from the run indexes
+#
+# A file is extracted by reading its compressed bytes at the recorded offset, without reading the
+# rest of the tar. Since later runs reference objects of earlier ones, runs/ is kept as a whole.
+
+RUNS_DIR = "runs"
+CATALOG_FILE = "catalog.json"
+INDEX_SUFFIX = ".index.json"
+COMPRESS_LEVEL = 6
+READ_CHUNK_SIZE = 1024 * 1024
+# Compressed objects up to this size stay in memory before they are added to the tar
+SPOOL_MAX_SIZE = 16 * 1024 * 1024
+
+
+def _write_json_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Files to archive as (archive path, file path), sources maps an archive path to a file or folder
+def _collect(sources):
+    files = []
+    for prefix, source in sources.items():
+        if os.path.isfile(source):
+            files.append((prefix, source))
+        elif os.path.isdir(source):
+            for root, dirs, names in os.walk(source):
+                dirs.sort()
+                for name in sorted(names):
+                    path = os.path.join(root, name)
+                    relative = os.path.relpath(path, source).replace(os.sep, "/")
+                    files.append((f"{prefix}/{relative}", path))
+        else:
+            print(f"⚠️ Unable to archive results: {source} does not exist.")
+    return files
+
+
+# sha256 -> object location of every run index, reading only the indexes the catalog does not cover.
+# Concurrent runs may overwrite each other's catalog, the next run adds the missing indexes again.
+def load_catalog(archive_dir):
+    catalog_path = os.path.join(archive_dir, CATALOG_FILE)
+    catalog = {"indexes": [], "objects": {}}
+    if os.path.isfile(catalog_path):
+        try:
+            with open(catalog_path, "r", encoding="utf-8") as f:
+                catalog = json.load(f)
+        except (OSError, ValueError):
+            pass
+    runs_dir = os.path.join(archive_dir, RUNS_DIR)
+    known = set(catalog["indexes"])
+    names = sorted(n for n in os.listdir(runs_dir) if n.endswith(INDEX_SUFFIX)) if os.path.isdir(runs_dir) else []
+    added = False
+    for name in names:
+        if name in known:
+            continue
+        index = read_index(archive_dir, name[:-len(INDEX_SUFFIX)])
+        for entry in index["files"].values():
+            catalog["objects"].setdefault(entry["sha256"], {key: entry[key] for key in
+                                                            ("archive", "offset", "length", "size")})
+        catalog["indexes"].append(name)
+        added = True
+    # Objects whose tar is gone cannot be referenced any more
+    present = {a for a in {o["archive"] for o in catalog["objects"].values()}
+               if os.path.isfile(os.path.join(archive_dir, a))}
+    catalog["objects"] = {sha: o for sha, o in catalog["objects"].items() if o["archive"] in present}
+    if added:
+        _write_json_atomic(catalog_path, catalog)
+    return catalog
+
+
+def read_index(archive_dir, run):
+    with open(os.path.join(archive_dir, RUNS_DIR, run + INDEX_SUFFIX), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# Reserve a run name by creating its (empty) tar exclusively, so that concurrent runs started in the
+# same second get different names. The tar is kept until the index of the run is written, the index is
+# checked once the tar is created since a run without new objects removes its tar after its index.
+def _reserve_run_name(runs_dir, name):
+    candidate = name
+    counter = 1
+    while True:
+        tar_path = os.path.join(runs_dir, candidate + ".tar")
+        try:
+            os.close(os.open(tar_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            pass
+        else:
+            if not os.path.exists(os.path.join(runs_dir, candidate + INDEX_SUFFIX)):
+                return candidate
+            os.remove(tar_path)
+        counter += 1
+        candidate = f"{name}-{counter}"
+
+
+# Archive the files of sources ({archive path: file or folder}) as run <name>-<UTC time>.
+# Returns the run index.
+def archive_run(archive_dir, name, sources, metadata=None):
+    runs_dir = os.path.join(archive_dir, RUNS_DIR)
+    os.makedirs(runs_dir, exist_ok=True)
+    run = _reserve_run_name(runs_dir, f"{name}-{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}")
+    tar_name = f"{RUNS_DIR}/{run}.tar"
+    tar_path = os.path.join(archive_dir, tar_name)
+    catalog = load_catalog(archive_dir)
+
+    files = {}
+    new_objects = {}
+    stored_bytes = 0
+    tmp_path = f"{tar_path}.{os.getpid()}.part"
+    try:
+        with tarfile.open(tmp_path, "w", format=tarfile.PAX_FORMAT) as tar:
+            for archive_path, path in _collect(sources):
+                sha = _file_sha256(path)
+                size = os.path.getsize(path)
+                files[archive_path] = {"sha256": sha, "size": size}
+                if sha in catalog["objects"] or sha in new_objects:
+                    continue
+                # Every object is compressed on its own so that it can be read back alone
+                with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as spool:
+                    with open(path, "rb") as source, \
+                            gzip.GzipFile(fileobj=spool, mode="wb", compresslevel=COMPRESS_LEVEL, mtime=0) as out:
+                        shutil.copyfileobj(source, out, READ_CHUNK_SIZE)
+                    info = tarfile.TarInfo(f"objects/{sha}.gz")
+                    info.size = spool.tell()
+                    info.mtime = int(time.time())
+                    spool.seek(0)
+                    tar.addfile(info, spool)
+                new_objects[sha] = size
+                stored_bytes += info.size
+        # Data offsets of the members, read back from the headers of the uncompressed tar
+        with tarfile.open(tmp_path, "r:") as tar:
+            for member in tar:
+                sha = member.name[len("objects/"):-len(".gz")]
+                catalog["objects"][sha] = {"archive": tar_name, "offset": member.offset_data,
+                                           "length": member.size, "size": new_objects[sha]}
+        # A run whose files are all stored already only gets an index
+        if new_objects:
+            os.replace(tmp_path, tar_path)
+        else:
+            os.remove(tmp_path)
+    except BaseException:
+        for path in (tmp_path, tar_path):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+
+    for entry in files.values():
+        entry.update({key: catalog["objects"][entry["sha256"]][key] for key in ("archive", "offset", "length")})
+    index = {"run": run, "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+             **(metadata or {}), "files": files}
+    _write_json_atomic(os.path.join(runs_dir, run + INDEX_SUFFIX), index)
+    # The index now holds the name, the empty tar reserving it is not needed any more
+    if not new_objects:
+        os.remove(tar_path)
+    catalog["indexes"].append(run + INDEX_SUFFIX)
+    _write_json_atomic(os.path.join(archive_dir, CATALOG_FILE), catalog)
+
+    total = sum(entry["size"] for entry in files.values())
+    print(f"Run archived as {run}: {len(files)} file(s), {total} bytes, "
+          f"{len(new_objects)} new object(s) stored in {stored_bytes} bytes")
+    return index
+
+
+# Decompressed content of one archived file, checked against its hash
+def read_file(archive_dir, entry):
+    with open(os.path.join(archive_dir, entry["archive"]), "rb") as f:
+        f.seek(entry["offset"])
+        data = gzip.decompress(f.read(entry["length"]))
+    if hashlib.sha256(data).hexdigest() != entry["sha256"]:
+        raise ValueError(f"Archived object {entry['sha256']} is corrupted")
+    return data
+
+
+# Write the files of a run under output_dir, only those equal to or below `paths` when given
+def extract(archive_dir, run, output_dir, paths=None):
+    index = read_index(archive_dir, run)
+    prefixes = [p.strip("/") for p in paths or []]
+    root = os.path.realpath(output_dir)
+    extracted = 0
+    for archive_path, entry in index["files"].items():
+        if prefixes and not any(archive_path == p or archive_path.startswith(p + "/") for p in prefixes):
+            continue
+        target = os.path.realpath(os.path.join(output_dir, *archive_path.split("/")))
+        if os.path.commonpath([root, target]) != root:
+            raise ValueError(f"Unsafe path in archive index: {archive_path}")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(read_file(archive_dir, entry))
+        extracted += 1
+    return extracted
+
+
+def _runs(archive_dir):
+    runs_dir = os.path.join(archive_dir, RUNS_DIR)
+    if not os.path.isdir(runs_dir):
+        return []
+    return sorted(n[:-len(INDEX_SUFFIX)] for n in os.listdir(runs_dir) if n.endswith(INDEX_SUFFIX))
+
+
+def main(argv=None, default_dir=None):
+    parser = argparse.ArgumentParser(description="List and extract archived CTK reports")
+    parser.add_argument("--dir", default=default_dir, required=default_dir is None, help="Archive folder")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    subparsers.add_parser("runs", help="Archived runs")
+    files_parser = subparsers.add_parser("files", help="Files of an archived run")
+    files_parser.add_argument("run")
+    extract_parser = subparsers.add_parser("extract", help="Extract a run, or some of its files")
+    extract_parser.add_argument("run")
+    extract_parser.add_argument("paths", nargs="*", help="Files or folders of the run, e.g. reports/index.html")
+    extract_parser.add_argument("--output", default=".", help="Folder to extract to")
+
+    args = parser.parse_args(argv)
+    if args.action == "runs":
+        for run in _runs(args.dir):
+            print(run)
+        return 0
+    if args.run not in _runs(args.dir):
+        print(f"No archived run {args.run} in {args.dir}")
+        return 1
+    if args.action == "files":
+        for archive_path, entry in read_index(args.dir, args.run)["files"].items():
+            print(f"{entry['size']:>12}  {archive_path}")
+        return 0
+    count = extract(args.dir, args.run, args.output, args.paths)
+    print(f"{count} file(s) extracted to {os.path.abspath(args.output)}")
+    return 0 if count or not args.paths else 1
@@ -0,0 +1,54 @@
+import re
+import sys
+from importlib import metadata
+
+# Exit with 0 when every requirement of requirements.txt is installed in a matching version, 1 otherwise.
+# Used by the run scripts to skip 'pip install' when there is nothing to install. Only the simple
+# "name<op>version" lines of requirements.txt are understood, anything else makes pip run as before.
+
+REQUIREMENT = re.compile(r"^([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:(==|!=|>=|<=|>|<|~=)\s*([0-9][0-9.]*))?\s*$")
+
+
+def _version(text):
+    return tuple(int(part) for part in re.findall(r"\d+", text)[:4])
+
+
+def _matches(installed, op, wanted):
+    length = max(len(installed), len(wanted))
+    installed = installed + (0,) * (length - len(installed))
+    wanted_padded = wanted + (0,) * (length - len(wanted))
+    if op == "~=":
+        return installed >= wanted_padded and installed[:len(wanted) - 1] == wanted[:-1]
+    return {"==": installed == wanted_padded, "!=": installed != wanted_padded,
+            ">=": installed >= wanted_padded, "<=": installed <= wanted_padded,
+            ">": installed > wanted_padded, "<": installed < wanted_padded}[op]
+
+
+# Requirements of the file that are missing or installed in a version that does not match
+def unsatisfied(requirements_path):
+    missing = []
+    with open(requirements_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            match = REQUIREMENT.match(line)
+            if not match:
+                missing.append(line)
+                continue
+            name, op, wanted = match.groups()
+            try:
+                installed = metadata.version(name)
+            except metadata.PackageNotFoundError:
+                missing.append(line)
+                continue
+            if op and not _matches(_version(installed), op, _version(wanted)):
+                missing.append(line)
+    return missing
+
+
+if __name__ == "__main__":
+    missing = unsatisfied(sys.argv[1] if len(sys.argv) > 1 else "requirements.txt")
+    for requirement in missing:
+        print(f"Missing Python requirement: {requirement}")
+    sys.exit(1 if missing else 0)
@@ -0,0 +1,215 @@
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+
+import stream_json
+import report_archive
+
+# Difference between the results of two CTK runs.
+#
+# A run is a results folder (resources/results, Reports/<component>/results or the Reports/<component>
+# folder itself) or the name of a run of the report archive. Both runs are read in the layout the
+# executor writes:
+#   api-ctk-results/<API>.json       Newman reports, one test per request execution
+#   baseline-ctk/*-report.json       mochawesome reports, one test per mocha test
+#   cucumber-bdd/results.json        cucumber report, one test per scenario
+# Tests are aligned on (suite, name, occurrence of that name) and their assertions (Newman
+# assertions, mocha tests, cucumber steps) on (name, occurrence). Reports are streamed one item
+# (Newman execution, mocha result, cucumber feature) at a time, only a summary of each test is kept.
+
+BDD_SUITE = "cucumber-bdd"
+FAILED_STEP_STATUSES = {"failed", "undefined", "pending", "ambiguous"}
+
+
+def _occurrence(counts, key):
+    counts[key] = counts.get(key, 0) + 1
+    return counts[key]
+
+
+# Test summary: {"assertions": {(name, occurrence): passed}, "ms": duration or None}
+def _test(assertions, duration):
+    counts = {}
+    return {"assertions": {(name, _occurrence(counts, name)): passed for name, passed in assertions},
+            "ms": duration}
+
+
+def _newman_tests(path, suite):
+    counts = {}
+    for execution in stream_json.iter_array(path, ("run", "executions"), drop_byte_arrays=True):
+        name = (execution.get("item") or {}).get("name", "")
+        method = (execution.get("request") or {}).get("method")
+        if method:
+            name = f"{method} {name}"
+        assertions = [(a.get("assertion", ""), not a.get("error")) for a in execution.get("assertions") or []
+                      if not a.get("skipped")]
+        if execution.get("requestError"):
+            assertions.append(("request", False))
+        response = execution.get("response") or {}
+        yield (suite, name, _occurrence(counts, name)), _test(assertions, response.get("responseTime"))
+
+
+def _mocha_tests(suite_json, prefix):
+    for test in suite_json.get("tests") or []:
+        if test.get("pending") or test.get("skipped"):
+            continue
+        yield test.get("fullTitle") or f"{prefix} {test.get('title', '')}".strip(), test
+    for child in suite_json.get("suites") or []:
+        yield from _mocha_tests(child, f"{prefix} {child.get('title', '')}".strip())
+
+
+def _mochawesome_tests(path, suite):
+    counts = {}
+    for result in stream_json.iter_array(path, ("results",)):
+        for name, test in _mocha_tests(result, result.get("title", "")):
+            passed = test.get("state") == "passed"
+            yield (suite, name, _occurrence(counts, name)), _test([("test", passed)], test.get("duration"))
+
+
+def _cucumber_tests(path):
+    counts = {}
+    for feature in stream_json.iter_array(path):
+        for scenario in feature.get("elements") or []:
+            name = f"{feature.get('name', '')}: {scenario.get('name', '')}"
+            steps = scenario.get("steps") or []
+            assertions = [(f"{step.get('keyword', '')}{step.get('name', '')}".strip(),
+                           step.get("result", {}).get("status") not in FAILED_STEP_STATUSES)
+                          for step in steps if step.get("result", {}).get("status") != "skipped"]
+            # Cucumber durations are in nanoseconds
+            duration = sum(step.get("result", {}).get("duration", 0) for step in steps) / 1e6
+            yield (BDD_SUITE, name, _occurrence(counts, name)), _test(assertions, duration)
+
+
+# Every test of the results folder of a run, as (key, summary)
+def iter_tests(results_dir):
+    api_dir = os.path.join(results_dir, "api-ctk-results")
+    if os.path.isdir(api_dir):
+        for name in sorted(os.listdir(api_dir)):
+            if name.endswith(".json"):
+                yield from _newman_tests(os.path.join(api_dir, name), os.path.splitext(name)[0])
+    baseline_dir = os.path.join(results_dir, "baseline-ctk")
+    if os.path.isdir(baseline_dir):
+        for name in sorted(os.listdir(baseline_dir)):
+            if name.endswith("-report.json"):
+                yield from _mochawesome_tests(os.path.join(baseline_dir, name),
+                                              f"baseline-ctk/{name[:-len('-report.json')]}")
+    bdd_path = os.path.join(results_dir, "cucumber-bdd", "results.json")
+    if os.path.isfile(bdd_path) and os.path.getsize(bdd_path) > 0:
+        yield from _cucumber_tests(bdd_path)
+
+
+def _passed(test):
+    return all(test["assertions"].values())
+
+
+# Compare two runs: the tests of the old run are summarised, the new run is streamed against them
+def diff(old_dir, new_dir, latency_threshold=0.2, latency_min_ms=20):
+    old_tests = dict(iter_tests(old_dir))
+    result = {"newFailures": [], "fixed": [], "latencyRegressions": [], "added": 0, "removed": 0,
+              "compared": 0}
+    seen = set()
+    for key, new in iter_tests(new_dir):
+        seen.add(key)
+        suite, name, occurrence = key
+        old = old_tests.get(key)
+        if old is None:
+            result["added"] += 1
+            for (assertion, _), passed in new["assertions"].items():
+                if not passed:
+                    result["newFailures"].append({"suite": suite, "test": name, "assertion": assertion,
+                                                  "newTest": True})
+            continue
+        result["compared"] += 1
+        fixed = 0
+        for assertion_key, passed in new["assertions"].items():
+            was_passed = old["assertions"].get(assertion_key)
+            if was_passed is not False and not passed:
+                result["newFailures"].append({"suite": suite, "test": name, "assertion": assertion_key[0],
+                                              "newTest": False})
+            elif was_passed is False and passed:
+                result["fixed"].append({"suite": suite, "test": name, "assertion": assertion_key[0]})
+                fixed += 1
+        # A test fixed by dropping its failing assertions is fixed too
+        if not fixed and not _passed(old) and _passed(new):
+            result["fixed"].append({"suite": suite, "test": name, "assertion": None})
+        old_ms, new_ms = old["ms"], new["ms"]
+        if old_ms is not None and new_ms is not None and new_ms - old_ms >= latency_min_ms \
+                and new_ms > old_ms * (1 + latency_threshold):
+            result["latencyRegressions"].append({"suite": suite, "test": name, "oldMs": round(old_ms, 1),
+                                                 "newMs": round(new_ms, 1),
+                                                 "increase": round(new_ms / old_ms - 1, 3) if old_ms else None})
+    result["removed"] = sum(1 for key in old_tests if key not in seen)
+    result["latencyRegressions"].sort(key=lambda r: r["oldMs"] - r["newMs"])
+    return result
+
+
+# Results folder of a run argument, extracting archived runs into temp_dir
+def resolve_run(run, archive_dir, temp_dir):
+    if os.path.isdir(run):
+        nested = os.path.join(run, "results")
+        return nested if os.path.isdir(nested) and not os.path.isdir(os.path.join(run, "api-ctk-results")) else run
+    if archive_dir and os.path.isfile(os.path.join(archive_dir, report_archive.RUNS_DIR,
+                                                   run + report_archive.INDEX_SUFFIX)):
+        target = os.path.join(temp_dir, run)
+        report_archive.extract(archive_dir, run, target, ["results"])
+        return os.path.join(target, "results")
+    raise ValueError(f"{run} is neither a results folder nor an archived run")
+
+
+def _print_rows(title, headers, rows, limit):
+    print(f"\n{title} ({len(rows)})")
+    if not rows:
+        return
+    shown = [[("" if v is None else str(v)) for v in row] for row in rows[:limit]]
+    widths = [max([len(h)] + [len(row[i]) for row in shown]) for i, h in enumerate(headers)]
+    print("  ".join(h.ljust(w) for h, w in zip(headers, widths)))
+    for row in shown:
+        print("  ".join(v.ljust(w) for v, w in zip(row, widths)))
+    if len(rows) > limit:
+        print(f"... {len(rows) - limit} more")
+
+
+def main(argv=None, default_archive_dir=None):
+    parser = argparse.ArgumentParser(description="Compare the results of two CTK runs")
+    parser.add_argument("old", help="Results folder or archived run of the reference run")
+    parser.add_argument("new", help="Results folder or archived run to compare with it")
+    parser.add_argument("--archive-dir", default=default_archive_dir, help="Report archive of archived runs")
+    parser.add_argument("--latency-threshold", type=float, default=0.2,
+                        help="Relative response time increase reported as a regression (0.2 = 20%%)")
+    parser.add_argument("--latency-min-ms", type=float, default=20,
+                        help="Smaller absolute increases are never reported")
+    parser.add_argument("--limit", type=int, default=50, help="Rows shown per section")
+    parser.add_argument("--json", metavar="FILE", help="Also write the full difference to FILE")
+    args = parser.parse_args(argv)
+
+    temp_dir = tempfile.mkdtemp(prefix="ctk-diff-")
+    try:
+        old_dir = resolve_run(args.old, args.archive_dir, temp_dir)
+        new_dir = resolve_run(args.new, args.archive_dir, temp_dir)
+        result = diff(old_dir, new_dir, args.latency_threshold, args.latency_min_ms)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    print(f"{result['compared']} test(s) compared, {result['added']} added, {result['removed']} removed")
+    _print_rows("❌ New failures", ["suite", "test", "assertion", "new test"],
+                [(f["suite"], f["test"], f["assertion"], "yes" if f["newTest"] else "") for f in result["newFailures"]],
+                args.limit)
+    _print_rows("✅ Fixed", ["suite", "test", "assertion"],
+                [(f["suite"], f["test"], f["assertion"]) for f in result["fixed"]], args.limit)
+    _print_rows("⚠️ Latency regressions", ["suite", "test", "old ms", "new ms", "increase %"],
+                [(r["suite"], r["test"], r["oldMs"], r["newMs"],
+                  round(100 * r["increase"], 1) if r["increase"] is not None else None)
+                 for r in result["latencyRegressions"]], args.limit)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    return 1 if result["newFailures"] or result["latencyRegressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
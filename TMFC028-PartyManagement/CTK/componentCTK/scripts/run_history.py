@@ -0,0 +1,331 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+
+import stream_json
+
+# Local SQLite store of every CTK run, for trends across runs.
+#
+# Tables:
+#   runs         one row per run (component, release, helm revision, component version, status)
+#   apis         one row per API CTK (Newman collection) or BDD suite of a run
+#   test_cases   one row per Newman request / BDD scenario: method, URL, status code, duration
+#   assertions   one row per Newman assertion / BDD step
+#
+# Runs are ingested from resources/results at the end of ctkExecutor. Run this file to query
+# the store: pass-rate and latency trends, slowest requests and flaky assertions.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    component TEXT,
+    release TEXT,
+    revision TEXT,
+    component_version TEXT,
+    passed INTEGER,
+    duration_s REAL
+);
+CREATE TABLE IF NOT EXISTS apis (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    api TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    assertions_total INTEGER,
+    assertions_failed INTEGER,
+    duration_ms REAL
+);
+CREATE TABLE IF NOT EXISTS test_cases (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    api_id INTEGER NOT NULL REFERENCES apis(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    method TEXT,
+    url TEXT,
+    status_code INTEGER,
+    duration_ms REAL,
+    passed INTEGER
+);
+CREATE TABLE IF NOT EXISTS assertions (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    test_case_id INTEGER NOT NULL REFERENCES test_cases(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    passed INTEGER,
+    skipped INTEGER,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_component ON runs(component, started_at);
+CREATE INDEX IF NOT EXISTS idx_apis_api ON apis(api, run_id);
+CREATE INDEX IF NOT EXISTS idx_test_cases_api ON test_cases(api_id);
+CREATE INDEX IF NOT EXISTS idx_test_cases_name ON test_cases(name, method);
+CREATE INDEX IF NOT EXISTS idx_assertions_test_case ON assertions(test_case_id);
+"""
+
+SECONDS_PER_DAY = 86400
+
+
+def connect(db_path):
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Several runs (multi-target mode) may write to the same store
+    connection = sqlite3.connect(db_path, timeout=60)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA foreign_keys=ON")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def _newman_url(url):
+    if isinstance(url, str):
+        return url
+    if not isinstance(url, dict):
+        return None
+    host = ".".join(url.get("host") or [])
+    path = "/".join(url.get("path") or [])
+    port = f":{url['port']}" if url.get("port") else ""
+    protocol = f"{url['protocol']}://" if url.get("protocol") else ""
+    return f"{protocol}{host}{port}/{path}"
+
+
+# The Newman report is streamed one execution at a time (response bodies dropped), as CTK results can
+# be hundreds of MB. The assertion totals of the API are counted from the executions.
+def _ingest_newman(connection, run_id, api, path):
+    timings = stream_json.object_values(path, ("run",), ("timings",)).get("timings") or {}
+    duration = timings.get("completed", 0) - timings.get("started", 0) if timings else None
+    api_id = connection.execute(
+        "INSERT INTO apis (run_id, api, kind, duration_ms) VALUES (?, ?, 'newman', ?)",
+        (run_id, api, duration)).lastrowid
+
+    total = failed = 0
+    for execution in stream_json.iter_array(path, ("run", "executions"), drop_byte_arrays=True):
+        request = execution.get("request") or {}
+        response = execution.get("response") or {}
+        results = execution.get("assertions") or []
+        passed = all(not a.get("error") for a in results)
+        test_case_id = connection.execute(
+            "INSERT INTO test_cases (run_id, api_id, name, method, url, status_code, duration_ms, passed) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (run_id, api_id, (execution.get("item") or {}).get("name", ""), request.get("method"),
+             _newman_url(request.get("url")), response.get("code"), response.get("responseTime"),
+             int(passed))).lastrowid
+        connection.executemany(
+            "INSERT INTO assertions (run_id, test_case_id, name, passed, skipped, error) VALUES (?, ?, ?, ?, ?, ?)",
+            [(run_id, test_case_id, a.get("assertion", ""), int(not a.get("error")), int(bool(a.get("skipped"))),
+              (a.get("error") or {}).get("message")) for a in results])
+        total += len(results)
+        failed += sum(1 for a in results if a.get("error"))
+    connection.execute("UPDATE apis SET assertions_total = ?, assertions_failed = ? WHERE id = ?",
+                       (total, failed, api_id))
+
+
+def _ingest_cucumber(connection, run_id, features):
+    api_id = connection.execute(
+        "INSERT INTO apis (run_id, api, kind) VALUES (?, 'cucumber-bdd', 'bdd')", (run_id,)).lastrowid
+    total = failed = 0
+    for feature in features or []:
+        for scenario in feature.get("elements", []):
+            steps = scenario.get("steps", [])
+            statuses = [step.get("result", {}).get("status") for step in steps]
+            passed = all(status in ("passed", "skipped") for status in statuses)
+            # Cucumber durations are in nanoseconds
+            duration = sum(step.get("result", {}).get("duration", 0) for step in steps) / 1e6
+            test_case_id = connection.execute(
+                "INSERT INTO test_cases (run_id, api_id, name, duration_ms, passed) VALUES (?, ?, ?, ?, ?)",
+                (run_id, api_id, f"{feature.get('name', '')}: {scenario.get('name', '')}", duration,
+                 int(passed))).lastrowid
+            connection.executemany(
+                "INSERT INTO assertions (run_id, test_case_id, name, passed, skipped, error) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(run_id, test_case_id, f"{step.get('keyword', '')}{step.get('name', '')}".strip(),
+                  int(step.get("result", {}).get("status") == "passed"),
+                  int(step.get("result", {}).get("status") == "skipped"),
+                  step.get("result", {}).get("error_message")) for step in steps])
+            total += len(steps)
+            failed += sum(1 for status in statuses if status not in ("passed", "skipped"))
+    connection.execute("UPDATE apis SET assertions_total = ?, assertions_failed = ? WHERE id = ?",
+                       (total, failed, api_id))
+
+
+def _read_json(path):
+    if not os.path.isfile(path) or os.path.getsize(path) == 0:
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# Store the results of a run, returns the run id
+def ingest(db_path, results_dir, component, release, revision=None, component_version=None, started_at=None):
+    started_at = started_at or time.time()
+    report_data = _read_json(os.path.join(results_dir, "reportData.json")) or {}
+    connection = connect(db_path)
+    try:
+        with connection:
+            run_id = connection.execute(
+                "INSERT INTO runs (started_at, component, release, revision, component_version, passed, duration_s) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (started_at, component, release, revision, component_version,
+                 int(bool(report_data.get("ctkPassed"))) if report_data else None,
+                 round(time.time() - started_at, 3))).lastrowid
+
+            api_results_dir = os.path.join(results_dir, "api-ctk-results")
+            if os.path.isdir(api_results_dir):
+                for name in sorted(os.listdir(api_results_dir)):
+                    path = os.path.join(api_results_dir, name)
+                    if not name.endswith(".json") or os.path.getsize(path) == 0:
+                        continue
+                    # A report that turns out to be invalid half way leaves none of its rows
+                    connection.execute("SAVEPOINT newman_report")
+                    try:
+                        _ingest_newman(connection, run_id, os.path.splitext(name)[0], path)
+                    except ValueError as e:
+                        connection.execute("ROLLBACK TO newman_report")
+                        print(f"⚠️ Skipping unreadable CTK result {name} in run history. Error: {e}")
+                    connection.execute("RELEASE newman_report")
+
+            try:
+                features = _read_json(os.path.join(results_dir, "cucumber-bdd", "results.json"))
+            except ValueError:
+                features = None
+            if features:
+                _ingest_cucumber(connection, run_id, features)
+        return run_id
+    finally:
+        connection.close()
+
+
+def _since(days):
+    return time.time() - days * SECONDS_PER_DAY if days else 0
+
+
+def _where(filters):
+    clauses = [clause for clause, value in filters if value is not None]
+    params = [value for clause, value in filters if value is not None]
+    return (" AND " + " AND ".join(clauses)) if clauses else "", params
+
+
+# Pass rate (or mean request latency) per run and API
+def trend(connection, component=None, api=None, method=None, days=None, metric="passrate"):
+    where, params = _where([("r.component = ?", component), ("a.api LIKE ?", f"{api}%" if api else None),
+                            ("t.method = ?", method)])
+    if metric == "latency":
+        value = "ROUND(AVG(t.duration_ms), 1)"
+    else:
+        value = "ROUND(100.0 * SUM(t.passed) / COUNT(t.id), 1)"
+    return connection.execute(
+        f"SELECT r.id, datetime(r.started_at, 'unixepoch'), r.component, a.api, COUNT(t.id), {value} "
+        "FROM runs r JOIN apis a ON a.run_id = r.id JOIN test_cases t ON t.api_id = a.id "
+        f"WHERE r.started_at >= ?{where} GROUP BY r.id, a.api ORDER BY r.started_at, a.api",
+        [_since(days)] + params).fetchall()
+
+
+# Requests with the highest mean duration over the period
+def slowest(connection, component=None, api=None, method=None, days=None, limit=20):
+    where, params = _where([("r.component = ?", component), ("a.api LIKE ?", f"{api}%" if api else None),
+                            ("t.method = ?", method)])
+    return connection.execute(
+        "SELECT a.api, t.method, t.name, COUNT(*), ROUND(AVG(t.duration_ms), 1), MAX(t.duration_ms) "
+        "FROM test_cases t JOIN apis a ON a.id = t.api_id JOIN runs r ON r.id = t.run_id "
+        f"WHERE t.duration_ms IS NOT NULL AND r.started_at >= ?{where} "
+        "GROUP BY a.api, t.method, t.name ORDER BY AVG(t.duration_ms) DESC LIMIT ?",
+        [_since(days)] + params + [limit]).fetchall()
+
+
+# Assertions that both passed and failed over the period, ordered by how often their outcome changed
+def flaky(connection, component=None, api=None, days=None, min_runs=3, limit=20):
+    where, params = _where([("r.component = ?", component), ("a.api LIKE ?", f"{api}%" if api else None)])
+    rows = connection.execute(
+        "SELECT a.api, t.name, s.name, s.passed "
+        "FROM assertions s JOIN test_cases t ON t.id = s.test_case_id JOIN apis a ON a.id = t.api_id "
+        f"JOIN runs r ON r.id = s.run_id WHERE s.skipped = 0 AND r.started_at >= ?{where} "
+        "ORDER BY r.started_at",
+        [_since(days)] + params)
+    outcomes = {}
+    for api_name, test_name, assertion, passed in rows:
+        outcomes.setdefault((api_name, test_name, assertion), []).append(passed)
+    result = []
+    for key, values in outcomes.items():
+        if len(values) < min_runs or all(values) or not any(values):
+            continue
+        flips = sum(1 for previous, current in zip(values, values[1:]) if previous != current)
+        result.append(key + (len(values), round(100.0 * sum(values) / len(values), 1), flips))
+    result.sort(key=lambda row: (-row[-1], row[-2]))
+    return result[:limit]
+
+
+def runs(connection, component=None, limit=20):
+    where, params = _where([("component = ?", component)])
+    return connection.execute(
+        "SELECT id, datetime(started_at, 'unixepoch'), component, release, revision, passed, duration_s "
+        f"FROM runs WHERE 1 = 1{where} ORDER BY started_at DESC LIMIT ?", params + [limit]).fetchall()
+
+
+def _print_table(headers, rows):
+    rows = [[("" if v is None else str(v)) for v in row] for row in rows]
+    widths = [max([len(h)] + [len(row[i]) for row in rows]) for i, h in enumerate(headers)]
+    print("  ".join(h.ljust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(v.ljust(w) for v, w in zip(row, widths)))
+    if not rows:
+        print("(no data)")
+
+
+def main(argv=None, default_db=None):
+    parser = argparse.ArgumentParser(description="Query the CTK run history")
+    parser.add_argument("--db", default=default_db, required=default_db is None, help="Run history database")
+    subparsers = parser.add_subparsers(dest="query", required=True)
+
+    def add_filters(sub, method=True):
+        sub.add_argument("--component", help="Component id, e.g. TMFC028")
+        sub.add_argument("--api", help="API or CTK name prefix, e.g. TMF669")
+        if method:
+            sub.add_argument("--method", help="HTTP method, e.g. POST")
+        sub.add_argument("--days", type=float, help="Only the last N days")
+
+    runs_parser = subparsers.add_parser("runs", help="Latest runs")
+    runs_parser.add_argument("--component")
+    runs_parser.add_argument("--limit", type=int, default=20)
+
+    trend_parser = subparsers.add_parser("trend", help="Pass rate or mean latency per run and API")
+    add_filters(trend_parser)
+    trend_parser.add_argument("--metric", choices=["passrate", "latency"], default="passrate")
+
+    slowest_parser = subparsers.add_parser("slowest", help="Slowest requests")
+    add_filters(slowest_parser)
+    slowest_parser.add_argument("--limit", type=int, default=20)
+
+    flaky_parser = subparsers.add_parser("flaky", help="Assertions that both passed and failed")
+    add_filters(flaky_parser, method=False)
+    flaky_parser.add_argument("--min-runs", type=int, default=3)
+    flaky_parser.add_argument("--limit", type=int, default=20)
+
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.db):
+        print(f"No run history at {args.db}")
+        return 1
+    connection = connect(args.db)
+    try:
+        if args.query == "runs":
+            _print_table(["run", "started (UTC)", "component", "release", "revision", "passed", "duration s"],
+                         runs(connection, args.component, args.limit))
+        elif args.query == "trend":
+            label = "mean ms" if args.metric == "latency" else "pass %"
+            _print_table(["run", "started (UTC)", "component", "api", "tests", label],
+                         trend(connection, args.component, args.api, args.method, args.days, args.metric))
+        elif args.query == "slowest":
+            _print_table(["api", "method", "request", "samples", "mean ms", "max ms"],
+                         slowest(connection, args.component, args.api, args.method, args.days, args.limit))
+        elif args.query == "flaky":
+            _print_table(["api", "test", "assertion", "runs", "pass %", "flips"],
+                         flaky(connection, args.component, args.api, args.days, args.min_runs, args.limit))
+    finally:
+        connection.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(default_db=os.path.join("..", "Reports", "runHistory.db")))
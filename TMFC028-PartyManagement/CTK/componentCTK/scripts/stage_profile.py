@@ -0,0 +1,168 @@
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Timing and resource usage of the stages of a CTK run.
+#
+# Every stage records its wall time, the CPU time of the thread running it, the CPU time of the
+# child processes it waited for (npm, helm, CTK runs) and byte counters (downloaded, extracted).
+# Child CPU time and peak RSS come from getrusage(RUSAGE_CHILDREN), which is process wide:
+# for stages running in parallel they include the children of the other stages.
+#
+# write() emits a JSON profile with a per stage summary and a Chrome trace-event file that
+# can be opened in chrome://tracing or https://ui.perfetto.dev.
+
+_lock = threading.Lock()
+_local = threading.local()
+_stages = []
+_external_tids = {}
+_origin = time.perf_counter()
+_origin_epoch = time.time()
+
+
+def _children_usage():
+    if not resource:
+        return 0.0, 0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    peak_rss_kb = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return usage.ru_utime + usage.ru_stime, peak_rss_kb
+
+
+# Time a stage: with stage("download_ctk", api="TMF632"): ...
+@contextmanager
+def stage(name, **args):
+    record = {
+        "name": name,
+        "args": args,
+        "thread": threading.current_thread().name,
+        "tid": threading.get_ident(),
+        "bytesDownloaded": 0,
+        "bytesExtracted": 0
+    }
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    stack.append(record)
+
+    children_cpu, _ = _children_usage()
+    cpu = time.thread_time()
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["start"] = start - _origin
+        record["wall"] = time.perf_counter() - start
+        record["cpu"] = time.thread_time() - cpu
+        children_cpu_end, peak_rss_kb = _children_usage()
+        record["childCpu"] = children_cpu_end - children_cpu
+        record["childPeakRssKB"] = peak_rss_kb
+        stack.pop()
+        # Counters of a nested stage also belong to the stages around it
+        for parent in stack:
+            parent["bytesDownloaded"] += record["bytesDownloaded"]
+            parent["bytesExtracted"] += record["bytesExtracted"]
+        with _lock:
+            _stages.append(record)
+
+
+# Add a stage timed by another process (the Newman runs of deployment.js), start and end are epoch
+# seconds. Stages of the same thread name share a lane of the trace.
+def add_external(name, start_epoch, end_epoch, thread, **args):
+    with _lock:
+        tid = _external_tids.setdefault(thread, len(_external_tids) + 1)
+        _stages.append({
+            "name": name,
+            "args": args,
+            "thread": thread,
+            "tid": tid,
+            "bytesDownloaded": 0,
+            "bytesExtracted": 0,
+            "start": start_epoch - _origin_epoch,
+            "wall": max(0.0, end_epoch - start_epoch),
+            "cpu": 0.0,
+            "childCpu": 0.0,
+            "childPeakRssKB": 0
+        })
+
+
+# Forget the stages recorded so far, for processes running several CTK runs (watch mode)
+def reset():
+    global _origin, _origin_epoch
+    with _lock:
+        _stages.clear()
+        _external_tids.clear()
+        _origin = time.perf_counter()
+        _origin_epoch = time.time()
+
+
+def _add(counter, count):
+    stack = getattr(_local, "stack", None)
+    if stack:
+        stack[-1][counter] += count
+
+
+# Count bytes downloaded by the current stage
+def add_downloaded(count):
+    _add("bytesDownloaded", count)
+
+
+# Count bytes written by an extraction in the current stage
+def add_extracted(count):
+    _add("bytesExtracted", count)
+
+
+def _summary(stages):
+    summary = {}
+    for s in stages:
+        entry = summary.setdefault(s["name"], {"count": 0, "wall": 0.0, "cpu": 0.0, "childCpu": 0.0,
+                                               "bytesDownloaded": 0, "bytesExtracted": 0})
+        entry["count"] += 1
+        for key in ("wall", "cpu", "childCpu", "bytesDownloaded", "bytesExtracted"):
+            entry[key] += s[key]
+    for entry in summary.values():
+        for key in ("wall", "cpu", "childCpu"):
+            entry[key] = round(entry[key], 3)
+    return dict(sorted(summary.items(), key=lambda item: -item[1]["wall"]))
+
+
+# Write the JSON profile and the Chrome trace of all the stages recorded so far
+def write(profile_path, trace_path):
+    with _lock:
+        stages = sorted(_stages, key=lambda s: s["start"])
+    _, peak_rss_kb = _children_usage()
+    profile = {
+        "startedAt": _origin_epoch,
+        "totalSeconds": round(time.perf_counter() - _origin, 3),
+        "childPeakRssKB": peak_rss_kb,
+        "summary": _summary(stages),
+        "stages": [{**s, "start": round(s["start"], 3), "wall": round(s["wall"], 3), "cpu": round(s["cpu"], 3),
+                    "childCpu": round(s["childCpu"], 3)} for s in stages]
+    }
+    with open(profile_path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2)
+
+    pid = os.getpid()
+    events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+              for tid, name in {s["tid"]: s["thread"] for s in stages}.items()]
+    events += [{
+        "name": s["name"],
+        "cat": "ctk",
+        "ph": "X",
+        "ts": int(s["start"] * 1e6),
+        "dur": int(s["wall"] * 1e6),
+        "pid": pid,
+        "tid": s["tid"],
+        "args": {**s["args"], "cpu": s["cpu"], "childCpu": s["childCpu"], "childPeakRssKB": s["childPeakRssKB"],
+                 "bytesDownloaded": s["bytesDownloaded"], "bytesExtracted": s["bytesExtracted"]}
+    } for s in stages]
+    with open(trace_path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
@@ -0,0 +1,268 @@
+import os
+import re
+import json
+import shutil
+
+# Streaming copy of JSON documents with bounded memory.
+#
+# Without options the document is copied as-is. For compact output and for stripping
+# response bodies the document is tokenized in chunks: only the current token (and the
+# stack of open containers) is kept in memory, and stripped values are skipped without
+# tokenizing their content.
+
+CHUNK_SIZE = 1024 * 1024
+FLUSH_TOKENS = 4096
+
+# (parent key, key) pairs whose value is replaced by null when stripping response bodies.
+# Newman keeps response bodies as a byte array under run.executions[].response.stream.
+STRIPPED_PATHS = {("response", "stream")}
+
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[\[\]{}:,]|[^\s"\[\]{}:,]+|\s+', re.S)
+_SPACE = re.compile(r'\s*')
+_DECODER = json.JSONDecoder()
+# Characters that may still continue a number decoded at the end of the buffer ("1e" decodes as 1)
+_NUMBER_TAIL = re.compile(r'[0-9.eE+-]*')
+_SKIP = re.compile(r'[^"\[\]{}]+|"(?:[^"\\]|\\.)*"|[\[\]{}]', re.S)
+# Byte arrays ("data": [...] of a Newman Buffer), and the start of one that may go on in the next chunk.
+# ASCII classes and the lookbehind after the literal keep the regex engine on its fast paths.
+_WS = r'[ \t\r\n]*'
+_BYTE_ARRAY = re.compile(rf'"data"(?<!\\"data"){_WS}:{_WS}\[[0-9, \t\r\n]*\]')
+_BYTE_ARRAY_START = re.compile(rf'"(?:d(?:a(?:t(?:a(?:"{_WS}(?::{_WS}(?:\[[0-9, \t\r\n]*)?)?)?)?)?)?)?\Z')
+
+
+class _Tokenizer:
+    # drop_byte_arrays replaces every "data" array of byte values by null while reading
+    def __init__(self, file, drop_byte_arrays=False):
+        self.file = file
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.drop_byte_arrays = drop_byte_arrays
+        self.held = ""
+
+    # Next chunk of input, "" at the end of the document
+    def _read(self, size=None):
+        size = size or CHUNK_SIZE
+        if not self.drop_byte_arrays:
+            return self.file.read(size)
+        while True:
+            chunk = self.file.read(size)
+            if not chunk:
+                text, self.held = self.held, ""
+                return text
+            text = _BYTE_ARRAY.sub('"data":null', self.held + chunk)
+            # An unfinished byte array starts at one of the last two quotes
+            last = text.rfind('"')
+            start = next((i for i in (text.rfind('"', 0, last), last)
+                          if i >= 0 and _BYTE_ARRAY_START.match(text, i)), -1)
+            if start < 0:
+                self.held = ""
+                return text
+            self.held = text[start:]
+            if start > 0:
+                return text[:start]
+
+    # Match regex at the current position, reading more input while the match could still grow
+    def _match(self, regex):
+        while True:
+            m = regex.match(self.buf, self.pos)
+            if (m is None or m.end() == len(self.buf)) and not self.eof:
+                chunk = self._read()
+                if chunk:
+                    self.buf = self.buf[self.pos:] + chunk
+                    self.pos = 0
+                else:
+                    self.eof = True
+                continue
+            if m is None:
+                if self.pos < len(self.buf):
+                    raise ValueError(f"Invalid JSON near: {self.buf[self.pos:self.pos + 40]!r}")
+                return None
+            self.pos = m.end()
+            return m.group()
+
+    def next(self):
+        return self._match(_TOKEN)
+
+    # Decode the value at the current position with the C decoder, reading more input (doubling the
+    # amount each time, so large values are decoded a bounded number of times) until it is complete
+    def value(self):
+        while True:
+            self.pos = _SPACE.match(self.buf, self.pos).end()
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+                # A number ending the buffer may go on in the next chunk
+                partial_number = (isinstance(value, (int, float)) and not isinstance(value, bool)
+                                  and _NUMBER_TAIL.fullmatch(self.buf, end))
+                if self.eof or (end < len(self.buf) and not partial_number):
+                    self.pos = end
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise
+            chunk = self._read(max(CHUNK_SIZE, len(self.buf) - self.pos))
+            self.buf = self.buf[self.pos:] + chunk
+            self.pos = 0
+            if not chunk:
+                self.eof = True
+
+    # First non-space character at the current position, None at the end of the document
+    def peek(self):
+        while True:
+            self.pos = _SPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos] if self.pos < len(self.buf) else None
+            self.buf = self._read()
+            self.pos = 0
+            if not self.buf:
+                self.eof = True
+
+    # Skip the rest of a container whose opening bracket was just read
+    def skip_container(self):
+        depth = 1
+        while depth:
+            token = self._match(_SKIP)
+            if token is None:
+                raise ValueError("Unexpected end of JSON document")
+            if token in "[{":
+                depth += 1
+            elif token in "]}":
+                depth -= 1
+
+
+# Copy the JSON document in src_path to the text stream out
+def copy_json(src_path, out, compact=False, strip_response_bodies=False):
+    with open(src_path, "r", encoding="utf-8") as src:
+        if not compact and not strip_response_bodies:
+            shutil.copyfileobj(src, out, CHUNK_SIZE)
+            return
+
+        tokenizer = _Tokenizer(src)
+        stack = []  # [container type, current key] of every open container
+        expect_key = False
+        pending = []
+
+        def emit(text):
+            pending.append(text)
+            if len(pending) >= FLUSH_TOKENS:
+                out.write("".join(pending))
+                pending.clear()
+
+        while True:
+            token = tokenizer.next()
+            if token is None:
+                break
+            first = token[0]
+            if first.isspace():
+                if not compact:
+                    emit(token)
+                continue
+            emit(token)
+            if first == "{":
+                stack.append(["{", None])
+                expect_key = True
+            elif first == "[":
+                stack.append(["[", None])
+                expect_key = False
+            elif first in "}]":
+                stack.pop()
+                expect_key = False
+            elif first == ",":
+                expect_key = bool(stack) and stack[-1][0] == "{"
+            elif first == '"' and expect_key:
+                stack[-1][1] = token[1:-1]
+                expect_key = False
+            elif first == ":" and strip_response_bodies:
+                parent_key = stack[-2][1] if len(stack) > 1 else None
+                if (parent_key, stack[-1][1]) in STRIPPED_PATHS:
+                    value = tokenizer.next()
+                    while value is not None and value[0].isspace():
+                        if not compact:
+                            emit(value)
+                        value = tokenizer.next()
+                    if value in ("{", "["):
+                        tokenizer.skip_container()
+                    emit("null")
+
+        out.write("".join(pending))
+
+
+def _next_value_token(tokenizer):
+    token = tokenizer.next()
+    while token is not None and token[0].isspace():
+        token = tokenizer.next()
+    if token is None:
+        raise ValueError("Unexpected end of JSON document")
+    return token
+
+
+# Move the tokenizer to the value at path (a tuple of object keys), False when there is none
+def _seek(tokenizer, path):
+    for wanted in path:
+        if _next_value_token(tokenizer) != "{":
+            return False
+        while True:
+            token = _next_value_token(tokenizer)
+            if token == ",":
+                token = _next_value_token(tokenizer)
+            if token == "}":
+                return False
+            key = json.loads(token)
+            _next_value_token(tokenizer)  # ":"
+            if key == wanted:
+                break
+            tokenizer.value()
+    return True
+
+
+# Yield the items of the array at array_path (a tuple of object keys, () for a top level array)
+# of the JSON document in src_path one by one. Only the current item is held in memory: items
+# and the values around the array are decoded by the C decoder one at a time, reading just
+# enough input for each of them. With drop_byte_arrays the response bodies of Newman reports,
+# most of their size, are read as null without being decoded.
+def iter_array(src_path, array_path=(), drop_byte_arrays=False):
+    with open(src_path, "r", encoding="utf-8") as src:
+        tokenizer = _Tokenizer(src, drop_byte_arrays)
+        if not _seek(tokenizer, array_path) or _next_value_token(tokenizer) != "[":
+            return
+        while True:
+            if tokenizer.peek() == "]":
+                tokenizer.next()
+                return
+            yield tokenizer.value()
+            token = _next_value_token(tokenizer)
+            if token == "]":
+                return
+
+
+# The members named in keys of the object at object_path of the JSON document in src_path, as a
+# dict without the keys the object does not have. Other members are skipped without being
+# decoded, and reading stops as soon as every key was found.
+def object_values(src_path, object_path, keys):
+    values = {}
+    with open(src_path, "r", encoding="utf-8") as src:
+        tokenizer = _Tokenizer(src)
+        if not _seek(tokenizer, object_path) or _next_value_token(tokenizer) != "{":
+            return values
+        while len(values) < len(keys):
+            token = _next_value_token(tokenizer)
+            if token == ",":
+                token = _next_value_token(tokenizer)
+            if token == "}":
+                break
+            key = json.loads(token)
+            _next_value_token(tokenizer)  # ":"
+            if key in keys:
+                values[key] = tokenizer.value()
+            elif _next_value_token(tokenizer) in ("{", "["):
+                tokenizer.skip_container()
+    return values
+
+
+# Write a JSON value: the document in path, or null when there is no such file
+def write_json_file_value(out, path, compact=False, strip_response_bodies=False):
+    if not path or not os.path.isfile(path) or os.path.getsize(path) == 0:
+        out.write("null")
+        return
+    copy_json(path, out, compact, strip_response_bodies)
+
@@ -0,0 +1,127 @@
+import os
+import json
+import hashlib
+import threading
+
+# Parse the component YAMLs once and keep the result.
+#
+# Parsing uses the libyaml C loader when PyYAML was built with it. Parsed documents are
+# cached as JSON, which loads much faster than YAML:
+#   <cache_dir>/<file name>.json     {"key": sha256 of the file + revision, "documents": [...]}
+# The entry is reused as long as the file content (and, for a helm manifest, the revision: cluster,
+# namespace, release and helm revision, see api_resolution.manifest_revision) is unchanged. From the parsed documents a compact index of the exposed, dependent
+# and security APIs is written, read by the executor and by the Node report generator.
+
+INDEX_VERSION = 1
+
+_lock = threading.Lock()
+
+
+# PyYAML is only imported when a file has to be parsed, cached entries are read without it
+def _loader():
+    import yaml
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def using_libyaml():
+    import yaml
+    return _loader() is not yaml.SafeLoader
+
+
+def _file_key(path, revision=None):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    if revision is not None:
+        digest.update(f"|revision={revision}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _cache_path(cache_dir, path):
+    return os.path.join(cache_dir, os.path.basename(path) + ".json")
+
+
+# Revision recorded with the cached documents of a file, or None
+def cached_revision(cache_dir, path):
+    entry_path = _cache_path(cache_dir, path)
+    if not os.path.isfile(entry_path) or not os.path.isfile(path):
+        return None
+    try:
+        with open(entry_path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if entry.get("key") != _file_key(path, entry.get("revision")):
+        return None
+    return entry.get("revision")
+
+
+# All the documents of a YAML file, parsed at most once per file content and revision
+def load_documents(path, cache_dir, revision=None):
+    key = _file_key(path, revision)
+    entry_path = _cache_path(cache_dir, path)
+    with _lock:
+        if os.path.isfile(entry_path):
+            try:
+                with open(entry_path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                if entry.get("key") == key:
+                    return entry["documents"]
+            except (OSError, ValueError, KeyError):
+                pass
+
+        import yaml
+        with open(path, "r", encoding="utf8") as f:
+            documents = [doc for doc in yaml.load_all(f, Loader=_loader()) if doc is not None]
+
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "revision": revision, "documents": documents}, f,
+                      separators=(",", ":"), default=str)
+        os.replace(tmp_path, entry_path)
+        return documents
+
+
+# The first document of a YAML file (the golden component specification)
+def load_document(path, cache_dir):
+    documents = load_documents(path, cache_dir)
+    return documents[0] if documents else {}
+
+
+# Exposed, dependent and security APIs of a Component document
+def component_apis(component):
+    spec = (component or {}).get("spec", {}) or {}
+    core_function = spec.get("coreFunction", {}) or {}
+    security_function = spec.get("securityFunction", {}) or {}
+    return {
+        "exposedAPIs": core_function.get("exposedAPIs", []) or [],
+        "dependentAPIs": core_function.get("dependentAPIs", []) or [],
+        "securityAPIs": security_function.get("exposedAPIs", []) or []
+    }
+
+
+def _component_entry(component):
+    return {
+        "name": component.get("metadata", {}).get("name"),
+        "version": component.get("spec", {}).get("componentMetadata", {}).get("version"),
+        **component_apis(component)
+    }
+
+
+# Write the API index of the golden specification and of the deployed release
+def write_index(index_path, golden_document, manifest_documents, release, revision):
+    deployed = [doc for doc in manifest_documents if doc.get("kind") == "Component"]
+    index = {
+        "version": INDEX_VERSION,
+        "golden": _component_entry(golden_document),
+        "deployed": {
+            "release": release,
+            "revision": revision,
+            "components": [_component_entry(doc) for doc in deployed]
+        }
+    }
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"), default=str)
+    return index
@@ -1,8 +1,10 @@
-const { Given, When, Then, Before, After, AfterAll } = require('@cucumber/cucumber');
+const { Given, When, Then, Before, After, AfterAll, setParallelCanAssign } = require('@cucumber/cucumber');
 const assert = require('assert');
-const { loadPayload, makeApiRequest, validateSpecificationId } = require('../utils/api');
+const { loadPayload, savePayload, makeApiRequest, validateSpecificationId } = require('../utils/api');
 const { getDeploymentData, fetchFromKubernetes } = require('../utils/kubernetes');
 const { resolveStubRelease } = require('../utils/stubResolver');
+const { getResolvedApiUrls } = require('../utils/apiResolution');
+const { getReadinessSettings, pollUntil, waitForApiReady } = require('../utils/readiness');
 const k8s = require('@kubernetes/client-node');
 const fs = require('fs');
 const { execSync } = require("child_process");
@@ -19,15 +21,25 @@ const ctkConfig = require(ctkConfigPath);
 const COMPONENTS = 'components';
 const NAMESPACE = ctkConfig.component_namespace;
 const TMFORUM_ODA_API_GROUP = 'oda.tmforum.org';
-const retrySettings = config.retrySettings || {};
-const DEFAULT_MAX_RETRIES = retrySettings.maxRetries || 30;
-const DEFAULT_RETRY_INTERVAL = retrySettings.retryInterval || 10000;
+// Steps waiting for the component and the stubs may poll twice (URL resolution, then readiness) up to the deadline
+const READINESS_STEP_TIMEOUT = 2 * getReadinessSettings().deadlineMs + 10000;
 
 // Declare global variables for dynamic URLs
 let EXPOSED_API_BASE_URL = null;
 let DEPENDENT_API_BASE_URL = null;
 let createdResources = [];
 
+// Payload files named in the steps of a scenario
+function payloadFiles(pickle) {
+    return new Set(pickle.steps.flatMap(step => step.text.match(/[\w.-]+\.json/g) || []));
+}
+
+// With parallel workers, scenarios sharing a payload file never run at the same time: the payload may
+// name an existing stub resource (id/href) that one scenario relies on while the other one changes it
+setParallelCanAssign((pickleInQuestion, picklesInProgress) => {
+    const files = payloadFiles(pickleInQuestion);
+    return picklesInProgress.every(pickle => ![...payloadFiles(pickle)].some(file => files.has(file)));
+});
 
 //=================Cucumber Hooks=================
 Before(function (scenario) {
@@ -45,11 +57,19 @@ Before(function (scenario) {
 });
 
 // Step Definitions
-Given("the CTK target component {string} with exposed API ID {string} and dependent API ID {string} has been installed successfully", async function (componentUnderTest, exposedApiId, dependentApiId) {
-    let deploymentData = getDeploymentData(exposedApiId, dependentApiId);
-    if (!deploymentData.exposedApiBaseUrl || !deploymentData.dependentApiBaseUrl) {
-        deploymentData = await fetchFromKubernetes(exposedApiId, dependentApiId);
-    }
+Given("the CTK target component {string} with exposed API ID {string} and dependent API ID {string} has been installed successfully", { timeout: READINESS_STEP_TIMEOUT }, async function (componentUnderTest, exposedApiId, dependentApiId) {
+    // The component status only lists the API URLs once the operator has exposed them
+    const deploymentData = await pollUntil(async () => {
+        // Resolved once by the executor, then deployment.json, then a live lookup while the operator catches up
+        let data = getResolvedApiUrls(exposedApiId, dependentApiId);
+        if (!data.exposedApiBaseUrl || !data.dependentApiBaseUrl) {
+            data = getDeploymentData(exposedApiId, dependentApiId);
+        }
+        if (!data.exposedApiBaseUrl || !data.dependentApiBaseUrl) {
+            data = await fetchFromKubernetes(exposedApiId, dependentApiId);
+        }
+        return data.exposedApiBaseUrl && data.dependentApiBaseUrl ? data : null;
+    }, `API URLs of component ${componentUnderTest}`);
     // Set global variable values
     EXPOSED_API_BASE_URL = deploymentData.exposedApiBaseUrl;
     DEPENDENT_API_BASE_URL = deploymentData.dependentApiBaseUrl;
@@ -57,9 +77,10 @@ Given("the CTK target component {string} with exposed API ID {string} and depend
     console.log(`Testing component: ${componentUnderTest}`);
     console.log(`Exposed API Base URL: ${EXPOSED_API_BASE_URL}`);
     console.log(`Dependent API Base URL: ${DEPENDENT_API_BASE_URL}`);
+    await waitForApiReady(EXPOSED_API_BASE_URL, ctkConfig.headers);
 });
 
-Given("the supporting stub {string} for API {string} has been installed successfully", async function(dependentComponent, dependentAPI){
+Given("the supporting stub {string} for API {string} has been installed successfully", { timeout: READINESS_STEP_TIMEOUT }, async function(dependentComponent, dependentAPI){
     console.log(`🔄 Checking if stub component is installed for dependent API '${dependentComponent}'...`);
     this.dependentComponent = dependentComponent;
     this.dependentAPI = dependentAPI;
@@ -85,6 +106,7 @@ Given("the supporting stub {string} for API {string} has been installed successf
     }
     this.stubReleaseName = resolvedStub.releaseName;
     this.stubHeaders = resolvedStub.headers;
+    await waitForApiReady(DEPENDENT_API_BASE_URL, this.stubHeaders);
 });
 
 Given("the target component API {string} is initialized with the payload defined in file {string}", async function (exposedAPI, basePayload) {
@@ -135,12 +157,11 @@ Given("the dependent API stub {string} is initialized with the payload defined i
         console.log(`✅ Injected base party references into ${dependentAPI} payload`);
 
         // Write back the payload with injected engagedParty references
-        const payloadPath = path.resolve(__dirname, '../payloads', basePayload2);
         try {
-            fs.writeFileSync(payloadPath, JSON.stringify(payload, null, 2));
+            savePayload(basePayload2, payload);
             console.log(`✅ Updated ${basePayload2} with engagedParty references`);
         } catch (err) {
-            console.error(`Failed to write updated payload to ${payloadPath}: `, err.message);
+            console.error(`Failed to write updated payload ${basePayload2}: `, err.message);
         }
     }
 
@@ -208,8 +229,7 @@ Given("the dependent API stub {string} is initialized with the payload defined i
 
 When("a {string} with {string} on payload defined in file {string} is created in API {string} expecting {string}", async function (resourceType, resourceFieldPath, targetPayload, exposedAPI, expectedResponse){
 
-    // Step 1: construct the file path and read the payload
-    const payloadPath = path.resolve(__dirname, '../payloads', targetPayload);
+    // Step 1: read the payload
     const payload = loadPayload(targetPayload);
     console.log(`Creating resource of type ${resourceType} in API ${exposedAPI} with targetPayload`);
 
@@ -221,9 +241,9 @@ When("a {string} with {string} on payload defined in file {string} is created in
         
         // Write updated payload back to file
         try {
-            fs.writeFileSync(payloadPath, JSON.stringify(payload, null, 2));
+            savePayload(targetPayload, payload);
         } catch (err) {
-            console.error(`Failed to write updated payload to ${payloadPath}: `, err.message);
+            console.error(`Failed to write updated payload ${targetPayload}: `, err.message);
         }
     }
 
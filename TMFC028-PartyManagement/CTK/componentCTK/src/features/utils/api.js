@@ -1,13 +1,49 @@
 const fs = require('fs');
+const path = require('path');
 const axios = require('axios');
 const https = require('https');
 
-// Function to load a payload from a file
+const PAYLOAD_DIR = './features/payloads';
+// Parallel cucumber workers write the resource references they inject into payloads to their own copy
+const WORKER_PAYLOAD_DIR = path.join(PAYLOAD_DIR, '.workers');
+
+function workerPayloadDir() {
+    const workerId = process.env.CUCUMBER_WORKER_ID;
+    return workerId === undefined ? PAYLOAD_DIR : path.join(WORKER_PAYLOAD_DIR, workerId);
+}
+
+// Function to load a payload from a file, the copy of this worker when it changed it
 function loadPayload(filename){
-    const payloadpath = `./features/payloads/${filename}`
+    const workerPath = path.join(workerPayloadDir(), filename);
+    const payloadpath = fs.existsSync(workerPath) ? workerPath : path.join(PAYLOAD_DIR, filename);
     return JSON.parse(fs.readFileSync(payloadpath, 'utf-8'));
 }
 
+// Function to write a payload back, to the copy of this worker when running in parallel
+function savePayload(filename, payload){
+    const dir = workerPayloadDir();
+    fs.mkdirSync(dir, { recursive: true });
+    fs.writeFileSync(path.join(dir, filename), JSON.stringify(payload, null, 2));
+}
+
+// After a parallel run, copy the payloads changed by the workers back (latest change wins)
+function collectWorkerPayloads(){
+    if (!fs.existsSync(WORKER_PAYLOAD_DIR)) return;
+    const latest = {};
+    for (const workerId of fs.readdirSync(WORKER_PAYLOAD_DIR)) {
+        const dir = path.join(WORKER_PAYLOAD_DIR, workerId);
+        for (const filename of fs.readdirSync(dir)) {
+            const filePath = path.join(dir, filename);
+            const mtime = fs.statSync(filePath).mtimeMs;
+            if (!latest[filename] || latest[filename].mtime < mtime) latest[filename] = { filePath, mtime };
+        }
+    }
+    for (const [filename, { filePath }] of Object.entries(latest)) {
+        fs.copyFileSync(filePath, path.join(PAYLOAD_DIR, filename));
+    }
+    fs.rmSync(WORKER_PAYLOAD_DIR, { recursive: true, force: true });
+}
+
 // Function to make API requests
 async function makeApiRequest(method, url, payload = null, headers = {'Content-Type': 'application/json'}) {
     try {
@@ -58,6 +94,8 @@ async function validateSpecificationId(specificationID, dependentURL){
 
 module.exports = {
     loadPayload,
+    savePayload,
+    collectWorkerPayloads,
     makeApiRequest,
     validateSpecificationId,
 };
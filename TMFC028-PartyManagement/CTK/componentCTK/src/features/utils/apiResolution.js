@@ -0,0 +1,53 @@
+const path = require('path');
+const fs = require('fs');
+const ctkConfigPath = path.resolve(__dirname, '../../ctkconfig.json');
+const ctkConfig = require(ctkConfigPath);
+
+// api-resolution.json is written once per run by CTK_Executor.py (see scripts/api_resolution.py):
+// the component status and the stub release manifests, so the steps do not call helm or the API server.
+let resolution;
+
+function loadApiResolution() {
+    if (resolution !== undefined) return resolution;
+    resolution = null;
+    if (!ctkConfig.apiResolutionFilePath) return resolution;
+
+    const resolutionPath = path.resolve(__dirname, '../..', ctkConfig.apiResolutionFilePath);
+    try {
+        resolution = JSON.parse(fs.readFileSync(resolutionPath, 'utf-8'));
+        console.log(`✅ Loaded API resolution from ${resolutionPath}`);
+    } catch (error) {
+        console.warn(`⚠️ Could not read API resolution ${resolutionPath}: ${error.message}`);
+    }
+    return resolution;
+}
+
+// Base URLs of an exposed and a dependent API of the component under test, null when not resolved
+function getResolvedApiUrls(targetExposedApiId = null, targetDependentApiId = null) {
+    const data = loadApiResolution();
+    if (!data) return { exposedApiBaseUrl: null, dependentApiBaseUrl: null };
+
+    const exposed = targetExposedApiId ? data.exposedAPIs?.[targetExposedApiId.toUpperCase()] : null;
+    const dependent = targetDependentApiId ? (data.dependentAPIs || []).find(api =>
+        (api.specification || []).some(url => url.toUpperCase().includes(targetDependentApiId.toUpperCase()))
+    ) : null;
+
+    return {
+        exposedApiBaseUrl: exposed?.url || null,
+        dependentApiBaseUrl: dependent?.url || null
+    };
+}
+
+// Release, URL and headers of the API whose declared path is part of the given URL
+function findApiByUrl(apiUrl) {
+    const data = loadApiResolution();
+    if (!data || !apiUrl) return null;
+    const match = Object.entries(data.paths || {}).find(([apiPath]) => apiUrl.includes(apiPath));
+    return match ? { path: match[0], ...match[1] } : null;
+}
+
+module.exports = {
+    loadApiResolution,
+    getResolvedApiUrls,
+    findApiByUrl
+};
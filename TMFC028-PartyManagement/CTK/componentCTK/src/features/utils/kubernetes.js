@@ -1,10 +1,15 @@
 const k8s = require('@kubernetes/client-node');
+const YAML = require('yaml');
 const path = require('path');
 const fs = require('fs');
 const deploymentJsonPath = path.resolve(__dirname, '../../deployment.json');
 const ctkConfigPath  = path.resolve(__dirname, '../../ctkconfig.json');
 const ctkConfig = require(ctkConfigPath);
 
+const COMPONENTS = 'components';
+const NAMESPACE = ctkConfig.component_namespace;
+const TMFORUM_ODA_API_GROUP = 'oda.tmforum.org';
+
 // K8S variables
 let kc = null;
 let coreAPI = null;
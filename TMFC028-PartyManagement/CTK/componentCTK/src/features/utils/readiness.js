@@ -0,0 +1,100 @@
+const axios = require('axios');
+const https = require('https');
+const path = require('path');
+
+const configPath = path.resolve(__dirname, '../../../CHANGE_ME.json');
+const config = require(configPath);
+
+// Statuses worth waiting for: the API is starting, overloaded or behind a gateway that is not ready yet
+const RETRYABLE_STATUSES = [429, 500, 502, 503, 504];
+// Statuses that will not change by waiting (wrong credentials, forbidden)
+const NON_RETRYABLE_STATUSES = [401, 403];
+
+let warnedRetrySettings = false;
+
+// Poll settings from CHANGE_ME.json readinessSettings, the deadline falls back to the deprecated retrySettings
+function getReadinessSettings() {
+    const settings = config.readinessSettings || {};
+    const legacy = config.retrySettings || {};
+    const legacyDeadline = legacy.maxRetries && legacy.retryInterval ? legacy.maxRetries * legacy.retryInterval : null;
+    if (config.retrySettings && !warnedRetrySettings) {
+        warnedRetrySettings = true;
+        const replacement = settings.deadlineMs !== undefined ? "it is ignored"
+            : `its deadline of ${legacyDeadline} ms is used as readinessSettings.deadlineMs`;
+        console.log(`⚠️ retrySettings in CHANGE_ME.json is deprecated, ${replacement}. `
+            + "Move it to readinessSettings (see the README).");
+    }
+    return {
+        initialDelayMs: settings.initialDelayMs ?? 200,
+        maxDelayMs: settings.maxDelayMs ?? 5000,
+        factor: settings.factor ?? 2,
+        jitter: settings.jitter ?? 0.2,
+        deadlineMs: settings.deadlineMs ?? legacyDeadline ?? 120000
+    };
+}
+
+class NonRetryableError extends Error {}
+
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+
+// Call fn until it returns a truthy value, waiting with exponential backoff and jitter between attempts.
+// Gives up at the deadline, or right away when fn throws a NonRetryableError.
+async function pollUntil(fn, description, options = {}) {
+    const settings = { ...getReadinessSettings(), ...options };
+    const start = Date.now();
+    let delay = settings.initialDelayMs;
+    let attempt = 0;
+    let lastError = null;
+
+    while (true) {
+        attempt++;
+        try {
+            const result = await fn();
+            if (result) {
+                console.log(`✅ ${description} ready after ${attempt} attempt(s) in ${Date.now() - start} ms`);
+                return result;
+            }
+        } catch (error) {
+            if (error instanceof NonRetryableError) throw error;
+            lastError = error;
+        }
+
+        const remaining = settings.deadlineMs - (Date.now() - start);
+        if (remaining <= 0) {
+            const reason = lastError ? `: ${lastError.message}` : '';
+            throw new Error(`${description} not ready after ${attempt} attempt(s) in ${settings.deadlineMs} ms${reason}`);
+        }
+        const jittered = delay * (1 + settings.jitter * (2 * Math.random() - 1));
+        await sleep(Math.min(jittered, remaining));
+        delay = Math.min(delay * settings.factor, settings.maxDelayMs);
+    }
+}
+
+// Wait until an API base URL answers with a status that shows it is up
+async function waitForApiReady(url, headers = {}, options = {}) {
+    const httpsAgent = new https.Agent({ rejectUnauthorized: false });
+    return pollUntil(async () => {
+        const response = await axios({
+            method: 'GET',
+            url,
+            headers,
+            httpsAgent,
+            timeout: options.requestTimeoutMs || 5000,
+            validateStatus: () => true
+        });
+        if (NON_RETRYABLE_STATUSES.includes(response.status)) {
+            throw new NonRetryableError(`${url} answered ${response.status}, check the configured headers`);
+        }
+        if (RETRYABLE_STATUSES.includes(response.status)) {
+            throw new Error(`${url} answered ${response.status}`);
+        }
+        return true;
+    }, `API ${url}`, options);
+}
+
+module.exports = {
+    getReadinessSettings,
+    NonRetryableError,
+    pollUntil,
+    waitForApiReady
+};
@@ -1,41 +1,57 @@
 const { execSync } = require("child_process");
 const YAML = require('yaml');
+const { findApiByUrl } = require('./apiResolution');
+
+// Exposed API paths of each stub release, when the API resolution of the run does not cover it
+const manifestPaths = new Map();
+
+function getStubApiPaths(releaseName, namespace) {
+    if (manifestPaths.has(releaseName)) return manifestPaths.get(releaseName);
+
+    let manifestOutput;
+    try {
+        manifestOutput = execSync(`helm get manifest ${releaseName} -n ${namespace}`, { encoding: 'utf-8' });
+    } catch (err) {
+        console.warn(`⚠️ Could not retrieve Helm manifest for release ${releaseName}: ${err.message}`);
+        return null;
+    }
+
+    const parsedDocuments = YAML.parseAllDocuments(manifestOutput);
+    const componentDoc = parsedDocuments.find(doc => doc.get('kind') === 'Component');
+    let paths = [];
+    if (componentDoc) {
+        const spec = componentDoc.get('spec');
+        const exposedAPIs = spec.get('coreFunction')?.get('exposedAPIs')?.items || [];
+        paths = exposedAPIs.map(api => api.get('path')).filter(apiPath => typeof apiPath === 'string');
+    }
+    manifestPaths.set(releaseName, paths);
+    return paths;
+}
 
 function resolveStubRelease(componentUnderTest, dependentComponent, dependentApiUrl, dependentStubsMap, defaultHeaders, namespace) {
     const stubEntries = Object.entries(dependentStubsMap || {});
+    const declaredReleases = stubEntries.map(([, stubDetails]) => stubDetails.releaseName);
+
+    const resolved = findApiByUrl(dependentApiUrl);
+    if (resolved?.kind === 'stub' && declaredReleases.includes(resolved.release)) {
+        return {
+            releaseName: resolved.release,
+            headers: resolved.headers && Object.keys(resolved.headers).length > 0 ? resolved.headers : defaultHeaders
+        };
+    }
 
     for (const [stubName, stubDetails] of stubEntries) {
         const releaseName = stubDetails.releaseName;
         const headers = stubDetails.headers || {};
 
-        let manifestOutput;
-        try {
-            manifestOutput = execSync(`helm get manifest ${releaseName} -n ${namespace}`, { encoding: 'utf-8' });
-        } catch (err) {
-            console.warn(`⚠️ Could not retrieve Helm manifest for release ${releaseName}: ${err.message}`);
-            continue;
-        }
-
-        const parsedDocuments = YAML.parseAllDocuments(manifestOutput);
-        const componentDoc = parsedDocuments.find(doc => doc.get('kind') === 'Component');
-        if (!componentDoc) continue;
-
-        const spec = componentDoc.get('spec');
-        const exposedAPIs = spec.get('coreFunction')?.get('exposedAPIs')?.items || [];
+        const paths = getStubApiPaths(releaseName, namespace);
+        if (!paths) continue;
 
-        const matchedAPI = exposedAPIs.find(api => {
-            const path = api.get('path');
-            return typeof path === 'string' && dependentApiUrl.includes(path);
-        });
-
-        if (matchedAPI) {
-            const declaredPath = matchedAPI.get('path');
-            if (dependentApiUrl.includes(declaredPath)) {
-                return {
-                    releaseName,
-                    headers: Object.keys(headers).length > 0 ? headers : defaultHeaders
-                };
-            }
+        if (paths.some(declaredPath => dependentApiUrl.includes(declaredPath))) {
+            return {
+                releaseName,
+                headers: Object.keys(headers).length > 0 ? headers : defaultHeaders
+            };
         }
     }
 
@@ -44,4 +60,4 @@ function resolveStubRelease(componentUnderTest, dependentComponent, dependentApi
 
 module.exports = {
     resolveStubRelease
-};
\ No newline at end of file
+};
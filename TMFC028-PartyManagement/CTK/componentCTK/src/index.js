@@ -13,6 +13,7 @@ const YAML = require('yaml');
 const exp = require('constants');
 const { execSync } = require('child_process');
 const { json } = require('stream/consumers');
+const { collectWorkerPayloads } = require('./features/utils/api');
 const configPath = path.resolve(__dirname, '../CHANGE_ME.json');
 const configData = require(configPath);
 
@@ -297,10 +298,17 @@ async function runCucumberBDD() {
   //console.log("Setting format for output")
   //runConfiguration.format = [`json:${jsonResultsPath}`];
   runConfiguration.formats.files[temp] = "json"
+  // Only the scenarios of the component are handed to the workers
+  runConfiguration.sources.tagExpression = tag
+  // Scenarios run on parallel worker processes (parallelSettings.bddWorkers), the json formatter of the
+  // coordinator still writes a single results.json
+  const bddWorkers = config.bddWorkers || 1
+  runConfiguration.runtime.parallel = bddWorkers > 1 ? bddWorkers : 0
+  console.log(`Running BDD scenarios on ${bddWorkers} worker(s)`)
 
-  
   // Run Cucumber tests
   const {success} = await runCucumber(runConfiguration)
+  collectWorkerPayloads()
 
   // Remove skipped tests from the results
   filterCucumberResults(jsonResultsPath)
@@ -347,6 +355,11 @@ function filterCucumberResults(jsonResultsPath) {
 
 
 async function main(){
+  // 'npm run report' renders the report of the results already in ../resources/results
+  if (process.argv.includes("--report-only")) {
+    await generateReport()
+    return 0
+  }
   try{
     await configureAPICTKS() // updates apiCTK config with payloads in ctkconfig.json
     let suits = configureMochaSuits().map(e => runSuit(e))
@@ -555,15 +568,52 @@ function calculateCTKStatus(canvasData, summary){
   return ctkStatus && canvasData.canvasCTKPassed
 }
 
-async function generateReportData(resultsPath) {
-  //console.log(`📌 Debug: Checking results path: ${resultsPath}`);
-  let componentDocument;
+// Latency/throughput results of the executor load test, null when it did not run
+async function getLoadTestResults(loadResultsPath) {
+  try {
+    const loadResults = JSON.parse(await fs.promises.readFile(loadResultsPath, 'utf8'))
+    const asPercent = rate => (rate * 100).toFixed(2) + "%"
+    return {
+      durationSeconds: loadResults.durationSeconds,
+      concurrency: loadResults.settings.concurrency,
+      total: { ...loadResults.total, errorRate: asPercent(loadResults.total.errorRate) },
+      rows: loadResults.results.map(r => ({ ...r, errorRate: asPercent(r.errorRate) }))
+    }
+  } catch (e) {
+    return null
+  }
+}
+
+// The executor writes a pre-parsed index of the golden component APIs, which avoids parsing the YAML again
+async function readComponentIndex() {
+  if (!config.componentIndexFilePath) return null;
   try {
-    componentDocument = await fs.promises.readFile(GOLDEN_COMPONENT_PATH, 'utf8');
-    componentDocument = YAML.parse(componentDocument);
+    const index = JSON.parse(await fs.promises.readFile(config.componentIndexFilePath, 'utf8'));
+    const golden = index.golden;
+    return {
+      spec: {
+        componentMetadata: { version: golden.version },
+        coreFunction: { exposedAPIs: golden.exposedAPIs, dependentAPIs: golden.dependentAPIs },
+        securityFunction: { exposedAPIs: golden.securityAPIs }
+      }
+    };
   } catch (error) {
-    console.error(`❌ Error reading GOLDEN_COMPONENT_PATH: ${error.message}`);
-    return {}; // Exit function early if component document cannot be read
+    console.warn(`⚠️ Component index not available, parsing ${GOLDEN_COMPONENT_PATH}: ${error.message}`);
+    return null;
+  }
+}
+
+async function generateReportData(resultsPath) {
+  //console.log(`📌 Debug: Checking results path: ${resultsPath}`);
+  let componentDocument = await readComponentIndex();
+  if (!componentDocument) {
+    try {
+      componentDocument = await fs.promises.readFile(GOLDEN_COMPONENT_PATH, 'utf8');
+      componentDocument = YAML.parse(componentDocument);
+    } catch (error) {
+      console.error(`❌ Error reading GOLDEN_COMPONENT_PATH: ${error.message}`);
+      return {}; // Exit function early if component document cannot be read
+    }
   }
 
   const instance = new Component(componentDocument)
@@ -642,6 +692,8 @@ async function generateReportData(resultsPath) {
     }
   ]
 
+  const loadTest = await getLoadTestResults(Path.join(resultsPath, "load-test/loadResults.json"))
+
   canvasVersion = await getCanvasVersion();
   kubernetes = await getKubernetesVersion();
   ctkVersion = getCtkVersion();
@@ -685,6 +737,7 @@ async function generateReportData(resultsPath) {
 //     file: "../results/cucumber-bdd/results.html"
 //    },
     summaryTable: summaryTable,
+    loadTest: loadTest,
     company: config.companyName,
     productUrl: config.productUrl,
     productName: config.productName,
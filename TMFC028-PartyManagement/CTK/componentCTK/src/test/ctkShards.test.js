@@ -0,0 +1,108 @@
+const chai = require('chai')
+const expect = chai.expect
+const fs = require('fs')
+const os = require('os')
+const Path = require('path')
+const { groupFolders, splitFolders, planShards } = require('../tests/ctkShards')
+
+// Run with: npm run test:unit (from src/)
+
+function request(name, { url = "{{baseUrl}}/party", test = [] } = {}) {
+    return {
+        name,
+        request: { method: "GET", url: { raw: url } },
+        event: [{ listen: "test", script: { type: "text/javascript", exec: test } }]
+    }
+}
+
+function folder(name, items) {
+    return { name, item: items }
+}
+
+function names(shards) {
+    return shards.map(shard => shard.map(f => f.name))
+}
+
+function writeCtk(items) {
+    let ctkPath = fs.mkdtempSync(Path.join(os.tmpdir(), "ctk-shards-"))
+    fs.mkdirSync(Path.join(ctkPath, "ctk"))
+    let collection = {
+        info: { name: "CTK", schema: "https://schema.getpostman.com/json/collection/v2.1.0/collection.json" },
+        item: items
+    }
+    fs.writeFileSync(Path.join(ctkPath, "ctk", "CTK.postman_collection.json"), JSON.stringify(collection))
+    return { path: ctkPath, api_ref: "TMF632_v4" }
+}
+
+describe("groupFolders", function () {
+    it("keeps independent folders apart", function () {
+        let folders = [
+            folder("Individual", [request("create", { test: ['pm.environment.set("IDIndividual", pm.response.json().id)'] }),
+                request("get", { url: "{{baseUrl}}/individual/{{IDIndividual}}" })]),
+            folder("Organization", [request("create", { test: ["pm.globals.set('IDOrganization', 1)"] }),
+                request("get", { url: "{{baseUrl}}/organization/{{IDOrganization}}" })])
+        ]
+        expect(groupFolders(folders)).to.deep.equal([[0], [1]])
+    })
+
+    it("groups a folder reading a variable with the folder setting it", function () {
+        let folders = [
+            folder("Individual", [request("create", { test: ['pm.environment.set("IDIndividual", 1)'] })]),
+            folder("Organization", [request("create")]),
+            folder("PartyRole", [request("create", { url: "{{baseUrl}}/partyRole?party={{ IDIndividual }}" })]),
+            folder("Characteristic", [request("get", { test: ['let id = pm.collectionVariables.get("IDOrganization")'] })]),
+            folder("Setup", [request("create", { test: ['postman.setEnvironmentVariable("IDOrganization", 2)'] })])
+        ]
+        expect(groupFolders(folders)).to.deep.equal([[0, 2], [1], [3, 4]])
+    })
+
+    it("groups folders writing the same variable", function () {
+        let folders = [
+            folder("A", [request("a", { test: ['pm.variables.set("shared", 1)'] })]),
+            folder("B", [request("b", { test: ['pm.variables.set("shared", 2)'] })]),
+            folder("C", [request("c")])
+        ]
+        expect(groupFolders(folders)).to.deep.equal([[0, 1], [2]])
+    })
+})
+
+describe("splitFolders", function () {
+    it("puts linked folders in the same shard, in collection order", function () {
+        let folders = [
+            folder("Individual", [request("create", { test: ['pm.environment.set("IDIndividual", 1)'] })]),
+            folder("Organization", [request("create"), request("get"), request("list")]),
+            folder("PartyRole", [request("create", { url: "{{baseUrl}}/partyRole/{{IDIndividual}}" })])
+        ]
+        expect(names(splitFolders(folders, 2))).to.deep.equal([["Individual", "PartyRole"], ["Organization"]])
+    })
+})
+
+describe("planShards", function () {
+    it("runs a collection unsharded when all its folders are linked", function () {
+        let api = writeCtk([
+            folder("Individual", [request("create", { test: ['pm.environment.set("IDIndividual", 1)'] })]),
+            folder("PartyRole", [request("create", { url: "{{baseUrl}}/partyRole/{{IDIndividual}}" })])
+        ])
+        try {
+            expect(planShards(api, { enabled: true, shardsPerCtk: 4 })).to.equal(null)
+        } finally {
+            fs.rmSync(api.path, { recursive: true, force: true })
+        }
+    })
+
+    it("shards the independent groups of a collection", function () {
+        let api = writeCtk([
+            folder("Individual", [request("create", { test: ['pm.environment.set("IDIndividual", 1)'] })]),
+            folder("Organization", [request("create")]),
+            folder("PartyRole", [request("create", { url: "{{baseUrl}}/partyRole/{{IDIndividual}}" })])
+        ])
+        try {
+            let plan = planShards(api, { enabled: true, shardsPerCtk: 4 })
+            expect(plan.shards).to.have.lengthOf(2)
+            expect(plan.shards.map(shard => shard.item.map(f => f.name)))
+                .to.deep.equal([["Individual", "PartyRole"], ["Organization"]])
+        } finally {
+            fs.rmSync(api.path, { recursive: true, force: true })
+        }
+    })
+})
@@ -0,0 +1,336 @@
+const fs = require('fs')
+const Path = require('path')
+const { timed } = require('./ctkTimings')
+
+// Sharded CTK runs: the Postman collection of a CTK is split by top level folder (one folder per
+// resource in the TMF CTKs) into shards, every shard runs the CTK's own 'npm start' as a separate
+// Newman process in <ctk>/shards/shard-<n>, and the jsonResults.json of the shards are merged
+// back into <ctk>/jsonResults.json in the layout of a single Newman run, so the report generator
+// reads them unchanged. Requests of one folder always stay in the same shard and in order.
+// Folders linked through a variable (one sets it with pm.<scope>.set, another reads it with
+// {{name}} or pm.<scope>.get) also stay in the same shard; a collection whose folders are all
+// linked runs unsharded.
+//
+// Settings (ctkconfig.json ctkSharding, from CHANGE_ME.json shardSettings):
+//   enabled        shard the CTKs at all
+//   shardsPerCtk   maximum number of shards (Newman workers) per CTK
+//   minRequests    collections with fewer requests run unsharded
+//   apis           api_refs (TMF632_v4) to shard, empty for every CTK
+
+const SHARDS_DIR = "shards"
+const COLLECTION_SCHEMA = "getpostman.com/json/collection"
+const VARIABLE_SET = /\bpm\.(?:globals|environment|collectionVariables|variables)\.set\(\s*["'`]([^"'`]+)["'`]|\bpostman\.set(?:Environment|Global)Variable\(\s*["'`]([^"'`]+)["'`]/g
+const VARIABLE_GET = /\bpm\.(?:globals|environment|collectionVariables|variables)\.get\(\s*["'`]([^"'`]+)["'`]|\{\{\s*([^{}\s]+)\s*\}\}/g
+const STAT_KEYS = ["iterations", "items", "scripts", "prerequests", "requests", "tests", "assertions",
+    "testScripts", "prerequestScripts"]
+
+function isFolder(item) {
+    return Array.isArray(item.item)
+}
+
+function countRequests(items) {
+    return items.reduce((total, item) => total + (isFolder(item) ? countRequests(item.item) : 1), 0)
+}
+
+// Every string of a collection item (scripts, URLs, headers, bodies), in any nesting
+function itemStrings(value, strings = []) {
+    if (typeof value === "string") {
+        strings.push(value)
+    } else if (Array.isArray(value)) {
+        value.forEach(entry => itemStrings(entry, strings))
+    } else if (value && typeof value === "object") {
+        Object.values(value).forEach(entry => itemStrings(entry, strings))
+    }
+    return strings
+}
+
+// Names of the variables a folder sets and reads
+function folderVariables(folder) {
+    let sets = new Set()
+    let reads = new Set()
+    for (let text of itemStrings(folder.item)) {
+        for (let match of text.matchAll(VARIABLE_SET)) sets.add(match[1] || match[2])
+        for (let match of text.matchAll(VARIABLE_GET)) reads.add(match[1] || match[2])
+    }
+    return { sets, reads }
+}
+
+// Indexes of the folders grouped so that a folder setting a variable is in the group of every
+// other folder setting or reading it. Groups are in collection order.
+function groupFolders(folders) {
+    let parent = folders.map((folder, index) => index)
+    let find = index => parent[index] === index ? index : (parent[index] = find(parent[index]))
+    let variables = folders.map(folderVariables)
+    let setters = new Map()
+    variables.forEach(({ sets }, index) => sets.forEach(name => {
+        if (!setters.has(name)) setters.set(name, [])
+        setters.get(name).push(index)
+    }))
+    variables.forEach(({ sets, reads }, index) => {
+        for (let name of new Set([...sets, ...reads])) {
+            for (let setter of setters.get(name) || []) parent[find(setter)] = find(index)
+        }
+    })
+    let groups = new Map()
+    folders.forEach((folder, index) => {
+        let root = find(index)
+        if (!groups.has(root)) groups.set(root, [])
+        groups.get(root).push(index)
+    })
+    return [...groups.values()]
+}
+
+// Postman collection of a CTK (the largest collection file of <ctk>/ctk), null when there is none
+function findCollection(ctkDir) {
+    let found = null
+    for (let name of fs.readdirSync(ctkDir)) {
+        let filePath = Path.join(ctkDir, name)
+        if (!name.endsWith(".json") || !fs.statSync(filePath).isFile()) continue
+        let collection
+        try {
+            collection = JSON.parse(fs.readFileSync(filePath, 'utf8'))
+        } catch (error) {
+            continue
+        }
+        let schema = String(collection?.info?.schema || "")
+        if (!schema.includes(COLLECTION_SCHEMA) || !Array.isArray(collection.item)) continue
+        let size = fs.statSync(filePath).size
+        if (!found || size > found.size) found = { name, collection, size }
+    }
+    return found
+}
+
+// Top level folders spread over at most `count` shards, balanced on their number of requests.
+// The folders of a group (see groupFolders) go to the same shard. Folders keep their collection
+// order inside a shard, shards are ordered by their first folder and empty shards are dropped.
+function splitFolders(folders, count, groups = groupFolders(folders)) {
+    let shards = Array.from({ length: count }, () => ({ indexes: [], requests: 0 }))
+    let bySize = groups.map(indexes => ({
+        indexes,
+        requests: indexes.reduce((total, index) => total + countRequests(folders[index].item), 0)
+    })).sort((a, b) => b.requests - a.requests)
+    for (let entry of bySize) {
+        let lightest = shards.reduce((min, shard) => shard.requests < min.requests ? shard : min)
+        lightest.indexes.push(...entry.indexes)
+        lightest.requests += entry.requests
+    }
+    return shards.filter(shard => shard.indexes.length > 0)
+        .map(shard => shard.indexes.sort((a, b) => a - b))
+        .sort((a, b) => a[0] - b[0])
+        .map(indexes => indexes.map(index => folders[index]))
+}
+
+// Collections of the shards of a CTK, null when it must run unsharded
+function planShards(apiData, settings) {
+    if (!settings?.enabled) return null
+    let apis = settings.apis || []
+    if (apis.length > 0 && !apis.includes(apiData.api_ref)) return null
+    let found = findCollection(Path.join(apiData.path, "ctk"))
+    if (!found) return null
+    let items = found.collection.item
+    // Requests outside any folder may prepare data for the folders, such collections run as a whole
+    if (items.length < 2 || !items.every(isFolder)) return null
+    if (countRequests(items) < (settings.minRequests ?? 0)) return null
+    let groups = groupFolders(items)
+    let count = Math.min(Math.max(1, settings.shardsPerCtk || 1), groups.length)
+    if (count < 2) {
+        if (groups.length < 2) console.log(`Running ${apiData.api_ref} unsharded: its folders share variables`)
+        return null
+    }
+    return {
+        fileName: found.name,
+        collection: found.collection,
+        shards: splitFolders(items, count, groups).map(folders => ({ ...found.collection, item: folders }))
+    }
+}
+
+// Link (or copy) an entry of the CTK into a shard, node_modules is shared through a symlink/junction
+function linkEntry(source, target) {
+    let stats = fs.statSync(source)
+    if (stats.isDirectory()) {
+        if (Path.basename(source) === "node_modules") {
+            fs.symlinkSync(Path.resolve(source), target, process.platform === "win32" ? "junction" : "dir")
+        } else {
+            fs.cpSync(source, target, { recursive: true })
+        }
+    } else {
+        fs.copyFileSync(source, target)
+    }
+}
+
+// Build <ctk>/shards/shard-<n> with the configured config.json and the shard collection
+function prepareShards(apiData, plan) {
+    let shardsRoot = Path.join(apiData.path, SHARDS_DIR)
+    fs.rmSync(shardsRoot, { recursive: true, force: true })
+    let ctkDir = Path.join(apiData.path, "ctk")
+    return plan.shards.map((collection, index) => {
+        let shardPath = Path.join(shardsRoot, `shard-${index + 1}`)
+        let shardCtkDir = Path.join(shardPath, "ctk")
+        fs.mkdirSync(shardCtkDir, { recursive: true })
+        fs.copyFileSync(Path.join(apiData.path, "config.json"), Path.join(shardPath, "config.json"))
+        for (let name of fs.readdirSync(ctkDir)) {
+            if (name === plan.fileName) continue
+            linkEntry(Path.join(ctkDir, name), Path.join(shardCtkDir, name))
+        }
+        fs.writeFileSync(Path.join(shardCtkDir, plan.fileName), JSON.stringify(collection, null, 2))
+        return {
+            path: shardPath,
+            url: apiData.url,
+            api_ref: `${apiData.api_ref} shard ${index + 1}/${plan.shards.length}`,
+            shard: index + 1,
+            // node_modules is the CTK's own, installed before the shards are built
+            prepared: true
+        }
+    })
+}
+
+function mergeStats(runs) {
+    let stats = {}
+    for (let key of STAT_KEYS) {
+        let present = runs.map(run => run.stats?.[key]).filter(Boolean)
+        if (present.length === 0) continue
+        stats[key] = { total: 0, pending: 0, failed: 0 }
+        for (let value of present) {
+            stats[key].total += value.total || 0
+            stats[key].pending += value.pending || 0
+            stats[key].failed += value.failed || 0
+        }
+    }
+    // Every shard runs the collection once, the merged run is still a single iteration
+    if (stats.iterations) {
+        stats.iterations.total = Math.max(...runs.map(run => run.stats?.iterations?.total || 0))
+        stats.iterations.failed = Math.max(...runs.map(run => run.stats?.iterations?.failed || 0))
+    }
+    return stats
+}
+
+function mergeTimings(runs) {
+    let timed = runs.filter(run => run.timings)
+    if (timed.length === 0) return {}
+    let timings = timed.map(run => run.timings)
+    // Averages and deviations are weighted by the number of requests of each shard
+    let weights = timed.map(run => run.stats?.requests?.total || 0)
+    let totalWeight = weights.reduce((a, b) => a + b, 0)
+    let weighted = key => totalWeight === 0 ? 0 :
+        timings.reduce((sum, t, i) => sum + (t[key] || 0) * weights[i], 0) / totalWeight
+    let started = Math.min(...timings.map(t => t.started))
+    let completed = Math.max(...timings.map(t => t.completed))
+    let merged = {
+        responseAverage: weighted("responseAverage"),
+        responseMin: Math.min(...timings.map(t => t.responseMin ?? Infinity)),
+        responseMax: Math.max(...timings.map(t => t.responseMax ?? 0)),
+        responseSd: weighted("responseSd"),
+        dnsAverage: weighted("dnsAverage"),
+        dnsMin: Math.min(...timings.map(t => t.dnsMin ?? Infinity)),
+        dnsMax: Math.max(...timings.map(t => t.dnsMax ?? 0)),
+        dnsSd: weighted("dnsSd"),
+        firstByteAverage: weighted("firstByteAverage"),
+        firstByteMin: Math.min(...timings.map(t => t.firstByteMin ?? Infinity)),
+        firstByteMax: Math.max(...timings.map(t => t.firstByteMax ?? 0)),
+        firstByteSd: weighted("firstByteSd"),
+        started: started,
+        completed: completed
+    }
+    for (let key of Object.keys(merged)) {
+        if (merged[key] === Infinity) merged[key] = 0
+    }
+    return merged
+}
+
+// One Newman JSON report from the reports of the shards, in shard order
+function mergeReports(reports) {
+    let runs = reports.map(report => report.run || {})
+    let first = reports[0]
+    let merged = {
+        ...first,
+        collection: { ...first.collection, item: reports.flatMap(report => report.collection?.item || []) },
+        run: {
+            ...first.run,
+            stats: mergeStats(runs),
+            timings: mergeTimings(runs),
+            executions: runs.flatMap(run => run.executions || []),
+            transfers: { responseTotal: runs.reduce((sum, run) => sum + (run.transfers?.responseTotal || 0), 0) },
+            failures: runs.flatMap(run => run.failures || []),
+            error: runs.map(run => run.error).find(error => error) || null
+        }
+    }
+    return merged
+}
+
+// Index page linking the HTML reports of the shards, written as the htmlResults.html of the CTK
+function writeHtmlIndex(apiData, shardCount, report) {
+    let assertions = report.run?.stats?.assertions || {}
+    let links = Array.from({ length: shardCount }, (_, i) =>
+        `<li><a href="${apiData.api_ref}-shards/shard-${i + 1}.html">Shard ${i + 1}</a></li>`).join("\n")
+    let html = `<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>${apiData.api_ref} CTK results</title></head>
+<body>
+<h1>${apiData.api_ref} CTK results</h1>
+<p>The collection ran in ${shardCount} shards: ${assertions.total || 0} assertions, ${assertions.failed || 0} failed.</p>
+<ul>
+${links}
+</ul>
+</body>
+</html>
+`
+    fs.writeFileSync(Path.join(apiData.path, "htmlResults.html"), html)
+}
+
+// Run the shards of a CTK with runCtk (at most `limit` at the same time) and merge their results
+// into <ctk>/jsonResults.json and <ctk>/htmlResults.html. Resolves like runCtk: with the first
+// failing shard's rejection value when a shard failed, after the results of all shards are merged.
+async function runShardedCTK(apiData, plan, runCtk, runWithLimit, limit) {
+    let shards = prepareShards(apiData, plan)
+    console.log(`Running api CTK for ${apiData.api_ref} in ${shards.length} shards`)
+    let outcomes = await runWithLimit(shards, limit, async shard => {
+        try {
+            return await timed("ctk shard", { api: apiData.api_ref, shard: shard.shard }, () => runCtk(shard))
+        } catch (error) {
+            return error
+        }
+    })
+    let reports = []
+    shards.forEach((shard, index) => {
+        let jsonResultsFile = Path.join(shard.path, "jsonResults.json")
+        if (fs.existsSync(jsonResultsFile)) {
+            reports.push(JSON.parse(fs.readFileSync(jsonResultsFile, 'utf8')))
+        } else {
+            console.log(`⚠️ Shard ${index + 1} of ${apiData.api_ref} produced no results`)
+        }
+    })
+    if (reports.length > 0) {
+        let merged = mergeReports(reports)
+        // The report lists the folders in collection order, whatever shard ran them
+        merged.collection.item = plan.collection.item
+        fs.writeFileSync(Path.join(apiData.path, "jsonResults.json"), JSON.stringify(merged, null, 2))
+        writeHtmlIndex(apiData, shards.length, merged)
+    }
+    let failed = outcomes.find(outcome => outcome.statusCode !== 0)
+    if (failed) throw failed
+    return {
+        stdout: outcomes.map(outcome => outcome.stdout).join("\n"),
+        stderr: outcomes.map(outcome => outcome.stderr).join("\n"),
+        statusCode: 0
+    }
+}
+
+// HTML reports of the shards of a CTK copied next to its results as <api_ref>-shards/shard-<n>.html
+function copyShardHtml(apiData, shardCount, resultsFolder) {
+    let target = Path.join(resultsFolder, `${apiData.api_ref}-shards`)
+    fs.rmSync(target, { recursive: true, force: true })
+    fs.mkdirSync(target, { recursive: true })
+    for (let i = 1; i <= shardCount; i++) {
+        let source = Path.join(apiData.path, SHARDS_DIR, `shard-${i}`, "htmlResults.html")
+        if (fs.existsSync(source)) fs.copyFileSync(source, Path.join(target, `shard-${i}.html`))
+    }
+}
+
+module.exports = {
+    groupFolders,
+    splitFolders,
+    planShards,
+    runShardedCTK,
+    copyShardHtml,
+    mergeReports
+}
@@ -0,0 +1,35 @@
+const fs = require('fs')
+const Path = require('path')
+
+// Start and end (epoch seconds) of the Newman runs of the CTKs and of their shards. They are
+// written to src/ctkTimings.json, next to ctkconfig.json, after every run so that a crashing
+// mocha run still leaves the runs that finished; CTK_Executor.py merges them into ctkProfile.json
+// and the Chrome trace of the run.
+
+const TIMINGS_FILE = Path.join(__dirname, "..", "ctkTimings.json")
+
+let timings = []
+
+// Time the promise returned by fn as stage `name`, resolves or rejects like it
+async function timed(name, args, fn) {
+    let start = Date.now()
+    let statusCode = 0
+    try {
+        return await fn()
+    } catch (error) {
+        statusCode = error?.statusCode ?? 1
+        throw error
+    } finally {
+        timings.push({ name, args: { ...args, statusCode }, start: start / 1000, end: Date.now() / 1000 })
+        try {
+            fs.writeFileSync(TIMINGS_FILE, JSON.stringify(timings, null, 2))
+        } catch (error) {
+            console.log(`⚠️ Unable to write ${TIMINGS_FILE}: ${error}`)
+        }
+    }
+}
+
+module.exports = {
+    timed,
+    TIMINGS_FILE
+}
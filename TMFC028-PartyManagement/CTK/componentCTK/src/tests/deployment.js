@@ -12,6 +12,8 @@ const http = require('http')
 const mkdirp = require('mkdirp');
 const k8s = require('@kubernetes/client-node');
 const { exec } = require('child_process');
+const { planShards, runShardedCTK, copyShardHtml } = require('./ctkShards');
+const { timed } = require('./ctkTimings');
 
 chai.use(chaiHttp)
 
@@ -131,7 +133,14 @@ describe("Step 1: Deployment component tests", function () {
                     if (typeof spec !== "string"){
                         spec = spec[0]
                     }
-                    let swagger = await loadYamlFromUrl(spec)
+                    let specVersion
+                    if (config.offline) {
+                        // Offline bundle run: no network, use the version declared by the component
+                        specVersion = String(body_api.specification?.[0]?.version || "").replace(/^v/, "")
+                    } else {
+                        let swagger = await loadYamlFromUrl(spec)
+                        specVersion = swagger.info.version
+                    }
                     // let api_ref = swagger.info["x-api-id"] + "_v" + swagger.info.version
                     const regex = /TMF\d+/g;
                     console.log(`regex value is: ${regex}`)
@@ -139,7 +148,7 @@ describe("Step 1: Deployment component tests", function () {
                     console.log(`spec value is: ${spec}`)
                     const matches = spec.match(regex);
                     console.log(`matches value is: ${ matches}`)
-                    let api_ref = matches[0] + "_v" + swagger.info.version.split('.')[0]
+                    let api_ref = matches[0] + "_v" + specVersion.split('.')[0]
                     console.log(`api_ref is ${api_ref} url: ${url}`)
                     //
                     ref_to_url[api_ref] = url
@@ -190,6 +199,17 @@ describe("Step 1: Deployment component tests", function () {
             })
         })
 
+        // Incremental runs: CTK_Executor.py restored the results of APIs whose inputs did not change
+        let reused = config.reuseApiResults || []
+        api_configs = api_configs.filter(api => {
+            let cachedResults = Path.join("../resources/results/api-ctk-results", api.api_ref + ".json")
+            if (reused.includes(api.api_ref) && fs.existsSync(cachedResults)) {
+                console.log(`Reusing unchanged CTK results for ${api.api_ref}`)
+                return false
+            }
+            return true
+        })
+
         let ctks_exist = await Promise.all(api_configs.map(async api => await fileExists(api.path)))
         expect(ctks_exist).to.not.include(false)
         
@@ -214,9 +234,18 @@ describe("Step 1: Deployment component tests", function () {
         let config_promises = await Promise.all(configured_ctks)
         expect(config_promises).to.not.include(false)
         
-        let ctk_executions = api_configs.map(async api => {
+        // ctkWorkers 0 (parallel settings disabled) runs every CTK at the same time
+        let ctk_executions = runWithLimit(api_configs, config.ctkWorkers || api_configs.length, async api => {
             try {
-                let results = await runAPICTK(api)
+                // Large collections run as folder shards on parallel Newman workers (see ctkShards.js)
+                let plan = planShards(api, config.ctkSharding)
+                let results = await timed("ctk", { api: api.api_ref, shards: plan ? plan.shards.length : 0 }, async () => {
+                    if (plan) {
+                        await installAPICTK(api)
+                        return await runShardedCTK(api, plan, runAPICTK, runWithLimit, plan.shards.length)
+                    }
+                    return await runAPICTK(api)
+                })
 
                 let resultsFolder = Path.normalize("../resources/results/api-ctk-results")
                 let htmlResultsFile = Path.join(api.path, "htmlResults.html")
@@ -230,6 +259,9 @@ describe("Step 1: Deployment component tests", function () {
                 await copyFile(htmlResultsFile, htmlResults);
             
                 await copyFile(jsonResultsFile, jsonResults);
+                if (plan) {
+                    copyShardHtml(api, plan.shards.length, resultsFolder)
+                }
 
                 return results
             }
@@ -238,7 +270,7 @@ describe("Step 1: Deployment component tests", function () {
                 return error
             }
         })
-        let ctk_results = await Promise.all(ctk_executions)
+        let ctk_results = await ctk_executions
         let ctk_erros = ctk_results.filter(result => result.statusCode !== 0)
         ctk_erros.forEach(error => console.log("Error: " + error.stderr))
         expect(ctk_erros).to.be.empty
@@ -258,10 +290,27 @@ function copyFile(source, destination) {
     });
 }
 
+// Runs fn over items with at most `limit` promises in flight, preserving the order of results
+async function runWithLimit(items, limit, fn) {
+    let results = new Array(items.length)
+    let next = 0
+    async function worker() {
+        while (next < items.length) {
+            let index = next++
+            results[index] = await fn(items[index])
+        }
+    }
+    let workers = Array.from({ length: Math.max(1, Math.min(limit, items.length)) }, () => worker())
+    await Promise.all(workers)
+    return results
+}
+
 function runAPICTK(apiData) {
     let ctkPath = apiData.path
     console.log(`Running api CTK for ${apiData.api_ref}`)
-    let command = "npm install && npm start"
+    // node_modules are prepared by CTK_Executor.py (package-lock cache or offline bundle)
+    let prepared = apiData.prepared || (config.skipNpmInstall && fs.existsSync(Path.join(ctkPath, "ctk", "node_modules")))
+    let command = prepared ? "npm start" : "npm install && npm start"
     console.log("Running command", Path.join(ctkPath, "ctk"))
     let command_options = {
         cwd: Path.join(ctkPath, "ctk")
@@ -288,6 +337,27 @@ function runAPICTK(apiData) {
 }
 
 
+// Install the node_modules of a CTK once, before its shards share them
+function installAPICTK(apiData) {
+    let ctkDir = Path.join(apiData.path, "ctk")
+    if (fs.existsSync(Path.join(ctkDir, "node_modules"))) {
+        return Promise.resolve()
+    }
+    console.log("Installing api CTK", ctkDir)
+    return new Promise((resolve, reject) => {
+        exec("npm install", { cwd: ctkDir }, (error, stdout, stderr) => {
+            if (error) {
+                reject({
+                    error: error,
+                    stdout: stdout,
+                    stderr: stderr,
+                    statusCode: error.code
+                })
+            }
+            resolve()
+        })
+    })
+}
 
 function writeToFile(filePath, data) {
     return new Promise((resolve, reject) => {
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The helper modules are imported the way CTK_Executor.py imports them, from the scripts folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
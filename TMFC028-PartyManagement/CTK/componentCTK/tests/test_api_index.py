@@ -0,0 +1,73 @@
+import api_index
+
+INDEX = {
+    "TMF632_v4.0.0": {"ctk": "https://example.com/TMF632_v4.0.0.zip"},
+    "TMF632_v4.1.0": {"ctk": "https://example.com/TMF632_v4.1.0.zip"},
+    "TMF632_v5.0.0": {"ctk": "https://example.com/TMF632_v5.0.0.zip"},
+    "TMF669E_v4.2.0": {"ctk": "https://example.com/TMF669E_v4.2.0.zip"},
+    "TMF669E_v4.10.0": {"ctk": "https://example.com/TMF669E_v4.10.0.zip"},
+    "TMF673_v4.0.0": {"ctk": "https://example.com/TMF673_v4.0.0.zip"},
+    "TMF673B_v4.9.0": {"ctk": "https://example.com/TMF673B_v4.9.0.zip"},
+    "notAnApi": {"ctk": "https://example.com/x.zip"},
+    "TMF999_v4.0.0": "not an entry",
+}
+
+
+def test_lookup_is_by_id_and_major_version():
+    lookup = api_index.build_lookup(INDEX)
+    assert api_index.find(lookup, "TMF632", 4)["key"] == "TMF632_v4.1.0"
+    assert api_index.find(lookup, "tmf632", 5)["key"] == "TMF632_v5.0.0"
+    assert api_index.find(lookup, "TMF632", 3) is None
+    assert api_index.find(lookup, "TMF63", 4) is None
+    assert api_index.find(lookup, "TMF6320", 4) is None
+    assert api_index.find(lookup, "TMF999", 4) is None
+
+
+def test_default_major_version():
+    lookup = api_index.build_lookup(INDEX)
+    assert api_index.find(lookup, "TMF632")["key"] == "TMF632_v4.1.0"
+
+
+def test_minor_versions_compare_as_numbers():
+    lookup = api_index.build_lookup(INDEX)
+    assert api_index.find(lookup, "TMF669E", 4)["version"] == "4.10.0"
+
+
+def test_variant_answers_for_the_plain_id():
+    lookup = api_index.build_lookup(INDEX)
+    assert api_index.find(lookup, "TMF669", 4)["key"] == "TMF669E_v4.10.0"
+    assert api_index.find(lookup, "TMF669", 5) is None
+
+
+def test_plain_id_keeps_its_own_ctk():
+    lookup = api_index.build_lookup(INDEX)
+    assert api_index.find(lookup, "TMF673", 4)["key"] == "TMF673_v4.0.0"
+    assert api_index.find(lookup, "TMF673B", 4)["key"] == "TMF673B_v4.9.0"
+
+
+def test_major_version():
+    assert api_index.major_version("v4.0.0") == 4
+    assert api_index.major_version("5") == 5
+    assert api_index.major_version(" V5.1 ") == 5
+    assert api_index.major_version("latest") is None
+    assert api_index.major_version(None) is None
+
+
+def test_api_major_versions():
+    yaml_content = {"spec": {
+        "coreFunction": {
+            "exposedAPIs": [
+                {"id": "TMF632", "specification": [{"version": "v5.0.0"}, {"version": "v4.0.0"}]},
+                {"id": "TMF669", "specification": {"version": "4.1"}},
+                {"id": "TMF688"},
+            ],
+            "dependentAPIs": None,
+        },
+        "securityFunction": {"exposedAPIs": [
+            {"id": "TMF644", "specification": [{"version": "unknown"}]},
+            {"id": "TMF632", "specification": [{"version": "v4.0.0"}]},
+        ]},
+    }}
+    assert api_index.api_major_versions(yaml_content) == {
+        "TMF632": 5, "TMF669": 4, "TMF688": api_index.DEFAULT_MAJOR_VERSION,
+        "TMF644": api_index.DEFAULT_MAJOR_VERSION}
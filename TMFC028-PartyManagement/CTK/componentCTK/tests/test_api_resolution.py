@@ -0,0 +1,73 @@
+import subprocess
+
+import pytest
+
+import api_resolution
+import yaml_index
+
+STUB_MANIFEST = """\
+apiVersion: oda.tmforum.org/v1beta3
+kind: Component
+metadata:
+  name: {namespace}-stub
+spec:
+  coreFunction:
+    exposedAPIs:
+    - id: TMF669
+      path: /{namespace}/tmf-api/partyRoleManagement/v4
+"""
+
+
+@pytest.fixture
+def helm(monkeypatch):
+    calls = []
+    context = {"name": "kind-ctk|https://127.0.0.1:6443"}
+
+    def run(command, **kwargs):
+        assert command[:3] == ["helm", "get", "manifest"]
+        namespace = command[command.index("-n") + 1]
+        calls.append((command[3], namespace, context["name"]))
+        return subprocess.CompletedProcess(command, 0, stdout=STUB_MANIFEST.format(namespace=namespace))
+
+    monkeypatch.setattr(api_resolution.subprocess, "run", run)
+    monkeypatch.setattr(api_resolution, "helm_revision", lambda release, namespace: "3")
+    monkeypatch.setattr(api_resolution, "kube_context", lambda: context["name"])
+    return calls, context
+
+
+def _paths(docs):
+    return api_resolution.component_document(docs)["spec"]["coreFunction"]["exposedAPIs"][0]["path"]
+
+
+def test_manifest_is_reused_while_the_revision_is_unchanged(tmp_path, helm):
+    calls, _ = helm
+    cache_dir = str(tmp_path / "cache")
+    for _ in range(2):
+        docs, revision = api_resolution.stub_manifest_documents("stub", "components", str(tmp_path), cache_dir)
+    assert revision == "3"
+    assert _paths(docs) == "/components/tmf-api/partyRoleManagement/v4"
+    assert len(calls) == 1
+
+
+def test_same_revision_in_another_namespace_is_fetched_again(tmp_path, helm):
+    calls, _ = helm
+    cache_dir = str(tmp_path / "cache")
+    api_resolution.stub_manifest_documents("stub", "components", str(tmp_path), cache_dir)
+    docs, revision = api_resolution.stub_manifest_documents("stub", "canary", str(tmp_path), cache_dir)
+    assert revision == "3"
+    assert _paths(docs) == "/canary/tmf-api/partyRoleManagement/v4"
+    assert [namespace for _, namespace, _ in calls] == ["components", "canary"]
+    assert yaml_index.cached_revision(cache_dir, str(tmp_path / "stub-stub.yaml")).endswith("/canary/stub@3")
+
+
+def test_same_revision_on_another_cluster_is_fetched_again(tmp_path, helm):
+    calls, context = helm
+    cache_dir = str(tmp_path / "cache")
+    api_resolution.stub_manifest_documents("stub", "components", str(tmp_path), cache_dir)
+    context["name"] = "prod|https://10.0.0.1:6443"
+    api_resolution.stub_manifest_documents("stub", "components", str(tmp_path), cache_dir)
+    assert len(calls) == 2
+
+
+def test_manifest_revision():
+    assert api_resolution.manifest_revision("stub", "components", None) is None
@@ -0,0 +1,97 @@
+import os
+import zipfile
+
+import pytest
+
+import ctk_extract
+
+
+def _zip(path, members):
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return str(path)
+
+
+def _tree(root):
+    return sorted(os.path.relpath(os.path.join(d, f), root).replace(os.sep, "/")
+                  for d, _, files in os.walk(root) for f in files)
+
+
+@pytest.mark.parametrize("name", [
+    "../evil.sh",
+    "CTK/../../evil.sh",
+    "CTK/ctk/../../../evil.sh",
+    "CTK\\..\\..\\evil.bat",
+    "RI/../../evil.sh",
+])
+def test_parent_references_are_rejected_before_writing(tmp_path, name):
+    zip_path = _zip(tmp_path / "ctk.zip", {"CTK/config.json": "{}", "CTK/ctk/package.json": "{}", name: "x"})
+    dest = tmp_path / "out" / "TMF632_v4"
+    with pytest.raises(ctk_extract.UnsafeArchiveError):
+        ctk_extract.extract_ctk(zip_path, str(dest))
+    assert not (tmp_path / "out").exists()
+    assert not (tmp_path / "evil.sh").exists() and not (tmp_path / "evil.bat").exists()
+
+
+@pytest.mark.parametrize("name", ["/etc/evil", "C:/evil", "c:\\evil", "CTK/ctk/a\x00b"])
+def test_absolute_paths_are_rejected(name):
+    with pytest.raises(ctk_extract.UnsafeArchiveError):
+        ctk_extract.member_parts(name)
+
+
+def test_harmless_dots_are_accepted():
+    assert ctk_extract.member_parts("./CTK//ctk/./..hidden/a..b") == ["CTK", "ctk", "..hidden", "a..b"]
+
+
+def test_only_the_ctk_is_extracted(tmp_path):
+    zip_path = _zip(tmp_path / "ctk.zip", {
+        "TMF632/Conformance.pdf": "pdf",
+        "TMF632/RI/config.json": "{}",
+        "TMF632/RI/ctk/server.js": "ri",
+        "TMF632/CTK/config.json": '{"url": ""}',
+        "TMF632/CTK/Mac-Linux-RUNCTK.sh": "#!/bin/sh",
+        "TMF632/CTK/Windows-Bat-RUNCTK.bat": "@echo off",
+        "TMF632/CTK/README.md": "docs",
+        "TMF632/CTK/ctk/package.json": "{}",
+        "TMF632/CTK/ctk/collection/TMF632.json": "{}",
+        "__MACOSX/TMF632/CTK/._config.json": "",
+    })
+    dest = tmp_path / "TMF632_v4"
+    ctk_extract.extract_ctk(zip_path, str(dest))
+    assert _tree(dest) == ["Mac-Linux-RUNCTK.sh", "Windows-Bat-RUNCTK.bat", "config.json",
+                           "ctk/collection/TMF632.json", "ctk/package.json"]
+    if os.name == "posix":
+        assert os.stat(dest / "Mac-Linux-RUNCTK.sh").st_mode & 0o111
+
+
+def test_nested_ctk_folder_wins(tmp_path):
+    zip_path = _zip(tmp_path / "ctk.zip", {
+        "CTK/config.json": '{"outer": true}',
+        "CTK/CTK/config.json": '{"inner": true}',
+        "CTK/CTK/ctk/package.json": "{}",
+    })
+    dest = tmp_path / "TMF632_v4"
+    ctk_extract.extract_ctk(zip_path, str(dest))
+    assert (dest / "config.json").read_text() == '{"inner": true}'
+    assert _tree(dest) == ["config.json", "ctk/package.json"]
+
+
+def test_archive_without_config_is_refused(tmp_path):
+    zip_path = _zip(tmp_path / "ctk.zip", {"CTK/ctk/package.json": "{}"})
+    with pytest.raises(ValueError):
+        ctk_extract.extract_ctk(zip_path, str(tmp_path / "TMF632_v4"))
+
+
+def test_existing_tree_is_replaced_or_kept(tmp_path):
+    dest = tmp_path / "TMF632_v4"
+    ctk_extract.extract_ctk(_zip(tmp_path / "v1.zip", {"CTK/config.json": "1", "CTK/ctk/old.json": "{}"}), str(dest))
+    v2 = _zip(tmp_path / "v2.zip", {"CTK/config.json": "2", "CTK/ctk/new.json": "{}"})
+
+    ctk_extract.extract_ctk(v2, str(dest), replace=False)
+    assert (dest / "config.json").read_text() == "1"
+
+    ctk_extract.extract_ctk(v2, str(dest))
+    assert _tree(dest) == ["config.json", "ctk/new.json"]
+    assert (dest / "config.json").read_text() == "2"
+    assert sorted(os.listdir(tmp_path)) == ["TMF632_v4", "v1.zip", "v2.zip"]
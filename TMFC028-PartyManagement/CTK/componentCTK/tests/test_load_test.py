@@ -0,0 +1,109 @@
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import load_test
+
+POST_PAYLOAD = {"@type": "PartyRole", "name": "Buyer", "status": "initialized",
+                "engagedParty": {"id": "42", "@referredType": "Individual"}}
+
+
+@pytest.fixture
+def api():
+    store = {}
+    patches = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, code, body=None):
+            data = json.dumps(body).encode("utf-8") if body is not None else b""
+            self.send_response(code)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _body(self):
+            return json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+
+        def do_POST(self):
+            body = {**self._body(), "id": str(uuid.uuid4())}
+            store[body["id"]] = body
+            self._send(201, body)
+
+        def do_GET(self):
+            self._send(200, store.get(self.path.rsplit("/", 1)[-1], list(store.values())[:10]))
+
+        def do_PATCH(self):
+            patch = self._body()
+            patches.append(patch)
+            resource_id = self.path.rsplit("/", 1)[-1]
+            # Like TMF APIs, refuse to change read-only and immutable fields
+            if resource_id not in store or set(patch) & {"id", "href", "@type", "engagedParty"}:
+                self._send(400, {"message": "invalid patch"})
+                return
+            store[resource_id].update(patch)
+            self._send(200, store[resource_id])
+
+        def do_DELETE(self):
+            self._send(204 if store.pop(self.path.rsplit("/", 1)[-1], None) else 404)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/tmf-api/partyRoleManagement/v4", store, patches
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _targets(base_url, methods):
+    return load_test.build_targets({"TMF669": base_url}, {"TMF669_v4": {"PartyRole": methods}},
+                                   {"TMF669": "TMF669_v4"})
+
+
+def test_patch_payload():
+    assert load_test.patch_payload({}, POST_PAYLOAD) == {"name": "Buyer (load test)"}
+    assert load_test.patch_payload({}, {"description": "d", "name": "n"}) == {"description": "d (load test)"}
+    assert load_test.patch_payload({"PATCH": {"payload": {"status": "validated"}}}, POST_PAYLOAD) == \
+        {"status": "validated"}
+    assert load_test.patch_payload({}, {"engagedParty": {"id": "42"}}) is None
+
+
+def test_load_run_patches_one_field_and_deletes_what_it_created(api):
+    base_url, store, patches = api
+    targets = _targets(base_url, {"POST": {"payload": POST_PAYLOAD}})
+    report = load_test.run_load(targets, {}, {"concurrency": 4, "durationSeconds": 0.5,
+                                              "mix": {"POST": 1, "PATCH": 2}})
+    by_method = {r["method"]: r for r in report["results"]}
+    assert by_method["POST"]["requests"] > 0 and by_method["PATCH"]["requests"] > 0
+    assert by_method["PATCH"]["errors"] == 0
+    assert all(patch == {"name": "Buyer (load test)"} for patch in patches)
+    assert report["cleanup"] == {"deleted": by_method["POST"]["requests"], "failed": 0}
+    assert store == {}
+
+
+def test_patch_is_replaced_by_get_without_a_mutable_field(api):
+    base_url, store, patches = api
+    targets = _targets(base_url, {"POST": {"payload": {"engagedParty": {"id": "42"}}}})
+    report = load_test.run_load(targets, {}, {"concurrency": 2, "durationSeconds": 0.3,
+                                              "mix": {"POST": 1, "PATCH": 1}})
+    assert patches == []
+    assert {r["method"] for r in report["results"]} <= {"POST", "GET"}
+    assert store == {}
+
+
+def test_cleanup_can_be_turned_off(api):
+    base_url, store, _ = api
+    targets = _targets(base_url, {"POST": {"payload": POST_PAYLOAD}})
+    report = load_test.run_load(targets, {}, {"concurrency": 2, "durationSeconds": 0.2, "cleanup": False,
+                                              "mix": {"POST": 1}})
+    assert report["cleanup"] is None
+    assert len(store) == report["total"]["requests"]
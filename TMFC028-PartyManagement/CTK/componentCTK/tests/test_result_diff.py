@@ -0,0 +1,105 @@
+import json
+import os
+
+import pytest
+
+import result_diff
+
+
+def _execution(name, assertions, ms=100, method="GET"):
+    return {"item": {"name": name}, "request": {"method": method},
+            "response": {"responseTime": ms, "stream": {"type": "Buffer", "data": [123, 125]}},
+            "assertions": [{"assertion": a, **({} if passed else {"error": {"message": "failed"}})}
+                           for a, passed in assertions]}
+
+
+def _run(path, executions=(), mocha=None, scenarios=None):
+    api_dir = os.path.join(path, "api-ctk-results")
+    os.makedirs(api_dir)
+    with open(os.path.join(api_dir, "TMF632.json"), "w", encoding="utf-8") as f:
+        json.dump({"run": {"executions": list(executions)}}, f)
+    if mocha is not None:
+        os.makedirs(os.path.join(path, "baseline-ctk"))
+        with open(os.path.join(path, "baseline-ctk", "TMF632-report.json"), "w", encoding="utf-8") as f:
+            json.dump({"results": [{"title": "", "tests": [], "suites": [
+                {"title": "Party", "tests": [{"title": t, "state": s, "duration": 5} for t, s in mocha]}]}]}, f)
+    if scenarios is not None:
+        os.makedirs(os.path.join(path, "cucumber-bdd"))
+        with open(os.path.join(path, "cucumber-bdd", "results.json"), "w", encoding="utf-8") as f:
+            json.dump([{"name": "Party", "elements": [
+                {"name": name, "steps": [{"keyword": "Then ", "name": "it works",
+                                          "result": {"status": status, "duration": 1000000}}]}
+                for name, status in scenarios]}], f)
+    return str(path)
+
+
+def _names(rows):
+    return sorted((row["test"], row["assertion"]) for row in rows)
+
+
+def test_duplicate_test_names_are_aligned_by_occurrence(tmp_path):
+    old = _run(tmp_path / "old", [_execution("party", [("Status code is 200", True)]),
+                                  _execution("party", [("Status code is 200", False)])])
+    new = _run(tmp_path / "new", [_execution("party", [("Status code is 200", False)]),
+                                  _execution("party", [("Status code is 200", True)])])
+    result = result_diff.diff(old, new)
+    assert result["compared"] == 2
+    assert (result["added"], result["removed"]) == (0, 0)
+    assert _names(result["newFailures"]) == [("GET party", "Status code is 200")]
+    assert _names(result["fixed"]) == [("GET party", "Status code is 200")]
+
+
+def test_duplicate_assertion_names_are_aligned_by_occurrence(tmp_path):
+    old = _run(tmp_path / "old", [_execution("party", [("check", True), ("check", True)])])
+    new = _run(tmp_path / "new", [_execution("party", [("check", True), ("check", False)])])
+    result = result_diff.diff(old, new)
+    assert len(result["newFailures"]) == 1
+    assert result["fixed"] == []
+
+
+def test_same_name_with_other_method_is_another_test(tmp_path):
+    old = _run(tmp_path / "old", [_execution("party", [("check", True)])])
+    new = _run(tmp_path / "new", [_execution("party", [("check", True)]),
+                                  _execution("party", [("check", False)], method="DELETE")])
+    result = result_diff.diff(old, new)
+    assert (result["compared"], result["added"], result["removed"]) == (1, 1, 0)
+    assert result["newFailures"] == [{"suite": "TMF632", "test": "DELETE party", "assertion": "check",
+                                      "newTest": True}]
+
+
+def test_removed_occurrence_and_fix_by_dropping_assertions(tmp_path):
+    old = _run(tmp_path / "old", [_execution("party", [("check", True), ("flaky", False)]),
+                                  _execution("party", [("check", True)])])
+    new = _run(tmp_path / "new", [_execution("party", [("check", True)])])
+    result = result_diff.diff(old, new)
+    assert (result["compared"], result["added"], result["removed"]) == (1, 0, 1)
+    assert result["fixed"] == [{"suite": "TMF632", "test": "GET party", "assertion": None}]
+
+
+def test_latency_regressions(tmp_path):
+    old = _run(tmp_path / "old", [_execution("slow", [], ms=100), _execution("small", [], ms=10),
+                                  _execution("steady", [], ms=100)])
+    new = _run(tmp_path / "new", [_execution("slow", [], ms=150), _execution("small", [], ms=25),
+                                  _execution("steady", [], ms=115)])
+    result = result_diff.diff(old, new)
+    assert result["latencyRegressions"] == [{"suite": "TMF632", "test": "GET slow", "oldMs": 100,
+                                             "newMs": 150, "increase": 0.5}]
+
+
+def test_mocha_and_cucumber_suites(tmp_path):
+    old = _run(tmp_path / "old", mocha=[("creates", "passed"), ("creates", "failed")],
+               scenarios=[("Create", "passed"), ("Create", "passed")])
+    new = _run(tmp_path / "new", mocha=[("creates", "passed"), ("creates", "passed")],
+               scenarios=[("Create", "passed"), ("Create", "undefined")])
+    result = result_diff.diff(old, new)
+    assert result["compared"] == 4
+    assert result["fixed"] == [{"suite": "baseline-ctk/TMF632", "test": "Party creates", "assertion": "test"}]
+    assert result["newFailures"] == [{"suite": result_diff.BDD_SUITE, "test": "Party: Create",
+                                      "assertion": "Then it works", "newTest": False}]
+
+
+def test_resolve_run_uses_nested_results(tmp_path):
+    _run(tmp_path / "Reports" / "results")
+    assert result_diff.resolve_run(str(tmp_path / "Reports"), None, None) == str(tmp_path / "Reports" / "results")
+    with pytest.raises(ValueError):
+        result_diff.resolve_run("no-such-run", str(tmp_path), None)
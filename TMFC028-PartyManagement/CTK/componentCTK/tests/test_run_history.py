@@ -0,0 +1,67 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+import run_history
+import stream_json
+
+
+def _newman(executions):
+    return {
+        "collection": {"info": {"name": "TMF632"}, "item": [{"name": "Individual", "item": []}]},
+        "run": {
+            "stats": {"assertions": {"total": 99, "failed": 99}},
+            "timings": {"started": 1000, "completed": 3500},
+            "executions": executions,
+            "failures": []
+        }
+    }
+
+
+def _execution(name, assertions, code=200):
+    return {"item": {"name": name},
+            "request": {"method": "GET", "url": {"protocol": "https", "host": ["party", "local"],
+                                                  "path": ["tmf-api", "party", "v4", "individual"]}},
+            "response": {"code": code, "responseTime": 12, "stream": {"type": "Buffer", "data": [123, 125] * 50}},
+            "assertions": [{"assertion": a, **({} if passed else {"error": {"message": f"{a} failed"}})}
+                           for a, passed in assertions]}
+
+
+@pytest.fixture
+def results_dir(tmp_path):
+    api_dir = tmp_path / "results" / "api-ctk-results"
+    api_dir.mkdir(parents=True)
+    (api_dir / "TMF632.json").write_text(json.dumps(_newman([
+        _execution("list", [("Status code is 200", True), ("Body is an array", True)]),
+        _execution("get", [("Status code is 200", False), ("Has id", False), ("Has href", True)], code=404),
+    ]), indent=2), encoding="utf-8")
+    # Cut in its second execution, after the first one was stored
+    truncated = json.dumps(_newman([_execution("list", [("ok", True)]), _execution("get", [("ok", True)])]))
+    (api_dir / "TMF669.json").write_text(truncated[:truncated.index('"get"')], encoding="utf-8")
+    (api_dir / "TMF673.json").write_text("", encoding="utf-8")
+    return str(tmp_path / "results")
+
+
+@pytest.mark.parametrize("chunk_size", [7, 1024 * 1024])
+def test_newman_reports_are_streamed_into_the_history(tmp_path, results_dir, monkeypatch, chunk_size):
+    monkeypatch.setattr(stream_json, "CHUNK_SIZE", chunk_size)
+    db_path = str(tmp_path / "history.db")
+    run_id = run_history.ingest(db_path, results_dir, "TMFC028", "partyrelease", "3")
+    connection = sqlite3.connect(db_path)
+    try:
+        apis = connection.execute("SELECT api, kind, assertions_total, assertions_failed, duration_ms FROM apis "
+                                  "WHERE run_id = ?", (run_id,)).fetchall()
+        assert apis == [("TMF632", "newman", 5, 2, 2500)]
+        test_cases = connection.execute("SELECT name, method, url, status_code, passed FROM test_cases "
+                                        "ORDER BY id").fetchall()
+        assert test_cases == [
+            ("list", "GET", "https://party.local/tmf-api/party/v4/individual", 200, 1),
+            ("get", "GET", "https://party.local/tmf-api/party/v4/individual", 404, 0)]
+        assertions = connection.execute("SELECT name, passed, error FROM assertions ORDER BY id").fetchall()
+        assert assertions[2:4] == [("Status code is 200", 0, "Status code is 200 failed"),
+                                   ("Has id", 0, "Has id failed")]
+        assert len(assertions) == 5
+    finally:
+        connection.close()
@@ -0,0 +1,103 @@
+import io
+import json
+
+import pytest
+
+import stream_json
+
+# Chunk sizes small enough that strings, escapes, numbers and literals are split across reads
+CHUNK_SIZES = [1, 2, 3, 5, 7, 16]
+
+DOCUMENT = {
+    "run": {
+        "stats": {"requests": {"total": 12345, "failed": 0}},
+        "executions": [
+            {"item": {"name": "create \"party\" \\ role"}, "response": {"code": 201, "stream": {"type": "Buffer",
+                                                                                                 "data": [123, 34, 105]}}},
+            {"item": {"name": "naïve ünïcode ✅"}, "ratio": -1.5e-10, "ok": True, "missing": None},
+            {"item": {"name": "nested"}, "values": [[1, [2, [3]]], {"a": {"b": {}}}], "empty": []}
+        ]
+    }
+}
+
+
+@pytest.fixture
+def document(tmp_path):
+    path = tmp_path / "doc.json"
+    path.write_text(json.dumps(DOCUMENT, indent=2, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture(params=CHUNK_SIZES)
+def chunk_size(request, monkeypatch):
+    monkeypatch.setattr(stream_json, "CHUNK_SIZE", request.param)
+    return request.param
+
+
+def _copy(path, **options):
+    out = io.StringIO()
+    stream_json.copy_json(path, out, **options)
+    return out.getvalue()
+
+
+def test_copy_without_options_is_verbatim(document, chunk_size):
+    with open(document, encoding="utf-8") as f:
+        assert _copy(document) == f.read()
+
+
+def test_compact_copy_across_chunks(document, chunk_size):
+    compact = _copy(document, compact=True)
+    assert json.loads(compact) == DOCUMENT
+    assert compact == json.dumps(DOCUMENT, separators=(",", ":"), ensure_ascii=False)
+
+
+def test_strip_response_bodies_across_chunks(document, chunk_size):
+    stripped = json.loads(_copy(document, strip_response_bodies=True))
+    executions = stripped["run"]["executions"]
+    assert executions[0]["response"] == {"code": 201, "stream": None}
+    assert executions[1:] == DOCUMENT["run"]["executions"][1:]
+
+
+def test_iter_array_across_chunks(document, chunk_size):
+    items = list(stream_json.iter_array(document, ("run", "executions")))
+    assert items == DOCUMENT["run"]["executions"]
+
+
+def test_iter_array_number_split_at_chunk_end(tmp_path, chunk_size):
+    path = tmp_path / "numbers.json"
+    path.write_text("[1234567, 89, -0.125, 1e5]", encoding="utf-8")
+    assert list(stream_json.iter_array(str(path))) == [1234567, 89, -0.125, 1e5]
+
+
+def test_iter_array_empty_and_missing(tmp_path, chunk_size):
+    path = tmp_path / "empty.json"
+    path.write_text('{"run": {"stats": {}, "executions": [ ]}}', encoding="utf-8")
+    assert list(stream_json.iter_array(str(path), ("run", "executions"))) == []
+    assert list(stream_json.iter_array(str(path), ("run", "failures"))) == []
+
+
+def test_iter_array_drops_byte_arrays_only(tmp_path, chunk_size):
+    executions = [
+        {"item": {"name": 'GET "data": [1, 2]'}, "response": {"stream": {"type": "Buffer", "data": [123, 125]}}},
+        {"item": {"name": "list"}, "data": ["a", "b"], "response": {"stream": {"type": "Buffer", "data": []}}},
+        {"item": {"name": "plain"}, "body": '{"data": [1, 2]}', "data": {"data": [7]}},
+    ]
+    path = tmp_path / "newman.json"
+    path.write_text(json.dumps({"run": {"executions": executions}}, indent=1), encoding="utf-8")
+    items = list(stream_json.iter_array(str(path), ("run", "executions"), drop_byte_arrays=True))
+    dropped = {"stream": {"type": "Buffer", "data": None}}
+    assert items[0] == {"item": {"name": 'GET "data": [1, 2]'}, "response": dropped}
+    assert items[1] == {"item": {"name": "list"}, "data": ["a", "b"], "response": dropped}
+    assert items[2] == {"item": {"name": "plain"}, "body": '{"data": [1, 2]}', "data": {"data": None}}
+
+def test_object_values_across_chunks(document, chunk_size):
+    assert stream_json.object_values(document, ("run",), ("stats",)) == {"stats": DOCUMENT["run"]["stats"]}
+    assert stream_json.object_values(document, ("run",), ("executions", "missing")) == {
+        "executions": DOCUMENT["run"]["executions"]}
+    assert stream_json.object_values(document, ("run", "stats"), ("requests",)) == DOCUMENT["run"]["stats"]
+    assert stream_json.object_values(document, ("other",), ("stats",)) == {}
+
+def test_write_json_file_value_of_missing_file(tmp_path):
+    out = io.StringIO()
+    stream_json.write_json_file_value(out, str(tmp_path / "missing.json"))
+    assert out.getvalue() == "null"
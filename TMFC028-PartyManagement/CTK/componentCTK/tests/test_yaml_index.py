@@ -0,0 +1,103 @@
+import json
+
+import pytest
+import yaml
+
+import yaml_index
+
+MANIFEST = """\
+apiVersion: v1
+kind: Service
+metadata:
+  name: party-svc
+---
+---
+apiVersion: oda.tmforum.org/v1beta3
+kind: Component
+metadata:
+  name: partyrelease-partymanagement
+spec:
+  componentMetadata:
+    version: 1.0.0
+  coreFunction:
+    exposedAPIs:
+    - id: TMF632
+      name: party
+    dependentAPIs:
+  securityFunction:
+"""
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    path = tmp_path / "component-partyrelease.yaml"
+    path.write_text(MANIFEST, encoding="utf-8")
+    return path
+
+
+def _no_parsing(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("the YAML was parsed again")
+    monkeypatch.setattr(yaml, "load_all", fail)
+
+
+def test_documents_are_parsed_once(manifest, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    documents = yaml_index.load_documents(str(manifest), cache_dir)
+    assert [doc["kind"] for doc in documents] == ["Service", "Component"]
+    _no_parsing(monkeypatch)
+    assert yaml_index.load_documents(str(manifest), cache_dir) == documents
+
+
+def test_changed_content_is_parsed_again(manifest, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    yaml_index.load_documents(str(manifest), cache_dir)
+    manifest.write_text(MANIFEST.replace("party-svc", "other-svc"), encoding="utf-8")
+    assert yaml_index.load_documents(str(manifest), cache_dir)[0]["metadata"]["name"] == "other-svc"
+
+
+def test_revision_is_part_of_the_key(manifest, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    assert yaml_index.cached_revision(cache_dir, str(manifest)) is None
+    yaml_index.load_documents(str(manifest), cache_dir, revision=3)
+    assert yaml_index.cached_revision(cache_dir, str(manifest)) == 3
+
+    parsed = []
+    load_all = yaml.load_all
+    monkeypatch.setattr(yaml, "load_all", lambda *a, **kw: parsed.append(1) or load_all(*a, **kw))
+    yaml_index.load_documents(str(manifest), cache_dir, revision=3)
+    assert parsed == []
+    yaml_index.load_documents(str(manifest), cache_dir, revision=4)
+    assert parsed == [1]
+    assert yaml_index.cached_revision(cache_dir, str(manifest)) == 4
+
+
+def test_cached_revision_of_a_changed_file(manifest, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    yaml_index.load_documents(str(manifest), cache_dir, revision=3)
+    manifest.write_text(MANIFEST + "# edited\n", encoding="utf-8")
+    assert yaml_index.cached_revision(cache_dir, str(manifest)) is None
+
+
+def test_unreadable_cache_entry_is_replaced(manifest, tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    (cache_dir / (manifest.name + ".json")).write_text("{not json", encoding="utf-8")
+    assert len(yaml_index.load_documents(str(manifest), str(cache_dir))) == 2
+    assert json.loads((cache_dir / (manifest.name + ".json")).read_text(encoding="utf-8"))["documents"]
+
+
+def test_null_sections_give_empty_api_lists(manifest, tmp_path):
+    component = yaml_index.load_documents(str(manifest), str(tmp_path / "cache"))[1]
+    assert yaml_index.component_apis(component) == {
+        "exposedAPIs": [{"id": "TMF632", "name": "party"}], "dependentAPIs": [], "securityAPIs": []}
+    assert yaml_index.component_apis(None) == {"exposedAPIs": [], "dependentAPIs": [], "securityAPIs": []}
+
+
+def test_index_only_lists_deployed_components(manifest, tmp_path):
+    documents = yaml_index.load_documents(str(manifest), str(tmp_path / "cache"))
+    golden = {"metadata": {"name": "TMFC028"}, "spec": {"componentMetadata": {"version": "1.0.0"}}}
+    index = yaml_index.write_index(str(tmp_path / "index.json"), golden, documents, "partyrelease", 3)
+    assert index["golden"]["name"] == "TMFC028"
+    assert [c["name"] for c in index["deployed"]["components"]] == ["partyrelease-partymanagement"]
+    assert json.loads((tmp_path / "index.json").read_text(encoding="utf-8")) == index